@@ -1,7 +1,10 @@
 from flask import Flask
 from flask_cors import CORS
 
-from systems.resources.resource_tick_service import get_tick_service
+from db import pool
+from db.writer import get_writer
+from db.static_data import get_static_data
+from services.background import leader_election
 import atexit
 import logging
 
@@ -15,6 +18,9 @@ CORS(
     supports_credentials=True
 )
 
+# One pooled connection per request, see db.pool.get_db
+pool.init_app(app)
+
 from routes.army import army_bp
 app.register_blueprint(army_bp)
 
@@ -33,16 +39,35 @@ app.register_blueprint(settlement_bp)
 from routes.logout import logout_bp
 app.register_blueprint(logout_bp)
 
+from routes.refresh import refresh_bp
+app.register_blueprint(refresh_bp)
+
 from routes.neighbors import neighbors
 app.register_blueprint(neighbors)
 
 from routes.research import research
 app.register_blueprint(research)
 
+from routes.batch import batch_bp
+app.register_blueprint(batch_bp)
+
+from routes.metrics import metrics_bp
+app.register_blueprint(metrics_bp)
+
 if __name__ == '__main__':
-    print("🚀 Starting resource tick service...")
-    tick_service = get_tick_service()
-    tick_service.start(interval_seconds=60)  # Tick every 60 seconds for testing
-    atexit.register(lambda: tick_service.stop())
+    # Settlement types, unit types and research are served from memory
+    get_static_data()
+
+    # Request writes go through one writer thread that group-commits them
+    writer = get_writer()
+    writer.start()
+    atexit.register(lambda: writer.stop())
+
+    # Tick, modifier expiry and maintenance run in whichever process holds the leader lease,
+    # so this dev server can share a database with `python3 -m server` or services.tick_worker
+    election = leader_election()
+    election.start()
+    atexit.register(lambda: election.stop())
     
+    # Development server; use `python3 -m server` for multi-process production serving
     app.run(debug=True, host='0.0.0.0', port=4000, use_reloader=False)
\ No newline at end of file
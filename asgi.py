@@ -0,0 +1,225 @@
+"""
+Optional ASGI serving mode.
+
+The hot read endpoints run as coroutines: auth is checked on the event loop and the
+shared payload functions from routes/* (which call systems/*) run through
+db.async_db.AsyncDatabase, so a waiting client costs a coroutine rather than a thread.
+Every other path falls through to the Flask app, run on a bounded thread pool, so all
+blueprints are served either way.
+
+Needs an ASGI server, which is not a dependency of the WSGI modes:
+
+    pip install uvicorn
+    python3 -m asgi --port 4000
+"""
+import argparse
+import asyncio
+import io
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+import jwt
+from dotenv import load_dotenv
+from auth_tokens.token_cache import cached_claims, verify_token
+from database_operations.user_operations import get_cached_player_id_for_user
+from db.async_db import get_async_db
+from db.static_data import get_static_data
+from db.writer import get_writer
+from services.background import leader_election
+from routes.batch import match_read_route
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Threads running Flask for the paths without a native coroutine handler
+ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "8"))
+
+class HTTPError(Exception):
+    def __init__(self, status: int, error: str) -> None:
+        super().__init__(error)
+        self.status = status
+        self.error = error
+
+def _cookies(scope: dict) -> SimpleCookie:
+    cookie = SimpleCookie()
+    for name, value in scope["headers"]:
+        if name == b"cookie":
+            cookie.load(value.decode("latin-1"))
+    return cookie
+
+async def authenticate(scope: dict) -> int | None:
+    """The player_id for the request's auth_token cookie; the async counterpart of require_auth."""
+    morsel = _cookies(scope).get("auth_token")
+    if morsel is None or not morsel.value:
+        raise HTTPError(401, "Unauthorized")
+    try:
+        # A miss may check the token's session in the database, so it goes to the executor
+        payload = cached_claims(morsel.value) or await get_async_db().run(verify_token, morsel.value)
+    except jwt.ExpiredSignatureError:
+        raise HTTPError(401, "Token expired")
+    except jwt.InvalidTokenError:
+        raise HTTPError(401, "Invalid token")
+
+    player_id = payload.get("player_id")
+    if player_id is None:
+        player_id = await get_async_db().run(get_cached_player_id_for_user, payload["user_id"])
+    return player_id
+
+def match_route(method: str, path: str):
+    """A coroutine(player_id) for the GET routes in routes.batch.READ_ROUTES, else None."""
+    if method != "GET":
+        return None
+    handler, _, params = match_read_route(path)
+    if handler is None:
+        return None
+    return lambda player_id: get_async_db().run(handler, player_id, **params)
+
+async def _read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+def wsgi_environ(scope: dict, body: bytes) -> dict:
+    """A PEP 3333 environ for an ASGI http scope."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        # The body is already buffered, so its length is known even for a chunked request
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope["headers"]:
+        key = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if key == "CONTENT_LENGTH":
+            continue
+        if key == "CONTENT_TYPE":
+            environ[key] = value
+            continue
+        key = f"HTTP_{key}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+def _run_wsgi(wsgi_app, environ: dict) -> tuple[int, list, bytes]:
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response["status"] = int(status.split(" ", 1)[0])
+        response["headers"] = headers
+
+    result = wsgi_app(environ, start_response)
+    try:
+        body = b"".join(result)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    return response["status"], response["headers"], body
+
+async def _send(send, status: int, headers: list, body: bytes) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+class AsgiApp:
+    """ASGI application: coroutine handlers for the read routes, the Flask app for everything else."""
+
+    def __init__(self, wsgi_app=None, wsgi_threads: int = ASGI_WSGI_THREADS) -> None:
+        if wsgi_app is None:
+            from app import app as wsgi_app
+        self.wsgi_app = wsgi_app
+        self._wsgi_executor = ThreadPoolExecutor(max_workers=wsgi_threads, thread_name_prefix="asgi-wsgi")
+        self._election = None
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                get_static_data()
+                get_writer().start()
+                # Same leader lease as the WSGI modes, so only one process runs the tick
+                self._election = leader_election()
+                self._election.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._election:
+                    self._election.stop()
+                get_writer().stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _json_response(self, scope: dict, body: dict, status: int) -> tuple[int, list, bytes]:
+        """
+        A native route's reply, passed through the Flask app's after_request hooks.
+
+        Those hooks add the CORS headers (flask_cors, configured in app.py) and anything else
+        the app sets on responses, so both modes send the same headers. They are cheap and
+        run on the event loop.
+        """
+        with self.wsgi_app.request_context(wsgi_environ(scope, b"")):
+            response = self.wsgi_app.process_response(self.wsgi_app.json.response(body))
+            response.status_code = status
+            return response.status_code, list(response.headers.items()), response.get_data()
+
+    async def _wsgi(self, scope: dict, receive, send) -> None:
+        environ = wsgi_environ(scope, await _read_body(receive))
+        loop = asyncio.get_running_loop()
+        await _send(send, *await loop.run_in_executor(self._wsgi_executor, _run_wsgi, self.wsgi_app, environ))
+
+    async def __call__(self, scope: dict, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http":
+            return
+
+        handler = match_route(scope["method"], scope["path"])
+        if handler is None:
+            return await self._wsgi(scope, receive, send)
+
+        try:
+            player_id = await authenticate(scope)
+            body, status = await handler(player_id)
+        except HTTPError as e:
+            body, status = {"error": e.error}, e.status
+        except Exception as e:
+            logger.error(f"Error handling {scope['path']}: {e}", exc_info=True)
+            body, status = {"error": str(e)}, 500
+        await _send(send, *self._json_response(scope, body, status))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the app in ASGI mode (requires uvicorn)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit("ASGI mode needs an ASGI server: pip install uvicorn")
+    logging.basicConfig(level=logging.INFO)
+    uvicorn.run("asgi:AsgiApp", factory=True, host=args.host, port=args.port, workers=args.workers)
+
+#python3 -m asgi
@@ -1,13 +1,12 @@
 import jwt
 from functools import wraps
 from flask import request, jsonify
-from dotenv import load_dotenv
-import os
-
-load_dotenv()
-SECRET_KEY = os.getenv("SECRET_KEY")
+from auth_tokens.token_cache import cached_claims, verify_token
+from database_operations.user_operations import get_cached_player_id_for_user
+from db.pool import get_db
 
 def require_auth(fn: callable) -> callable:
+    """Reject requests without a valid auth_token cookie; set request.user_id and request.player_id."""
     @wraps(fn)
     def wrapper(*args: tuple, **kwargs: dict) -> callable:
         token = request.cookies.get("auth_token")
@@ -16,12 +15,18 @@ def require_auth(fn: callable) -> callable:
             return jsonify({"error": "Unauthorized"}), 401
 
         try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+            # The request's connection is only borrowed when the token's session has to be checked
+            payload = cached_claims(token) or verify_token(token, get_db())
             request.user_id = payload["user_id"]
         except jwt.ExpiredSignatureError:
             return jsonify({"error": "Token expired"}), 401
         except jwt.InvalidTokenError:
             return jsonify({"error": "Invalid token"}), 401
 
+        # Tokens issued before player_id was a claim resolve it through the cache
+        request.player_id = payload.get("player_id")
+        if request.player_id is None:
+            request.player_id = get_cached_player_id_for_user(request.user_id, get_db())
+
         return fn(*args, **kwargs)
-    return wrapper
\ No newline at end of file
+    return wrapper
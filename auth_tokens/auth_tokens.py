@@ -7,11 +7,17 @@ load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY", "fallback-dev-key-CHANGE-IN-PRODUCTION")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
-EXPIRY_HOURS = int(os.getenv("JWT_EXPIRY_HOURS", "24"))
+# Access tokens are short-lived; clients renew them through /refresh with their session's refresh token
+ACCESS_TOKEN_MINUTES = int(os.getenv("ACCESS_TOKEN_MINUTES", "15"))
 
-def create_token(user_id: int) -> str:
+def create_token(user_id: int, player_id: int | None = None, session_id: int | None = None) -> str:
+    """Signed access token for a user. player_id is carried as a claim so requests skip the players lookup."""
     payload = {
         "user_id": user_id, 
-        "exp": datetime.utcnow() + timedelta(hours=EXPIRY_HOURS)
+        "exp": datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_MINUTES)
     }
-    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
\ No newline at end of file
+    if player_id is not None:
+        payload["player_id"] = player_id
+    if session_id is not None:
+        payload["sid"] = session_id
+    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
@@ -0,0 +1,26 @@
+from flask import Response
+from auth_tokens.auth_tokens import ACCESS_TOKEN_MINUTES
+from database_operations.session_operations import SESSION_DAYS
+
+def set_auth_cookies(response: Response, access_token: str, refresh_token: str) -> None:
+    """Attach the access token and the session's refresh token, each living as long as the token does."""
+    response.set_cookie(
+        "auth_token",
+        access_token,
+        httponly=True,
+        samesite="Lax",
+        secure=False,  # True in production
+        max_age=60 * ACCESS_TOKEN_MINUTES
+    )
+    response.set_cookie(
+        "refresh_token",
+        refresh_token,
+        httponly=True,
+        samesite="Strict",
+        secure=False,  # True in production
+        max_age=3600 * 24 * SESSION_DAYS
+    )
+
+def clear_auth_cookies(response: Response) -> None:
+    for name in ("auth_token", "refresh_token"):
+        response.set_cookie(name, "", httponly=True, samesite="Lax", secure=False, max_age=0)
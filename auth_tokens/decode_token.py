@@ -1,19 +1,13 @@
 import jwt
-from dotenv import load_dotenv
-import os
-
-load_dotenv()
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+from auth_tokens.token_cache import verify_token
 
 def decode_token(token: str) -> str | None:
     """
     Decode a JWT token and return the user_id if valid.
-    Returns None if token is invalid or expired.
+    Returns None if token is invalid, expired or revoked.
     """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload.get("user_id")
+        return verify_token(token).get("user_id")
     except jwt.ExpiredSignatureError:
         print("Token expired")
         return None
@@ -0,0 +1,131 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dotenv import load_dotenv
+from werkzeug.security import check_password_hash, generate_password_hash
+from metrics.registry import get_registry
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Threads doing password hashing; each keeps a core busy for the length of one hash
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# Hashes allowed to wait for a worker before new ones are turned away with a 503
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "32"))
+# Longest a request waits for its hash, queueing included
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))
+# werkzeug method string for new hashes, including its work factor, e.g. scrypt:32768:8:1
+# or pbkdf2:sha256:600000. Existing hashes are checked with the parameters stored in them.
+PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+
+_metrics = get_registry()
+HASH_SECONDS = _metrics.summary("password_hash_seconds", "Time spent hashing on a worker", ("operation",))
+QUEUE_WAIT_SECONDS = _metrics.summary("password_hash_queue_wait_seconds", "Time a hash waited for a worker")
+REJECTED = _metrics.counter("password_hash_rejected_total", "Hashes turned away because the queue was full")
+IN_FLIGHT = _metrics.gauge("password_hash_in_flight", "Hashes running or waiting for a worker")
+
+class PasswordHasherBusy(Exception):
+    """Every worker is busy and the queue is full, or the hash timed out; the caller should answer 503."""
+
+class PasswordHasher:
+    """
+    Runs password hashing on a small dedicated pool so a burst of logins cannot occupy
+    every request thread.
+
+    At most workers + queue_size hashes are admitted at once; submitting another raises
+    PasswordHasherBusy straight away instead of queueing behind the burst.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, queue_size: int = PASSWORD_HASH_QUEUE_SIZE,
+                 method: str = PASSWORD_HASH_METHOD, timeout: float = PASSWORD_HASH_TIMEOUT) -> None:
+        self.workers = max(1, workers)
+        self.method = method
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        self._admitted = threading.BoundedSemaphore(self.workers + max(0, queue_size))
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        logger.info(f"PasswordHasher initialized ({self.workers} workers, queue of {queue_size})")
+
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _admit(self) -> None:
+        if not self._admitted.acquire(blocking=False):
+            REJECTED.inc()
+            raise PasswordHasherBusy("Too many password checks in progress")
+        with self._lock:
+            self._in_flight += 1
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._admitted.release()
+
+    def _run(self, operation: str, fn, *args):
+        self._admit()
+        queued = time.perf_counter()
+
+        def work():
+            started = time.perf_counter()
+            QUEUE_WAIT_SECONDS.observe(started - queued)
+            try:
+                return fn(*args)
+            finally:
+                HASH_SECONDS.observe(time.perf_counter() - started, operation=operation)
+
+        try:
+            future = self._executor.submit(work)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Still queued: give its slot back rather than hashing for a caller that has gone
+            future.cancel()
+            REJECTED.inc()
+            raise PasswordHasherBusy("Password check timed out waiting for a worker")
+
+    def hash(self, password: str) -> str:
+        """Hash a new password with the configured method.
+
+        Raises:
+            PasswordHasherBusy: If the queue is full or the hash times out.
+        """
+        return self._run("hash", generate_password_hash, password, self.method)
+
+    def check(self, password_hash: str, password: str) -> bool:
+        """Check a password against a stored hash.
+
+        Raises:
+            PasswordHasherBusy: If the queue is full or the hash times out.
+        """
+        return self._run("check", check_password_hash, password_hash, password)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+_hasher = None
+_hasher_lock = threading.Lock()
+
+def get_password_hasher() -> PasswordHasher:
+    """Single accessor for PasswordHasher"""
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                _hasher = PasswordHasher()
+    return _hasher
+
+IN_FLIGHT.set_function(lambda: get_password_hasher().in_flight())
+
+def hash_password(password: str) -> str:
+    return get_password_hasher().hash(password)
+
+def check_password(password_hash: str, password: str) -> bool:
+    return get_password_hasher().check(password_hash, password)
@@ -0,0 +1,171 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+import jwt
+from dotenv import load_dotenv
+from auth_tokens.auth_tokens import SECRET_KEY, ALGORITHM
+from database_operations.session_operations import is_session_active
+from metrics.registry import get_registry
+
+load_dotenv()
+
+# Verified tokens kept in memory; 0 disables the cache
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "4096"))
+# Longest a verified token is trusted without re-checking its signature, even if exp is later
+AUTH_TOKEN_CACHE_MAX_SECONDS = float(os.getenv("AUTH_TOKEN_CACHE_MAX_SECONDS", "300"))
+# Longest a token with a session (sid claim) is trusted before the session is checked again.
+# Revocations are per process, so this is how long a logout handled by one worker can take
+# to reach the others.
+AUTH_SESSION_CHECK_SECONDS = float(os.getenv("AUTH_SESSION_CHECK_SECONDS", "30"))
+
+_metrics = get_registry()
+CACHE_HITS = _metrics.counter("auth_token_cache_hits_total", "Requests authenticated from the verified-token cache")
+CACHE_MISSES = _metrics.counter("auth_token_cache_misses_total", "Requests whose token had to be decoded and verified")
+
+class RevokedTokenError(jwt.InvalidTokenError):
+    """The token was revoked, or its session ended, before it expired."""
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of verified claims keyed by the token's SHA-256 digest.
+
+    An entry lives until the token's exp (capped at max_seconds). Revoked digests are
+    remembered until their exp so the token is rejected without decoding it again.
+    """
+
+    def __init__(self, size: int = AUTH_TOKEN_CACHE_SIZE, max_seconds: float = AUTH_TOKEN_CACHE_MAX_SECONDS) -> None:
+        self.size = size
+        self.max_seconds = max_seconds
+        self._entries = OrderedDict()   # digest -> (claims, expires_at)
+        self._revoked = {}              # digest -> exp
+        self._lock = threading.Lock()
+
+    def get(self, digest: bytes, now: float) -> dict | None:
+        """Cached claims for a digest, None on a miss or once the entry has expired."""
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            claims, expires_at = entry
+            if now >= expires_at:
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+            return claims
+
+    def put(self, digest: bytes, claims: dict, now: float, max_seconds: float | None = None) -> None:
+        """Cache claims until exp, or for at most max_seconds (the cache's own limit by default)."""
+        if self.size <= 0:
+            return
+        trusted_for = self.max_seconds if max_seconds is None else min(max_seconds, self.max_seconds)
+        expires_at = min(claims.get("exp", now), now + trusted_for)
+        if expires_at <= now:
+            return
+        with self._lock:
+            self._entries[digest] = (claims, expires_at)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def revoke(self, digest: bytes, exp: float, now: float) -> None:
+        """Drop a digest and reject it until exp."""
+        with self._lock:
+            self._entries.pop(digest, None)
+            # Forget revocations of tokens that have expired anyway
+            for expired in [d for d, revoked_until in self._revoked.items() if revoked_until <= now]:
+                del self._revoked[expired]
+            self._revoked[digest] = exp
+
+    def is_revoked(self, digest: bytes, now: float) -> bool:
+        with self._lock:
+            return self._revoked.get(digest, 0) > now
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._revoked.clear()
+
+_token_cache = None
+
+def get_token_cache() -> VerifiedTokenCache:
+    """Single accessor for the process-wide VerifiedTokenCache"""
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = VerifiedTokenCache()
+    return _token_cache
+
+def cached_claims(token: str) -> dict | None:
+    """
+    The claims of a token verified recently by this process, None on a cache miss.
+
+    Never touches the database, so coroutines can call it on the event loop.
+
+    Raises:
+        RevokedTokenError: If the token was revoked or its session was found ended.
+    """
+    cache = get_token_cache()
+    digest = token_digest(token)
+    now = time.time()
+
+    if cache.is_revoked(digest, now):
+        raise RevokedTokenError("Token revoked")
+
+    claims = cache.get(digest, now)
+    if claims is not None:
+        CACHE_HITS.inc()
+    return claims
+
+def verify_token(token: str, conn=None) -> dict:
+    """
+    The verified claims of a token, from the cache when it was seen before.
+
+    On a miss the signature is checked, and for a token with a sid claim so is its session,
+    on conn if given. Logouts in other processes only mark the session revoked in the
+    database, so such tokens are cached for at most AUTH_SESSION_CHECK_SECONDS.
+
+    Raises:
+        jwt.ExpiredSignatureError: If the token has expired.
+        RevokedTokenError: If the token was revoked by revoke_token or its session has ended.
+        jwt.InvalidTokenError: If the token is malformed or its signature does not match.
+    """
+    claims = cached_claims(token)
+    if claims is not None:
+        return claims
+
+    CACHE_MISSES.inc()
+    cache = get_token_cache()
+    digest = token_digest(token)
+    now = time.time()
+    claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+    session_id = claims.get("sid")
+    if session_id is None:
+        cache.put(digest, claims, now)
+        return claims
+
+    if not is_session_active(session_id, conn):
+        cache.revoke(digest, claims.get("exp", float("inf")), now)
+        raise RevokedTokenError("Session ended")
+    cache.put(digest, claims, now, AUTH_SESSION_CHECK_SECONDS)
+    return claims
+
+def revoke_token(token: str) -> dict | None:
+    """
+    Reject a token for the rest of its lifetime in this process (used by logout).
+
+    Other processes stop accepting it once its session is revoked, see verify_token.
+
+    Returns:
+        dict | None: The token's claims, or None if its signature is invalid or it has expired.
+    """
+    try:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.InvalidTokenError:
+        return None
+    get_token_cache().revoke(token_digest(token), claims.get("exp", float("inf")), time.time())
+    return claims
@@ -0,0 +1,169 @@
+"""
+Concurrent-client capacity: threaded WSGI against the ASGI mode.
+
+N clients connect at once. Each is slow to send its request (--hold seconds, such as a
+mobile client or a held keep-alive) and then asks for /total_resources. The threaded
+mode gives every connection a thread for its whole life, the way werkzeug's threaded
+server does. The ASGI mode waits on a coroutine and only takes a thread from the
+bounded AsyncDatabase executor for the query. Both run in-process on a temporary
+world, so no HTTP server is needed. The report shows wall time, the number of
+completed and failed clients, p99 latency and the peak thread count.
+
+    python3 -m benchmarks.bench_async_capacity --clients 100 1000 5000 --hold 0.5
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+from flask import Flask
+
+from asgi import AsgiApp, _run_wsgi, wsgi_environ
+from auth_tokens.auth_tokens import create_token
+from benchmarks.bench_resource_tick import build_world, open_db
+from db import connection, pool
+from db.async_db import AsyncDatabase
+from routes.resources import resource_bp
+
+
+def percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))] if values else 0.0
+
+
+class PeakThreads:
+    """Samples threading.active_count() in the background; peak is the largest seen."""
+
+    def __init__(self) -> None:
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self) -> None:
+        while not self._stop.wait(0.005):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self) -> "PeakThreads":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def scope_for(token: str) -> dict:
+    return {
+        "type": "http", "method": "GET", "path": "/total_resources", "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"cookie", f"auth_token={token}".encode())],
+        "server": ("bench", 80), "client": ("127.0.0.1", 0), "scheme": "http",
+    }
+
+
+def run_threaded(app: Flask, tokens: list[str], hold: float) -> tuple[list, int, int]:
+    latencies, errors, lock = [], [], threading.Lock()
+
+    def connection_thread(token: str, arrived: float) -> None:
+        time.sleep(hold)
+        status, _, _ = _run_wsgi(app.wsgi_app, wsgi_environ(scope_for(token), b""))
+        with lock:
+            # Non-200s are pool timeouts: more request threads than connections for DB_POOL_TIMEOUT
+            (latencies if status == 200 else errors).append(time.perf_counter() - arrived)
+
+    threads = []
+    with PeakThreads() as peak:
+        for token in tokens:
+            thread = threading.Thread(target=connection_thread, args=(token, time.perf_counter()))
+            try:
+                thread.start()
+            except RuntimeError:
+                errors.append(0.0)  # can't start new thread
+                continue
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+    return latencies, len(errors), peak.peak
+
+
+def run_async(app: AsgiApp, tokens: list[str], hold: float) -> tuple[list, int, int]:
+    latencies, errors = [], []
+
+    async def client(token: str) -> None:
+        arrived = time.perf_counter()
+        statuses = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+
+        # The server's event loop holds the connection until the request is in
+        await asyncio.sleep(hold)
+        await app(scope_for(token), receive, send)
+        (latencies if statuses == [200] else errors).append(time.perf_counter() - arrived)
+
+    async def all_clients() -> None:
+        await asyncio.gather(*(client(token) for token in tokens))
+
+    with PeakThreads() as peak:
+        asyncio.run(all_clients())
+    return latencies, len(errors), peak.peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="*", default=[100, 1000, 5000])
+    parser.add_argument("--hold", type=float, default=0.5, help="seconds each client takes to send its request")
+    parser.add_argument("--settlements", type=int, default=20_000)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "world.db")
+        sys.stdout = open(os.devnull, "w")
+        build_world(path, args.settlements, datetime.utcnow())
+        sys.stdout = sys.__stdout__
+
+        conn = open_db(path)
+        player_ids = [row[0] for row in conn.execute("SELECT id FROM players WHERE is_npc = 0")]
+        conn.close()
+
+        with patch.object(connection, "DB_PATH", Path(path)):
+            reader_pool = pool.ConnectionPool(
+                factory=lambda: connection.connect_db(check_same_thread=False, read_only=True)
+            )
+            app = Flask(__name__)
+            pool.init_app(app, pool.ConnectionPool(), reader_pool)
+            app.register_blueprint(resource_bp)
+            async_db = AsyncDatabase(reader_pool=reader_pool)
+            asgi_app = AsgiApp(app)
+
+            with patch("asgi.get_async_db", return_value=async_db):
+                for clients in args.clients:
+                    tokens = [create_token(player_ids[i % len(player_ids)], player_ids[i % len(player_ids)])
+                              for i in range(clients)]
+                    for mode, run, target in (("threaded wsgi", run_threaded, app), ("asgi", run_async, asgi_app)):
+                        start = time.perf_counter()
+                        latencies, failed, peak = run(target, tokens, args.hold)
+                        results.append((mode, clients, time.perf_counter() - start, len(latencies), failed,
+                                        percentile(latencies, 0.99), peak))
+            async_db.close()
+
+    print(f"{'mode':<14} {'clients':>7} {'wall s':>7} {'done':>6} {'failed':>6} {'p99 ms':>8} {'threads':>8}")
+    for mode, clients, wall, done, failed, p99, peak in results:
+        print(f"{mode:<14} {clients:>7} {wall:7.2f} {done:>6} {failed:>6} {p99 * 1000:8.0f} {peak:>8}")
+
+
+if __name__ == "__main__":
+    main()
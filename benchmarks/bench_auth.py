@@ -0,0 +1,59 @@
+"""
+Per-request overhead of require_auth with and without the verified-token cache.
+
+Calls a decorated no-op view inside a request context carrying the auth cookie, so the
+timing is the decorator alone: cookie read, token verification and the player_id claim.
+
+    python3 -m benchmarks.bench_auth --requests 50000 --tokens 1 100
+"""
+import argparse
+import time
+from unittest.mock import patch
+
+from flask import Flask
+from auth_decorator.auth_decorator import require_auth
+from auth_tokens import token_cache
+from auth_tokens.auth_tokens import create_token
+from auth_tokens.token_cache import VerifiedTokenCache
+
+
+@require_auth
+def view():
+    return "ok"
+
+
+def run(app: Flask, tokens: list[str], requests: int) -> float:
+    """Microseconds per decorated call, cycling through tokens."""
+    contexts = [app.test_request_context("/", headers={"Cookie": f"auth_token={token}"}) for token in tokens]
+    elapsed = 0.0
+    per_token = requests // len(tokens)
+    for context in contexts:
+        with context:
+            start = time.perf_counter()
+            for _ in range(per_token):
+                view()
+            elapsed += time.perf_counter() - start
+    return elapsed / (per_token * len(tokens)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--tokens", type=int, nargs="*", default=[1, 100])
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    results = []
+    for num_tokens in args.tokens:
+        tokens = [create_token(user_id, user_id) for user_id in range(1, num_tokens + 1)]
+        for name, size in (("no cache", 0), ("token cache", token_cache.AUTH_TOKEN_CACHE_SIZE)):
+            with patch.object(token_cache, "_token_cache", VerifiedTokenCache(size=size)):
+                results.append((name, num_tokens, run(app, tokens, args.requests)))
+
+    print(f"{'strategy':<12} {'tokens':>7} {'us/request':>11}")
+    for name, num_tokens, micros in results:
+        print(f"{name:<12} {num_tokens:>7} {micros:11.2f}")
+
+
+if __name__ == "__main__":
+    main()
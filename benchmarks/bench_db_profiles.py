@@ -0,0 +1,83 @@
+"""
+Tick and endpoint-query latency under each DB_TUNING_PROFILE.
+
+Builds one generated world, then for each profile opens a fresh connection with the
+profile applied and times a bulk tick plus per-player reads (settlements and army,
+the queries behind /settlements and /army).
+
+    python3 -m benchmarks.bench_db_profiles 100000 --reads 5000
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.bench_resource_tick import build_world, open_db
+from db.connection import TUNING_PROFILES, apply_tuning_profile
+from storage.sqlite_repository import SQLiteRepository
+from systems.resources.resource_tick import apply_bulk_resource_tick
+
+
+def time_profile(path: str, profile: str, now: datetime, reads: int) -> dict:
+    conn = open_db(path)
+    apply_tuning_profile(conn, profile)
+    cursor = conn.cursor()
+
+    start = time.perf_counter()
+    apply_bulk_resource_tick(cursor, now=now, where="p.is_npc = 0")
+    conn.commit()
+    tick = time.perf_counter() - start
+
+    player_ids = [row[0] for row in cursor.execute("SELECT id FROM players WHERE is_npc = 0")]
+    rng = random.Random(7)
+    repo = SQLiteRepository(cursor)
+    latencies = []
+    for _ in range(reads):
+        player_id = rng.choice(player_ids)
+        start = time.perf_counter()
+        repo.get_player_settlements(player_id)
+        repo.get_army_rows(player_id)
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+
+    latencies.sort()
+    return {
+        "tick": tick,
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sizes", nargs="*", type=int, default=[100_000])
+    parser.add_argument("--reads", type=int, default=5_000)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    sys.stdout = open(os.devnull, "w")  # silence init_db/seed_db output
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            now = datetime.utcnow()
+            path = os.path.join(tmp, f"profiles_{size}.db")
+            build_world(path, size, now)
+            for i, profile in enumerate(TUNING_PROFILES):
+                timings = time_profile(path, profile, now + timedelta(seconds=60 * (i + 1)), args.reads)
+                results.append((size, profile, timings))
+
+    sys.stdout = sys.__stdout__
+    print(f"{'settlements':>12} {'profile':>12} {'tick s':>8} {'read p50 ms':>12} {'read p99 ms':>12}")
+    for size, profile, timings in results:
+        print(f"{size:>12,} {profile:>12} {timings['tick']:8.3f} "
+              f"{timings['p50'] * 1000:12.3f} {timings['p99'] * 1000:12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+GET latency while a burst of logins hits the server.
+
+Serves /login and /total_resources from a threaded werkzeug server on a temporary
+database. One client polls /total_resources throughout; during the storm phase
+--logins clients post to /login as fast as they can. Runs once with password checks
+unbounded (every request thread hashes, the old behaviour) and once through the
+bounded PasswordHasher, and reports GET p50/p99 and the login outcomes.
+
+    python3 -m benchmarks.bench_login_storm --seconds 5 --logins 32
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from unittest.mock import patch
+
+from flask import Flask
+from werkzeug.serving import make_server
+
+from auth_tokens import passwords
+from auth_tokens.auth_tokens import create_token
+from auth_tokens.passwords import PasswordHasher
+from db import connection, pool
+from db.init_db import init_db
+from db.seed import seed_db
+from routes.login import login_bp
+from routes.resources import resource_bp
+
+USERS = 50
+
+
+def build_db() -> None:
+    conn = connection.connect_db()
+    init_db(conn)
+    seed_db(conn)
+    # Hashed once and shared, so setup does not take USERS hashes
+    password_hash = PasswordHasher(workers=1).hash("storm-password")
+    conn.executemany(
+        "INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)",
+        ((f"storm_{i}", f"storm_{i}@example.com", password_hash) for i in range(USERS))
+    )
+    conn.execute("""
+        INSERT INTO players (user_id, username, is_npc)
+        SELECT id, username, 0 FROM users WHERE username LIKE 'storm_%'
+    """)
+    conn.commit()
+    conn.close()
+
+
+def percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))] if values else 0.0
+
+
+def poll(url: str, cookie: str, stop: threading.Event, latencies: list) -> None:
+    request = urllib.request.Request(url, headers={"Cookie": f"auth_token={cookie}"})
+    while not stop.is_set():
+        started = time.perf_counter()
+        urllib.request.urlopen(request).read()
+        latencies.append(time.perf_counter() - started)
+
+
+def login_loop(url: str, worker: int, stop: threading.Event, outcomes: dict, lock: threading.Lock) -> None:
+    body = json.dumps({"email": f"storm_{worker % USERS}@example.com", "password": "storm-password"}).encode()
+    while not stop.is_set():
+        request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+        try:
+            status = urllib.request.urlopen(request).status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        with lock:
+            outcomes[status] = outcomes.get(status, 0) + 1
+
+
+def run_phase(base: str, cookie: str, seconds: float, logins: int) -> tuple[list, dict]:
+    stop = threading.Event()
+    latencies, outcomes, lock = [], {}, threading.Lock()
+    threads = [threading.Thread(target=poll, args=(f"{base}/total_resources", cookie, stop, latencies))]
+    threads += [
+        threading.Thread(target=login_loop, args=(f"{base}/login", worker, stop, outcomes, lock))
+        for worker in range(logins)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return latencies, outcomes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--logins", type=int, default=32)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            patch.object(connection, "DB_PATH", Path(os.path.join(tmp, "storm.db"))):
+        build_db()
+
+        app = Flask(__name__)
+        pool.init_app(app, pool.ConnectionPool(), pool.ConnectionPool(
+            factory=lambda: connection.connect_db(check_same_thread=False, read_only=True)
+        ))
+        app.register_blueprint(login_bp)
+        app.register_blueprint(resource_bp)
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_port}"
+        cookie = create_token(1, 1)
+
+        hashers = [
+            ("unbounded", PasswordHasher(workers=args.logins, queue_size=0)),
+            ("bounded", PasswordHasher()),
+        ]
+        for name, hasher in hashers:
+            with patch.object(passwords, "_hasher", hasher):
+                for phase, logins in (("idle", 0), ("storm", args.logins)):
+                    latencies, outcomes = run_phase(base, cookie, args.seconds, logins)
+                    results.append((name, phase, latencies, outcomes))
+            hasher.shutdown()
+        server.shutdown()
+
+    print(f"{'hashing':<10} {'phase':<6} {'GETs':>6} {'p50 ms':>8} {'p99 ms':>8}  logins")
+    for name, phase, latencies, outcomes in results:
+        print(f"{name:<10} {phase:<6} {len(latencies):>6} {percentile(latencies, 0.5) * 1000:8.1f} "
+              f"{percentile(latencies, 0.99) * 1000:8.1f}  {dict(sorted(outcomes.items()))}")
+
+
+if __name__ == "__main__":
+    main()
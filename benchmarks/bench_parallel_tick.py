@@ -0,0 +1,87 @@
+"""
+Single-thread vs process-pool resource tick throughput on a generated world.
+
+Runs the SQL bulk tick, the Python range tick in this process, and the range tick
+on pools of each requested size, each against a fresh copy of the same world.
+
+    python3 -m benchmarks.bench_parallel_tick --settlements 500000 --workers 2 4 8
+"""
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.bench_resource_tick import build_world, open_db
+from systems.resources.resource_tick import apply_bulk_resource_tick
+from systems.resources.parallel_tick import parallel_resource_tick, create_tick_executor
+
+
+def time_parallel(path: str, now: datetime, workers: int, chunk_size: int) -> float:
+    conn = open_db(path)
+    executor = create_tick_executor(workers) if workers else None
+    try:
+        if executor:
+            # Warm the pool so process start-up is not counted
+            list(executor.map(abs, range(workers)))
+        start = time.perf_counter()
+        parallel_resource_tick(conn, path, executor, chunk_size=chunk_size, now=now, where="p.is_npc = 0")
+        return time.perf_counter() - start
+    finally:
+        if executor:
+            executor.shutdown()
+        conn.close()
+
+
+def time_bulk(path: str, now: datetime) -> float:
+    conn = open_db(path)
+    start = time.perf_counter()
+    apply_bulk_resource_tick(conn.cursor(), now=now, where="p.is_npc = 0")
+    conn.commit()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--settlements", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, nargs="*", default=[2, 4])
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        world = os.path.join(tmp, "world.db")
+        now = datetime.utcnow()
+        sys.stdout = open(os.devnull, "w")
+        build_world(world, args.settlements, now)
+        sys.stdout = sys.__stdout__
+        tick_time = now + timedelta(seconds=60)
+
+        def fresh_copy(name: str) -> str:
+            path = os.path.join(tmp, f"{name}.db")
+            shutil.copy(world, path)
+            return path
+
+        results.append(("bulk SQL, 1 thread", time_bulk(fresh_copy("bulk"), tick_time)))
+        results.append(("python ranges, 1 process", time_parallel(fresh_copy("inline"), tick_time, 0, args.chunk_size)))
+        for workers in args.workers:
+            results.append((
+                f"python ranges, {workers} processes",
+                time_parallel(fresh_copy(f"pool_{workers}"), tick_time, workers, args.chunk_size)
+            ))
+
+    print(f"{args.settlements:,} settlements, chunk size {args.chunk_size}")
+    print(f"{'mode':<30} {'seconds':>9} {'settlements/s':>15}")
+    for mode, seconds in results:
+        print(f"{mode:<30} {seconds:9.3f} {args.settlements / seconds:15,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Game-system throughput on the in-memory and SQLite repositories.
+
+Runs the same world through both GameRepository backends: a background tick over every
+settlement, a research unlock per player and an army summary per player. The SQLite
+backend works on a WAL database file, committing once per phase.
+
+    python3 -m benchmarks.bench_repositories 1000 10000
+"""
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from db.init_db import init_db
+from db.seed import seed_db
+from storage.memory_repository import InMemoryRepository
+from storage.sqlite_repository import SQLiteRepository
+from systems.army.army import get_player_army
+from systems.research.research_nodes import unlock_research
+
+SETTLEMENTS_PER_PLAYER = 4
+UNIT_TYPES = ("archer", "cavalry", "infantry")
+
+
+def open_db(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL;")
+    conn.execute("PRAGMA synchronous = NORMAL;")
+    return conn
+
+
+def build_world(repo, num_players: int, now: datetime) -> list[int]:
+    """num_players level 2 players with SETTLEMENTS_PER_PLAYER settlements and an army each."""
+    rng = random.Random(42)
+    player_ids = []
+    for i in range(num_players):
+        player_id = repo.add_player(f"bench_{i}", level=2)
+        for j in range(SETTLEMENTS_PER_PLAYER):
+            settlement_id = repo.add_settlement(
+                player_id, f"bench settlement {i}-{j}",
+                food=rng.uniform(0, 5000), wood=rng.uniform(500, 5000),
+                stone=rng.uniform(0, 5000), silver=rng.uniform(500, 2500),
+                last_resource_tick=(now - timedelta(seconds=rng.randint(0, 120))).isoformat()
+            )
+            repo.set_garrison(settlement_id, "infantry", rng.randint(0, 5))
+        for unit_type in UNIT_TYPES:
+            repo.set_player_units(player_id, unit_type, rng.randint(20, 100))
+        player_ids.append(player_id)
+    return player_ids
+
+
+def run_phases(repo, player_ids: list[int], node_id: int, now: datetime, commit) -> dict:
+    """Seconds taken by each phase."""
+    timings = {}
+
+    start = time.perf_counter()
+    repo.tick_settlements(now)
+    commit()
+    timings["tick"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for player_id in player_ids:
+        unlock_research(repo, player_id, node_id, now=now)
+    commit()
+    timings["unlock"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for player_id in player_ids:
+        get_player_army(repo, player_id)
+    timings["army"] = time.perf_counter() - start
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("players", nargs="*", type=int, default=[1_000, 10_000])
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    sys.stdout = open(os.devnull, "w")  # silence init_db/seed_db output
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_players in args.players:
+            now = datetime.utcnow()
+            conn = open_db(os.path.join(tmp, f"repo_{num_players}.db"))
+            init_db(conn)
+            seed_db(conn)
+            node_id = conn.execute("SELECT id FROM research_nodes WHERE name = 'Improved Farming'").fetchone()[0]
+
+            memory = InMemoryRepository.from_sqlite(conn)
+            player_ids = build_world(memory, num_players, now)
+            memory_timings = run_phases(memory, player_ids, node_id, now + timedelta(seconds=60), lambda: None)
+
+            sqlite_repo = SQLiteRepository(conn.cursor())
+            player_ids = build_world(sqlite_repo, num_players, now)
+            conn.commit()
+            sqlite_timings = run_phases(sqlite_repo, player_ids, node_id, now + timedelta(seconds=60), conn.commit)
+            conn.close()
+
+            results.append((num_players, memory_timings, sqlite_timings))
+
+    sys.stdout = sys.__stdout__
+    print(f"{'players':>10} {'phase':>8} {'memory s':>10} {'sqlite s':>10} {'speedup':>8}")
+    for num_players, memory_timings, sqlite_timings in results:
+        for phase in ("tick", "unlock", "army"):
+            memory_s, sqlite_s = memory_timings[phase], sqlite_timings[phase]
+            print(f"{num_players:>10,} {phase:>8} {memory_s:10.3f} {sqlite_s:10.3f} {sqlite_s / memory_s:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Requests per second for the /total_resources handler by connection strategy.
+
+Runs the handler's lookups (resource totals, experience; player_id comes from the token) with a
+connection opened per helper (the old behaviour), one connection per request, and
+one pooled connection per request.
+
+    python3 -m benchmarks.bench_request_connections --requests 5000 --threads 1 4
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+from benchmarks.bench_resource_tick import build_world, open_db
+from db import connection
+from db.pool import ConnectionPool
+from systems.resources.resources import get_player_total_resources
+from systems.experience.experience import get_player_experience
+
+
+def handle(player_id: int, conn=None) -> None:
+    get_player_total_resources(player_id, conn)
+    get_player_experience(player_id, conn)
+
+
+def per_helper(player_id: int, pool: ConnectionPool) -> None:
+    handle(player_id)
+
+
+def per_request(player_id: int, pool: ConnectionPool) -> None:
+    conn = connection.connect_db()
+    try:
+        handle(player_id, conn)
+    finally:
+        conn.close()
+
+
+def pooled(player_id: int, pool: ConnectionPool) -> None:
+    with pool.connection() as conn:
+        handle(player_id, conn)
+
+
+def run(strategy, requests: int, threads: int, users: int) -> float:
+    pool = ConnectionPool(size=threads)
+    per_thread = requests // threads
+
+    def worker(offset: int) -> None:
+        for i in range(per_thread):
+            strategy(1 + (offset + i) % users, pool)
+
+    workers = [threading.Thread(target=worker, args=(t * per_thread,)) for t in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    pool.close()
+    return per_thread * threads / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--threads", type=int, nargs="*", default=[1, 4])
+    parser.add_argument("--settlements", type=int, default=40_000)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    strategies = [("connection per helper", per_helper), ("connection per request", per_request),
+                  ("pooled connection", pooled)]
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "world.db")
+        sys.stdout = open(os.devnull, "w")
+        build_world(path, args.settlements, datetime.utcnow())
+        sys.stdout = sys.__stdout__
+
+        conn = open_db(path)
+        conn.execute("UPDATE players SET user_id = id WHERE is_npc = 0")
+        conn.commit()
+        users = conn.execute("SELECT MAX(id) FROM players").fetchone()[0]
+        conn.close()
+
+        with patch.object(connection, "DB_PATH", Path(path)):
+            for threads in args.threads:
+                for name, strategy in strategies:
+                    results.append((name, threads, run(strategy, args.requests, threads, users)))
+
+    print(f"{'strategy':<24} {'threads':>7} {'requests/s':>12}")
+    for name, threads, rate in results:
+        print(f"{name:<24} {threads:>7} {rate:12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
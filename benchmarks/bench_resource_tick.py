@@ -0,0 +1,131 @@
+"""
+Resource tick throughput on a generated world.
+
+Compares the per-settlement apply_resource_tick loop with apply_bulk_resource_tick.
+The legacy loop is only run up to --legacy-limit settlements since it is O(n) round trips.
+
+    python3 -m benchmarks.bench_resource_tick 10000 100000 1000000
+"""
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from db.init_db import init_db
+from db.seed import seed_db
+from systems.resources.resource_tick import apply_resource_tick, apply_bulk_resource_tick
+
+SETTLEMENTS_PER_PLAYER = 4
+
+
+def open_db(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL;")
+    conn.execute("PRAGMA synchronous = NORMAL;")
+    return conn
+
+
+def build_world(path: str, num_settlements: int, now: datetime) -> None:
+    """Create a database with num_settlements player settlements, last ticked 0-120s ago."""
+    conn = open_db(path)
+    init_db(conn)
+    seed_db(conn)
+
+    rng = random.Random(42)
+    num_players = max(1, num_settlements // SETTLEMENTS_PER_PLAYER)
+
+    conn.executemany(
+        "INSERT INTO players (username, is_npc) VALUES (?, 0)",
+        ((f"bench_{i}",) for i in range(num_players))
+    )
+    first_player_id = conn.execute("SELECT MIN(id) FROM players WHERE is_npc = 0").fetchone()[0]
+
+    conn.executemany("""
+        INSERT INTO settlements
+        (player_id, name, x, y, settlement_type_id, food, wood, stone, silver, last_resource_tick)
+        VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?, ?)
+    """, (
+        (
+            first_player_id + i % num_players,
+            f"bench settlement {i}",
+            rng.randint(0, 1000), rng.randint(0, 1000),
+            rng.uniform(0, 10000), rng.uniform(0, 10000), rng.uniform(0, 10000), rng.uniform(0, 5000),
+            (now - timedelta(seconds=rng.randint(0, 120))).isoformat()
+        )
+        for i in range(num_settlements)
+    ))
+    conn.commit()
+    conn.close()
+
+
+def time_legacy(path: str, now: datetime) -> float:
+    conn = open_db(path)
+    cursor = conn.cursor()
+    start = time.perf_counter()
+    with patch("systems.resources.resource_tick.datetime") as mock_datetime, \
+            patch("builtins.print"):
+        mock_datetime.utcnow.return_value = now
+        mock_datetime.fromisoformat = datetime.fromisoformat
+        ids = [row[0] for row in cursor.execute(
+            "SELECT s.id FROM settlements s JOIN players p ON s.player_id = p.id WHERE p.is_npc = 0"
+        ).fetchall()]
+        for settlement_id in ids:
+            apply_resource_tick(settlement_id, cursor)
+    conn.commit()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+def time_bulk(path: str, now: datetime) -> float:
+    conn = open_db(path)
+    start = time.perf_counter()
+    apply_bulk_resource_tick(conn.cursor(), now=now, where="p.is_npc = 0")
+    conn.commit()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sizes", nargs="*", type=int, default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--legacy-limit", type=int, default=10_000)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    sys.stdout = open(os.devnull, "w")  # silence init_db/seed_db output
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            now = datetime.utcnow()
+            bulk_path = os.path.join(tmp, f"bulk_{size}.db")
+            build_world(bulk_path, size, now)
+            bulk = time_bulk(bulk_path, now + timedelta(seconds=60))
+
+            legacy = None
+            if size <= args.legacy_limit:
+                legacy_path = os.path.join(tmp, f"legacy_{size}.db")
+                build_world(legacy_path, size, now)
+                legacy = time_legacy(legacy_path, now + timedelta(seconds=60))
+
+            results.append((size, legacy, bulk))
+
+    sys.stdout = sys.__stdout__
+    print(f"{'settlements':>12} {'legacy s':>10} {'legacy/s':>12} {'bulk s':>10} {'bulk/s':>12} {'ticks/s':>8}")
+    for size, legacy, bulk in results:
+        legacy_s = f"{legacy:10.3f}" if legacy is not None else f"{'-':>10}"
+        legacy_rate = f"{size / legacy:12,.0f}" if legacy is not None else f"{'-':>12}"
+        print(f"{size:>12,} {legacy_s} {legacy_rate} {bulk:10.3f} {size / bulk:12,.0f} {1 / bulk:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
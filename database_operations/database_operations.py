@@ -1,4 +1,5 @@
 from db.connection import connect_db
+from db.static_data import get_static_data
 
 def get_all_players() -> list[dict]:
     """
@@ -23,10 +24,12 @@ def get_all_players() -> list[dict]:
 
     return result
 
-def resolve_npc_ids() -> list[dict]:
+def resolve_npc_ids(conn=None) -> list[dict]:
     """Get all player_id where user_id is null (NPC settlements)"""
 
-    conn = connect_db()
+    owns_conn = conn is None
+    if owns_conn:
+        conn = connect_db()
     cursor = conn.cursor()
 
     cursor.execute("""
@@ -35,31 +38,16 @@ def resolve_npc_ids() -> list[dict]:
     """)
 
     npc_id = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    if owns_conn:
+        conn.close()
 
     return npc_id
 
-def resolve_settlement_type_ids() -> dict:
-    """Get mapping of settlement type names to their IDs."""
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT id, name FROM settlement_types")
-    settlement_types = {row["name"]: row["id"] for row in cursor.fetchall()}
-
-    conn.close()
-
-    return settlement_types
-
-
-def resolve_settlement_type_names() -> dict:
-    """Get mapping of settlement type IDs to their names."""
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT id, name FROM settlement_types")
-    settlement_types = {row["id"]: row["name"] for row in cursor.fetchall()}
+def resolve_settlement_type_ids(conn=None) -> dict:
+    """Get mapping of settlement type names to their IDs, from the static data cache."""
+    return dict(get_static_data(conn).settlement_type_ids)
 
-    conn.close()
 
-    return settlement_types
\ No newline at end of file
+def resolve_settlement_type_names(conn=None) -> dict:
+    """Get mapping of settlement type IDs to their names, from the static data cache."""
+    return {type_id: settlement_type.name for type_id, settlement_type in get_static_data(conn).settlement_types.items()}
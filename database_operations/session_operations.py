@@ -0,0 +1,94 @@
+import hashlib
+import os
+import secrets
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from db.connection import connect_db
+
+load_dotenv()
+
+# A session stays valid this long after its last refresh (sliding expiry)
+SESSION_DAYS = int(os.getenv("SESSION_DAYS", "7"))
+
+def _refresh_hash(refresh_token: str) -> str:
+    # Refresh tokens are 256 random bits, so a plain digest is enough; no slow hash needed
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+def create_session(cursor, user_id: int, player_id: int | None, now: datetime | None = None) -> dict:
+    """
+    Unit of work starting a session for a user who just proved their password (see db.writer.execute_write).
+
+    Also drops the user's expired and revoked sessions.
+
+    Returns:
+        dict: session_id and the new refresh_token; only its digest is stored.
+    """
+    now = now or datetime.utcnow()
+    cursor.execute("""
+        DELETE FROM sessions
+        WHERE user_id = ? AND (expires_at <= ? OR revoked_at IS NOT NULL)
+    """, (user_id, now))
+
+    refresh_token = secrets.token_urlsafe(32)
+    cursor.execute("""
+        INSERT INTO sessions (user_id, player_id, refresh_hash, created_at, last_used_at, expires_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (user_id, player_id, _refresh_hash(refresh_token), now, now, now + timedelta(days=SESSION_DAYS)))
+    return {"session_id": cursor.lastrowid, "refresh_token": refresh_token}
+
+def refresh_session(cursor, refresh_token: str, now: datetime | None = None) -> dict | None:
+    """
+    Unit of work exchanging a refresh token for a new one and extending its session.
+
+    The presented token is rotated out, so each refresh token works once.
+
+    Returns:
+        dict | None: session_id, user_id, player_id and the new refresh_token, or None
+        if the token is unknown, already used, revoked or expired.
+    """
+    now = now or datetime.utcnow()
+    new_token = secrets.token_urlsafe(32)
+    cursor.execute("""
+        UPDATE sessions
+        SET refresh_hash = ?, last_used_at = ?, expires_at = ?
+        WHERE refresh_hash = ? AND revoked_at IS NULL AND expires_at > ?
+        RETURNING id, user_id, player_id
+    """, (_refresh_hash(new_token), now, now + timedelta(days=SESSION_DAYS), _refresh_hash(refresh_token), now))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return {"session_id": row[0], "user_id": row[1], "player_id": row[2], "refresh_token": new_token}
+
+def revoke_session(cursor, refresh_token: str, now: datetime | None = None) -> None:
+    """Unit of work ending the session of a refresh token (logout)."""
+    cursor.execute("""
+        UPDATE sessions SET revoked_at = ?
+        WHERE refresh_hash = ? AND revoked_at IS NULL
+    """, (now or datetime.utcnow(), _refresh_hash(refresh_token)))
+
+def revoke_session_id(cursor, session_id: int, now: datetime | None = None) -> None:
+    """Unit of work ending a session by id, i.e. an access token's sid claim (logout)."""
+    cursor.execute("""
+        UPDATE sessions SET revoked_at = ?
+        WHERE id = ? AND revoked_at IS NULL
+    """, (now or datetime.utcnow(), session_id))
+
+def is_session_active(session_id: int, conn=None, now: datetime | None = None) -> bool:
+    """
+    Whether a session exists, is not revoked and has not expired.
+
+    Revoked sessions are deleted at the user's next login, so a missing row counts as ended.
+    Uses the given connection if provided (left open), otherwise opens and closes its own.
+    """
+    owns_conn = conn is None
+    if owns_conn:
+        conn = connect_db()
+    try:
+        row = conn.execute("""
+            SELECT 1 FROM sessions
+            WHERE id = ? AND revoked_at IS NULL AND expires_at > ?
+        """, (session_id, now or datetime.utcnow())).fetchone()
+        return row is not None
+    finally:
+        if owns_conn:
+            conn.close()
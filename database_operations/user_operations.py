@@ -1,29 +1,56 @@
-from werkzeug.security import check_password_hash
+import os
+import threading
+from collections import OrderedDict
+from auth_tokens.passwords import check_password
+from dotenv import load_dotenv
 from db.connection import connect_db
 
+load_dotenv()
+
+# Users whose player_id is kept for tokens issued before it was a claim
+PLAYER_ID_CACHE_SIZE = int(os.getenv("PLAYER_ID_CACHE_SIZE", "10000"))
+
 def authenticate_user(email: str, password: str) -> dict | None:
-    """Authenticate user and return user data if valid"""
+    """Authenticate user and return user data if valid
+
+    Raises:
+        PasswordHasherBusy: If the password pool's queue is full or the check times out.
+    """
     conn = connect_db()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT id, username, email, password_hash FROM users WHERE email = ?", (email,))
-    user = cursor.fetchone()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT u.id, u.username, u.email, u.password_hash, p.id AS player_id
+            FROM users u
+            LEFT JOIN players p ON p.user_id = u.id
+            WHERE u.email = ?
+        """, (email,))
+        user = cursor.fetchone()
+    finally:
+        # Closed before the hash check, which can wait in the password pool's queue
+        conn.close()
     
     if not user:
         return None
     
-    if not check_password_hash(user['password_hash'], password):
+    if not check_password(user['password_hash'], password):
         return None
     
     return {
         "id": user['id'],
         "username": user['username'],
-        "email": user['email']
+        "email": user['email'],
+        "player_id": user['player_id']
     }
 
-def get_player_id_for_user(user_id: int) -> int | None:
-    """Get the player_id from the players table for a given user_id"""
-    conn = connect_db()
+def get_player_id_for_user(user_id: int, conn=None) -> int | None:
+    """Get the player_id from the players table for a given user_id
+
+    Uses the given connection if provided (left open), otherwise opens and closes its own.
+    """
+    owns_conn = conn is None
+    if owns_conn:
+        conn = connect_db()
     cursor = conn.cursor()
     
     try:
@@ -42,4 +69,49 @@ def get_player_id_for_user(user_id: int) -> int | None:
         
     finally:
         cursor.close()
-        conn.close()
\ No newline at end of file
+        if owns_conn:
+            conn.close()
+
+_player_id_cache = OrderedDict()
+_player_id_cache_lock = threading.Lock()
+
+def get_cached_player_id_for_user(user_id: int, conn=None) -> int | None:
+    """
+    get_player_id_for_user through a bounded LRU cache.
+
+    A user's player never changes once created, so entries need no expiry. Misses are
+    not cached, so a player created after the first lookup is still found.
+    """
+    with _player_id_cache_lock:
+        player_id = _player_id_cache.get(user_id)
+        if player_id is not None:
+            _player_id_cache.move_to_end(user_id)
+            return player_id
+
+    player_id = get_player_id_for_user(user_id, conn)
+    if player_id is not None:
+        with _player_id_cache_lock:
+            _player_id_cache[user_id] = player_id
+            if len(_player_id_cache) > PLAYER_ID_CACHE_SIZE:
+                _player_id_cache.popitem(last=False)
+    return player_id
+
+def clear_player_id_cache() -> None:
+    with _player_id_cache_lock:
+        _player_id_cache.clear()
+
+def mark_user_logged_in(cursor, user_id: int) -> None:
+    """Unit of work recording a login (see db.writer.execute_write)"""
+    cursor.execute("""
+        UPDATE users 
+        SET is_active = 1, last_login = CURRENT_TIMESTAMP 
+        WHERE id = ?
+    """, (user_id,))
+
+def mark_user_logged_out(cursor, user_id: int) -> None:
+    """Unit of work recording a logout (see db.writer.execute_write)"""
+    cursor.execute("""
+        UPDATE users
+        SET is_active = 0
+        WHERE id = ?
+    """, (user_id,))
@@ -0,0 +1,72 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from dotenv import load_dotenv
+from db.pool import ConnectionPool, get_pool, get_reader_pool
+from db.writer import WriterStoppedError, execute_write, get_writer
+from metrics.registry import get_registry
+
+load_dotenv()
+
+# Threads running SQLite calls for coroutines; bounds concurrent queries, not connected clients
+DB_ASYNC_WORKERS = int(os.getenv("DB_ASYNC_WORKERS", os.getenv("DB_READER_POOL_SIZE", "16")))
+
+_metrics = get_registry()
+ASYNC_CALLS = _metrics.counter("db_async_calls_total", "Database calls made by coroutines", ("kind",))
+
+class AsyncDatabase:
+    """
+    Lets coroutines use the synchronous data layer without blocking the event loop.
+
+    run() executes a function taking conn= (every read helper in systems/* does) on a
+    bounded thread pool with a connection borrowed from the reader or writer pool.
+    write() hands a unit of work to the writer thread and awaits its future directly,
+    so a coroutine waiting on a commit holds no thread at all.
+    """
+
+    def __init__(self, workers: int = DB_ASYNC_WORKERS, reader_pool: ConnectionPool | None = None,
+                 pool: ConnectionPool | None = None) -> None:
+        self.workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="async-db")
+        self._reader_pool = reader_pool
+        self._pool = pool
+
+    def _call(self, fn, args: tuple, kwargs: dict, read_only: bool):
+        pool = (self._reader_pool or get_reader_pool()) if read_only else (self._pool or get_pool())
+        with pool.connection() as conn:
+            return fn(*args, conn=conn, **kwargs)
+
+    async def run(self, fn, *args, read_only: bool = True, **kwargs):
+        """Await fn(*args, conn=<pooled connection>, **kwargs) run on the executor."""
+        ASYNC_CALLS.inc(kind="read" if read_only else "read_write")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call, fn, args, kwargs, read_only)
+
+    async def write(self, fn, *args, **kwargs):
+        """Await execute_write(fn, *args, **kwargs) without holding a thread while it is queued."""
+        ASYNC_CALLS.inc(kind="write")
+        writer = get_writer()
+        if writer.running:
+            try:
+                return await asyncio.wrap_future(writer.submit(fn, *args, **kwargs))
+            except WriterStoppedError:
+                pass  # the thread stopped before the unit ran; execute_write runs it inline
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(execute_write, fn, *args, **kwargs))
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+_async_db = None
+_async_db_lock = threading.Lock()
+
+def get_async_db() -> AsyncDatabase:
+    """Single accessor for AsyncDatabase"""
+    global _async_db
+    if _async_db is None:
+        with _async_db_lock:
+            if _async_db is None:
+                _async_db = AsyncDatabase()
+    return _async_db
@@ -9,15 +9,57 @@ load_dotenv()
 DB_PATH = os.getenv("DATABASE_PATH", "database/riseandfall.db")
 DB_PATH = Path(DB_PATH)
 
+# How long a connection waits for another writer's lock before failing with "database is locked"
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+
+# Named per-connection PRAGMA sets, selected with DB_TUNING_PROFILE.
+# cache_size is negative for KiB; mmap_size is bytes of the file mapped into memory.
+TUNING_PROFILES = {
+    "default": {},
+    "low_memory": {"mmap_size": 0, "cache_size": -2000, "temp_store": "FILE"},
+    "balanced": {"mmap_size": 256 * 1024 * 1024, "cache_size": -64 * 1024, "temp_store": "MEMORY"},
+    "throughput": {"mmap_size": 1024 * 1024 * 1024, "cache_size": -256 * 1024, "temp_store": "MEMORY"},
+}
+DB_TUNING_PROFILE = os.getenv("DB_TUNING_PROFILE", "default")
+
 # Ensure the directory exists
 DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
 
-def connect_db():
-    """Establish a connection to the SQLite database with appropriate settings."""
+def apply_tuning_profile(conn, profile: str | None = None) -> None:
+    """Apply a TUNING_PROFILES entry (DB_TUNING_PROFILE by default) to a connection."""
+    name = profile or DB_TUNING_PROFILE
+    if name not in TUNING_PROFILES:
+        raise ValueError(f"Unknown DB_TUNING_PROFILE {name!r}, expected one of {sorted(TUNING_PROFILES)}")
+    for pragma, value in TUNING_PROFILES[name].items():
+        conn.execute(f"PRAGMA {pragma} = {value};")
+
+def connect_db(check_same_thread: bool = True, read_only: bool = False):
+    """Establish a connection to the SQLite database with appropriate settings.
+
+    Pass check_same_thread=False for connections handed between threads, e.g. by the pool.
+    read_only opens the file in mode=ro with query_only set; such connections never take
+    the write lock, so with WAL they read the last committed snapshot while a tick commits.
+    """
+    if read_only:
+        conn = sqlite3.connect(
+            f"{DB_PATH.resolve().as_uri()}?mode=ro",
+            uri=True,
+            detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+            check_same_thread=check_same_thread,
+            timeout=DB_BUSY_TIMEOUT_MS / 1000
+        )
+        conn.row_factory = sqlite3.Row
+        # journal_mode is persistent in the file, so readers skip the WAL and synchronous pragmas
+        conn.execute("PRAGMA query_only = ON;")
+        apply_tuning_profile(conn)
+        return conn
+
     conn = sqlite3.connect(
         str(DB_PATH),
-        detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
+        detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+        check_same_thread=check_same_thread,
+        timeout=DB_BUSY_TIMEOUT_MS / 1000
     )
 
     # rows as dict-like objects
@@ -28,5 +70,6 @@ def connect_db():
     
     conn.execute("PRAGMA journal_mode = WAL;")
     conn.execute("PRAGMA synchronous = NORMAL;")
+    apply_tuning_profile(conn)
 
-    return conn
\ No newline at end of file
+    return conn
@@ -1,13 +1,31 @@
 from db.connection import connect_db
 
-def init_db():
-    """Initialize the game database with required tables."""
-    conn = connect_db()
+def _ensure_column(cursor, table: str, column: str, definition: str) -> None:
+    """Add a column to a table created before the column existed."""
+    cursor.execute(f"PRAGMA table_info({table})")
+    if column not in {row[1] for row in cursor.fetchall()}:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+def init_db(conn=None):
+    """Initialize the game database with required tables.
+
+    Uses the given connection if provided (left open), otherwise opens and closes its own.
+    """
+    owns_conn = conn is None
+    if owns_conn:
+        conn = connect_db()
     cursor = conn.cursor()
 
     # Enable foreign keys
     cursor.execute("PRAGMA foreign_keys = ON;")
 
+    # New databases use incremental auto-vacuum so db.maintenance can hand free pages back.
+    # The mode can only change through a VACUUM, which is free while the file is empty.
+    cursor.execute("SELECT COUNT(*) FROM sqlite_master")
+    if cursor.fetchone()[0] == 0:
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+        cursor.execute("VACUUM;")
+
      
     # --------------------
     # USERS (Authentication)
@@ -52,7 +70,49 @@ def init_db():
     cursor.execute("""
         CREATE INDEX IF NOT EXISTS idx_players_user_id ON players(user_id);
     """)
-    
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_players_is_npc ON players(is_npc);
+    """)
+
+    # --------------------
+    # SESSIONS (Refresh tokens, stored as SHA-256 digests)
+    # --------------------
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            player_id INTEGER,
+            refresh_hash TEXT NOT NULL UNIQUE,
+            created_at DATETIME NOT NULL,
+            last_used_at DATETIME NOT NULL,
+            expires_at DATETIME NOT NULL,
+            revoked_at DATETIME,
+
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        );
+    """)
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions(user_id);
+    """)
+
+    # --------------------
+    # STATIC DATA VERSION
+    # --------------------
+    # Bumped by seed_db whenever the static tables (settlement types, unit types, research)
+    # change, so processes caching them (db.static_data) know to reload.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS static_data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL DEFAULT 0
+        );
+    """)
+
+    cursor.execute("""
+        INSERT OR IGNORE INTO static_data_version (id, version) VALUES (1, 0);
+    """)
+
     # ----------------
     # SETTLEMENT TYPES
     # --------------------
@@ -108,6 +168,10 @@ def init_db():
             silver_capacity INTEGER DEFAULT 5000,
             gold_capacity INTEGER DEFAULT 1000,
 
+            -- when every producing resource reaches capacity at the current rates,
+            -- written by the resource tick; NULL until the next tick after a spend or rate change
+            storage_full_at DATETIME,
+
             created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
 
             FOREIGN KEY (player_id) REFERENCES players(id) ON DELETE CASCADE,
@@ -115,6 +179,109 @@ def init_db():
         );
     """)
 
+    _ensure_column(cursor, "settlements", "storage_full_at", "DATETIME")
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_settlements_player ON settlements(player_id);
+    """)
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_settlements_storage_full_at
+            ON settlements(storage_full_at) WHERE storage_full_at IS NOT NULL;
+    """)
+
+    # storage_full_at is compared as text in one fixed format (resource_tick.storage_full_timestamp);
+    # convert rows written in any other format
+    cursor.execute("""
+        UPDATE settlements
+        SET storage_full_at = strftime('%Y-%m-%dT%H:%M:%f', storage_full_at)
+        WHERE storage_full_at IS NOT NULL
+          AND strftime('%Y-%m-%dT%H:%M:%f', storage_full_at) IS NOT NULL
+          AND storage_full_at != strftime('%Y-%m-%dT%H:%M:%f', storage_full_at)
+    """)
+
+    # --------------------
+    # PLAYER RESOURCE TOTALS
+    # --------------------
+    # Per-player SUM of settlement resources, kept in step by the tick and spend code paths.
+    # Settlement inserts, deletes and ownership changes happen in many places (signup, seed,
+    # scripts), so those are covered by triggers instead.
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'player_resource_totals'")
+    totals_existed = cursor.fetchone() is not None
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS player_resource_totals (
+            player_id INTEGER PRIMARY KEY,
+            food REAL NOT NULL DEFAULT 0,
+            wood REAL NOT NULL DEFAULT 0,
+            stone REAL NOT NULL DEFAULT 0,
+            silver REAL NOT NULL DEFAULT 0,
+            gold REAL NOT NULL DEFAULT 0,
+            settlement_count INTEGER NOT NULL DEFAULT 0,
+
+            FOREIGN KEY (player_id) REFERENCES players(id) ON DELETE CASCADE
+        );
+    """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_settlements_totals_insert
+        AFTER INSERT ON settlements
+        BEGIN
+            INSERT INTO player_resource_totals (player_id, food, wood, stone, silver, gold, settlement_count)
+            VALUES (NEW.player_id, COALESCE(NEW.food, 0), COALESCE(NEW.wood, 0), COALESCE(NEW.stone, 0),
+                    COALESCE(NEW.silver, 0), COALESCE(NEW.gold, 0), 1)
+            ON CONFLICT (player_id) DO UPDATE SET
+                food = food + excluded.food, wood = wood + excluded.wood, stone = stone + excluded.stone,
+                silver = silver + excluded.silver, gold = gold + excluded.gold,
+                settlement_count = settlement_count + 1;
+        END;
+    """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_settlements_totals_delete
+        AFTER DELETE ON settlements
+        BEGIN
+            UPDATE player_resource_totals
+            SET food = food - COALESCE(OLD.food, 0), wood = wood - COALESCE(OLD.wood, 0),
+                stone = stone - COALESCE(OLD.stone, 0), silver = silver - COALESCE(OLD.silver, 0),
+                gold = gold - COALESCE(OLD.gold, 0), settlement_count = settlement_count - 1
+            WHERE player_id = OLD.player_id;
+        END;
+    """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_settlements_totals_owner
+        AFTER UPDATE OF player_id ON settlements
+        WHEN OLD.player_id IS NOT NEW.player_id
+        BEGIN
+            UPDATE player_resource_totals
+            SET food = food - COALESCE(OLD.food, 0), wood = wood - COALESCE(OLD.wood, 0),
+                stone = stone - COALESCE(OLD.stone, 0), silver = silver - COALESCE(OLD.silver, 0),
+                gold = gold - COALESCE(OLD.gold, 0), settlement_count = settlement_count - 1
+            WHERE player_id = OLD.player_id;
+
+            INSERT INTO player_resource_totals (player_id, food, wood, stone, silver, gold, settlement_count)
+            VALUES (NEW.player_id, COALESCE(NEW.food, 0), COALESCE(NEW.wood, 0), COALESCE(NEW.stone, 0),
+                    COALESCE(NEW.silver, 0), COALESCE(NEW.gold, 0), 1)
+            ON CONFLICT (player_id) DO UPDATE SET
+                food = food + excluded.food, wood = wood + excluded.wood, stone = stone + excluded.stone,
+                silver = silver + excluded.silver, gold = gold + excluded.gold,
+                settlement_count = settlement_count + 1;
+        END;
+    """)
+
+    # Backfill databases created before the table existed
+    if not totals_existed:
+        cursor.execute("""
+            INSERT INTO player_resource_totals (player_id, food, wood, stone, silver, gold, settlement_count)
+            SELECT
+                player_id,
+                SUM(COALESCE(food, 0)), SUM(COALESCE(wood, 0)), SUM(COALESCE(stone, 0)),
+                SUM(COALESCE(silver, 0)), SUM(COALESCE(gold, 0)), COUNT(*)
+            FROM settlements
+            GROUP BY player_id
+        """)
+
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS settlement_modifiers (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -142,6 +309,21 @@ def init_db():
             ON settlement_modifiers(modifier_type);
     """)
 
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_settlement_modifiers_expires_at
+            ON settlement_modifiers(expires_at) WHERE expires_at IS NOT NULL;
+    """)
+
+    # expires_at is compared as text in one fixed format (production_rates.expiry_timestamp);
+    # convert rows written in any other format
+    cursor.execute("""
+        UPDATE settlement_modifiers
+        SET expires_at = strftime('%Y-%m-%dT%H:%M:%f', expires_at)
+        WHERE expires_at IS NOT NULL
+          AND strftime('%Y-%m-%dT%H:%M:%f', expires_at) IS NOT NULL
+          AND expires_at != strftime('%Y-%m-%dT%H:%M:%f', expires_at)
+    """)
+
     # --------------------
     # UNIT TYPES
     # --------------------
@@ -209,6 +391,10 @@ def init_db():
         );
     """)
 
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_action_queue_status_end_time ON action_queue(status, end_time);
+    """)
+
     # --------------------
     # BATTLE REPORTS
     # --------------------
@@ -299,7 +485,8 @@ def init_db():
     """)
 
     conn.commit()
-    conn.close()
+    if owns_conn:
+        conn.close()
     print("Game database initialized successfully.")
 
 
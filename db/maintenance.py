@@ -0,0 +1,219 @@
+import argparse
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from dotenv import load_dotenv
+from db.connection import DB_PATH, connect_db
+from metrics.registry import get_registry
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# How often the maintenance loop checks the WAL and its timers
+MAINTENANCE_INTERVAL_SECONDS = float(os.getenv("DB_MAINTENANCE_INTERVAL_SECONDS", "15"))
+# PASSIVE checkpoint once the WAL passes this size, or this long after the last checkpoint
+WAL_CHECKPOINT_BYTES = int(os.getenv("DB_WAL_CHECKPOINT_BYTES", str(16 * 1024 * 1024)))
+WAL_CHECKPOINT_SECONDS = float(os.getenv("DB_WAL_CHECKPOINT_SECONDS", "300"))
+# TRUNCATE checkpoint (waits for readers, then resets the file to 0 bytes) past this size
+WAL_TRUNCATE_BYTES = int(os.getenv("DB_WAL_TRUNCATE_BYTES", str(64 * 1024 * 1024)))
+# PRAGMA optimize cadence; the first pass ANALYZEs a database without statistics
+OPTIMIZE_SECONDS = float(os.getenv("DB_OPTIMIZE_SECONDS", "3600"))
+OPTIMIZE_ANALYSIS_LIMIT = int(os.getenv("DB_OPTIMIZE_ANALYSIS_LIMIT", "1000"))
+# Incremental vacuum cadence and the most free pages released per pass
+VACUUM_SECONDS = float(os.getenv("DB_VACUUM_SECONDS", "3600"))
+VACUUM_MAX_PAGES = int(os.getenv("DB_VACUUM_MAX_PAGES", "2000"))
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+_metrics = get_registry()
+WAL_BYTES = _metrics.gauge("db_wal_bytes", "Size of the -wal file")
+CHECKPOINTS = _metrics.counter("db_wal_checkpoints_total", "WAL checkpoints run", ("mode",))
+CHECKPOINTS_BUSY = _metrics.counter(
+    "db_wal_checkpoints_busy_total", "Checkpoints that could not finish because of readers or a writer", ("mode",)
+)
+MAINTENANCE_SECONDS = _metrics.summary("db_maintenance_seconds", "Wall time of a maintenance task", ("task",))
+VACUUM_PAGES = _metrics.counter("db_vacuum_pages_total", "Free pages released by incremental vacuum")
+
+def wal_path(db_path: Path = DB_PATH) -> Path:
+    return db_path.with_name(db_path.name + "-wal")
+
+def wal_size_bytes(db_path: Path = DB_PATH) -> int:
+    """Current size of the database's -wal file, 0 if there is none."""
+    try:
+        return wal_path(db_path).stat().st_size
+    except FileNotFoundError:
+        return 0
+
+def checkpoint(conn, mode: str = "PASSIVE") -> dict:
+    """
+    Copy WAL frames back into the database file.
+
+    PASSIVE copies what it can without waiting. TRUNCATE waits (up to the busy timeout)
+    for readers on old snapshots, then truncates the WAL to 0 bytes.
+
+    Returns:
+        dict: busy (1 if it could not finish), wal_frames and checkpointed_frames.
+    """
+    if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+        raise ValueError(f"Unknown checkpoint mode {mode!r}")
+
+    started = time.perf_counter()
+    busy, wal_frames, checkpointed = conn.execute(f"PRAGMA wal_checkpoint({mode});").fetchone()
+    MAINTENANCE_SECONDS.observe(time.perf_counter() - started, task="checkpoint")
+    CHECKPOINTS.inc(mode=mode.lower())
+    if busy:
+        CHECKPOINTS_BUSY.inc(mode=mode.lower())
+    return {"busy": busy, "wal_frames": wal_frames, "checkpointed_frames": checkpointed}
+
+def optimize(conn) -> bool:
+    """
+    Refresh planner statistics.
+
+    A database with no sqlite_stat1 yet gets a full ANALYZE; after that PRAGMA optimize
+    only re-analyzes tables whose statistics look stale. Returns whether ANALYZE ran.
+    """
+    started = time.perf_counter()
+    has_stats = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+    ).fetchone() is not None
+
+    conn.execute(f"PRAGMA analysis_limit = {OPTIMIZE_ANALYSIS_LIMIT};")
+    if has_stats:
+        conn.execute("PRAGMA optimize;")
+    else:
+        conn.execute("ANALYZE;")
+    conn.commit()
+    MAINTENANCE_SECONDS.observe(time.perf_counter() - started, task="optimize")
+    return not has_stats
+
+def incremental_vacuum(conn, max_pages: int = VACUUM_MAX_PAGES) -> int:
+    """
+    Release up to max_pages free pages back to the filesystem.
+
+    Only databases in auto_vacuum = INCREMENTAL mode (new ones created by init_db) have
+    anything to release; see enable_incremental_vacuum for older files. Returns pages freed.
+    """
+    if conn.execute("PRAGMA auto_vacuum;").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+        return 0
+
+    started = time.perf_counter()
+    before = conn.execute("PRAGMA freelist_count;").fetchone()[0]
+    if before:
+        # executescript steps the pragma to completion; execute() frees a single page
+        conn.executescript(f"PRAGMA incremental_vacuum({max_pages});")
+    freed = before - conn.execute("PRAGMA freelist_count;").fetchone()[0]
+    MAINTENANCE_SECONDS.observe(time.perf_counter() - started, task="vacuum")
+    VACUUM_PAGES.inc(freed)
+    return freed
+
+def enable_incremental_vacuum(conn) -> None:
+    """Switch an existing database to auto_vacuum = INCREMENTAL. Rewrites the whole file."""
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+    conn.execute("VACUUM;")
+
+class DatabaseMaintenanceService:
+    """Checkpoints the WAL on size or time triggers and periodically optimizes and vacuums."""
+
+    def __init__(self, db_path: Path = DB_PATH, interval_seconds: float = MAINTENANCE_INTERVAL_SECONDS) -> None:
+        self.running = False
+        self.thread = None
+        self.db_path = db_path
+        self.interval_seconds = interval_seconds
+        self._stop_event = threading.Event()
+        self._last_checkpoint = time.monotonic()
+        self._last_optimize = None
+        self._last_vacuum = time.monotonic()
+        logger.info("DatabaseMaintenanceService initialized")
+
+    def run_once(self, conn, now: float | None = None) -> dict:
+        """
+        Run whatever maintenance is due.
+
+        Returns:
+            dict: The tasks that ran and their results.
+        """
+        now = time.monotonic() if now is None else now
+        done = {}
+
+        if self._last_optimize is None or now - self._last_optimize >= OPTIMIZE_SECONDS:
+            done["analyzed"] = optimize(conn)
+            self._last_optimize = now
+
+        if now - self._last_vacuum >= VACUUM_SECONDS:
+            done["vacuumed_pages"] = incremental_vacuum(conn)
+            self._last_vacuum = now
+
+        # Checkpoint last so it also folds in what ANALYZE and the vacuum wrote
+        wal_bytes = wal_size_bytes(self.db_path)
+        WAL_BYTES.set(wal_bytes)
+        if wal_bytes >= WAL_TRUNCATE_BYTES:
+            done["checkpoint"] = checkpoint(conn, "TRUNCATE")
+        elif wal_bytes >= WAL_CHECKPOINT_BYTES or (wal_bytes and now - self._last_checkpoint >= WAL_CHECKPOINT_SECONDS):
+            done["checkpoint"] = checkpoint(conn, "PASSIVE")
+        if "checkpoint" in done:
+            self._last_checkpoint = now
+            WAL_BYTES.set(wal_size_bytes(self.db_path))
+
+        return done
+
+    def _run_loop(self) -> None:
+        """Check every interval_seconds until stopped"""
+        conn = connect_db()
+        try:
+            while not self._stop_event.wait(self.interval_seconds):
+                try:
+                    done = self.run_once(conn)
+                    if done.get("checkpoint", {}).get("busy"):
+                        logger.info("WAL checkpoint blocked by open readers, retrying next interval")
+                except Exception as e:
+                    conn.rollback()
+                    logger.error(f"Error running database maintenance: {e}", exc_info=True)
+        finally:
+            conn.close()
+
+    def start(self) -> None:
+        """Start the maintenance loop"""
+        if self.running:
+            return
+
+        self.running = True
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._run_loop, daemon=True)
+        self.thread.start()
+        logger.info(f"Database maintenance started (every {self.interval_seconds}s)")
+
+    def stop(self) -> None:
+        """Stop the maintenance loop"""
+        self.running = False
+        self._stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+        logger.info("DatabaseMaintenanceService stopped")
+
+_maintenance_service = None
+
+def get_maintenance_service() -> DatabaseMaintenanceService:
+    """Single accessor for DatabaseMaintenanceService"""
+    global _maintenance_service
+    if _maintenance_service is None:
+        _maintenance_service = DatabaseMaintenanceService()
+    return _maintenance_service
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="One-off maintenance of the game database")
+    parser.add_argument("--enable-incremental-vacuum", action="store_true",
+                        help="convert an existing database to auto_vacuum = INCREMENTAL (rewrites the file)")
+    args = parser.parse_args()
+
+    conn = connect_db()
+    if args.enable_incremental_vacuum:
+        enable_incremental_vacuum(conn)
+    print("checkpoint:", checkpoint(conn, "TRUNCATE"))
+    print("analyzed:", optimize(conn))
+    print("vacuumed pages:", incremental_vacuum(conn))
+    conn.close()
+
+#python3 -m db.maintenance
@@ -0,0 +1,131 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from functools import partial
+from flask import g, current_app, request, has_request_context
+from dotenv import load_dotenv
+from db.connection import connect_db
+
+load_dotenv()
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+DB_READER_POOL_SIZE = int(os.getenv("DB_READER_POOL_SIZE", "16"))
+
+# Requests with these methods are served from the read-only pool
+READ_METHODS = ("GET", "HEAD")
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of configured SQLite connections."""
+
+    def __init__(self, size: int = DB_POOL_SIZE, timeout: float = DB_POOL_TIMEOUT, factory=None) -> None:
+        self.size = size
+        self.timeout = timeout
+        self._factory = factory or partial(connect_db, check_same_thread=False)
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def acquire(self):
+        """Take an idle connection, opening one if fewer than size are in use.
+
+        Raises:
+            TimeoutError: If every connection stays in use for longer than timeout.
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"No database connection available after {self.timeout}s")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self._factory()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn) -> None:
+        """Return a connection, rolling back anything its user left uncommitted."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+        except sqlite3.Error:
+            conn.close()
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a with block."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self) -> None:
+        """Close the idle connections."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+_pool = None
+_reader_pool = None
+
+def get_pool() -> ConnectionPool:
+    """Single accessor for the process-wide read-write ConnectionPool"""
+    global _pool
+    if _pool is None:
+        _pool = ConnectionPool()
+    return _pool
+
+def get_reader_pool() -> ConnectionPool:
+    """Single accessor for the process-wide read-only ConnectionPool"""
+    global _reader_pool
+    if _reader_pool is None:
+        _reader_pool = ConnectionPool(
+            size=DB_READER_POOL_SIZE,
+            factory=partial(connect_db, check_same_thread=False, read_only=True)
+        )
+    return _reader_pool
+
+def get_db(read_only: bool | None = None):
+    """
+    The connection for the current request, borrowed from the app's pools on first use.
+
+    Args:
+        read_only: Whether to use a read-only connection. By default GET and HEAD
+            requests read and everything else writes.
+
+    Apps that did not call init_app get a plain connection per request instead.
+    """
+    if read_only is None:
+        read_only = has_request_context() and request.method in READ_METHODS
+
+    key = "db_read" if read_only else "db"
+    if key not in g:
+        pool = current_app.extensions.get("db_reader_pool" if read_only else "db_pool")
+        conn = pool.acquire() if pool else connect_db(read_only=read_only)
+        setattr(g, key, (conn, pool))
+    return g.get(key)[0]
+
+def close_db(exception=None) -> None:
+    """Return the request's connections to their pools (teardown handler)."""
+    for key in ("db", "db_read"):
+        conn, pool = g.pop(key, (None, None))
+        if conn is None:
+            continue
+        if pool is not None:
+            pool.release(conn)
+        else:
+            conn.close()
+
+def init_app(app, pool: ConnectionPool | None = None, reader_pool: ConnectionPool | None = None) -> None:
+    """Serve get_db() from the writer and reader pools and give connections back when each request ends."""
+    app.extensions["db_pool"] = pool or get_pool()
+    app.extensions["db_reader_pool"] = reader_pool or get_reader_pool()
+    app.teardown_appcontext(close_db)
@@ -1,10 +1,16 @@
 import json
 from datetime import datetime
 from db.connection import connect_db
+from db.static_data import bump_static_data_version, invalidate_static_data
 
-def seed_db():
-    """Seed the database with initial data for testing and development."""
-    conn = connect_db()
+def seed_db(conn=None):
+    """Seed the database with initial data for testing and development.
+
+    Uses the given connection if provided (left open), otherwise opens and closes its own.
+    """
+    owns_conn = conn is None
+    if owns_conn:
+        conn = connect_db()
     cursor = conn.cursor()
     cursor.execute("PRAGMA foreign_keys = ON;")
 
@@ -215,8 +221,13 @@ def seed_db():
         VALUES (?, ?, ?, ?, ?)
     """, research_effects)
 
+    # Processes caching the static tables reload them
+    bump_static_data_version(cursor)
+
     conn.commit()
-    conn.close()
+    invalidate_static_data()
+    if owns_conn:
+        conn.close()
     print("Seed data inserted successfully.")
 
 if __name__ == "__main__":
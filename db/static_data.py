@@ -0,0 +1,174 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, fields
+from types import MappingProxyType
+from dotenv import load_dotenv
+from db.connection import connect_db
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# How often a process re-reads the version stamp to pick up a seed run by another process
+STATIC_DATA_CHECK_SECONDS = float(os.getenv("STATIC_DATA_CHECK_SECONDS", "30"))
+
+class _Record:
+    __slots__ = ()
+
+    def to_dict(self) -> dict:
+        """A new dict with the same keys as the table row."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+@dataclass(frozen=True, slots=True)
+class SettlementType(_Record):
+    id: int
+    name: str
+    base_food_rate: float
+    base_wood_rate: float
+    base_stone_rate: float
+    base_silver_rate: float
+    description: str | None
+
+@dataclass(frozen=True, slots=True)
+class UnitType(_Record):
+    unit_type: str
+    attack: int
+    defense: int
+    health: int
+    cost_wood: int
+    cost_silver: int
+
+@dataclass(frozen=True, slots=True)
+class ResearchNode(_Record):
+    id: int
+    sector: str
+    name: str
+    description: str | None
+    required_player_level: int
+    cost_food: int
+    cost_wood: int
+    cost_stone: int
+    cost_silver: int
+    cost_gold: int
+    research_time_hours: float
+    created_at: str | None
+
+@dataclass(frozen=True, slots=True)
+class ResearchEffect(_Record):
+    id: int
+    node_id: int
+    effect_type: str
+    target: str
+    value: float
+    description: str | None
+
+@dataclass(frozen=True, slots=True)
+class StaticData:
+    """
+    Immutable snapshot of the seeded game tables, shared by every thread.
+
+    Replaced as a whole when the version stamp changes, never modified in place, so
+    a caller holding one keeps a consistent view.
+    """
+    version: int
+    settlement_types: MappingProxyType          # id -> SettlementType
+    settlement_type_ids: MappingProxyType       # name -> id
+    unit_types: MappingProxyType                # unit_type -> UnitType
+    research_nodes: tuple                       # ResearchNode, in id order
+    research_nodes_by_id: MappingProxyType      # id -> ResearchNode
+    research_effects: MappingProxyType          # node_id -> tuple of ResearchEffect
+    production_nodes: frozenset                 # node ids with a production_bonus effect
+
+    def effects_for(self, node_ids, effect_type: str | None = None) -> list[ResearchEffect]:
+        """Effects of the given nodes, optionally of one type."""
+        return [
+            effect
+            for node_id in node_ids
+            for effect in self.research_effects.get(node_id, ())
+            if effect_type is None or effect.effect_type == effect_type
+        ]
+
+def _records(cursor, record_type, table: str, order_by: str) -> list:
+    columns = ", ".join(field.name for field in fields(record_type))
+    cursor.execute(f"SELECT {columns} FROM {table} ORDER BY {order_by}")
+    return [record_type(*row) for row in cursor.fetchall()]
+
+def get_static_data_version(cursor) -> int:
+    cursor.execute("SELECT version FROM static_data_version WHERE id = 1")
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+def bump_static_data_version(cursor) -> None:
+    """Mark the static tables as changed, so every process reloads its cache. Runs in the caller's transaction."""
+    cursor.execute("""
+        INSERT INTO static_data_version (id, version) VALUES (1, 1)
+        ON CONFLICT (id) DO UPDATE SET version = version + 1
+    """)
+
+def load_static_data(conn) -> StaticData:
+    """Read the static tables into a new StaticData."""
+    cursor = conn.cursor()
+    version = get_static_data_version(cursor)
+    settlement_types = _records(cursor, SettlementType, "settlement_types", "id")
+    unit_types = _records(cursor, UnitType, "unit_types", "unit_type")
+    research_nodes = _records(cursor, ResearchNode, "research_nodes", "id")
+
+    effects = {}
+    for effect in _records(cursor, ResearchEffect, "research_effects", "id"):
+        effects.setdefault(effect.node_id, []).append(effect)
+
+    return StaticData(
+        version=version,
+        settlement_types=MappingProxyType({st.id: st for st in settlement_types}),
+        settlement_type_ids=MappingProxyType({st.name: st.id for st in settlement_types}),
+        unit_types=MappingProxyType({ut.unit_type: ut for ut in unit_types}),
+        research_nodes=tuple(research_nodes),
+        research_nodes_by_id=MappingProxyType({node.id: node for node in research_nodes}),
+        research_effects=MappingProxyType({node_id: tuple(rows) for node_id, rows in effects.items()}),
+        production_nodes=frozenset(
+            node_id for node_id, rows in effects.items()
+            if any(effect.effect_type == "production_bonus" for effect in rows)
+        )
+    )
+
+_static_data = None
+_checked_at = 0.0
+_static_data_lock = threading.Lock()
+
+def get_static_data(conn=None) -> StaticData:
+    """
+    The process-wide StaticData, loaded on first use.
+
+    At most every STATIC_DATA_CHECK_SECONDS the version stamp is re-read and the
+    snapshot reloaded if a seed bumped it. Uses the given connection if one is needed
+    (left open), otherwise opens and closes its own.
+    """
+    global _static_data, _checked_at
+    data = _static_data
+    if data is not None and time.monotonic() - _checked_at < STATIC_DATA_CHECK_SECONDS:
+        return data
+
+    with _static_data_lock:
+        if _static_data is not None and time.monotonic() - _checked_at < STATIC_DATA_CHECK_SECONDS:
+            return _static_data
+
+        owns_conn = conn is None
+        if owns_conn:
+            conn = connect_db()
+        try:
+            if _static_data is None or get_static_data_version(conn.cursor()) != _static_data.version:
+                _static_data = load_static_data(conn)
+                logger.info(f"Static game data loaded (version {_static_data.version})")
+            _checked_at = time.monotonic()
+        finally:
+            if owns_conn:
+                conn.close()
+        return _static_data
+
+def invalidate_static_data() -> None:
+    """Drop the cached snapshot; the next get_static_data reloads it."""
+    global _static_data
+    with _static_data_lock:
+        _static_data = None
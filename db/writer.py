@@ -0,0 +1,218 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dotenv import load_dotenv
+from db.connection import connect_db
+from metrics.registry import get_registry
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Most units of work committed together in one transaction
+WRITER_MAX_BATCH = int(os.getenv("DB_WRITER_MAX_BATCH", "64"))
+# How long a caller waits for its unit of work before giving up
+WRITER_TIMEOUT = float(os.getenv("DB_WRITER_TIMEOUT", "30"))
+
+_metrics = get_registry()
+QUEUE_DEPTH = _metrics.gauge("db_writer_queue_depth", "Units of work waiting for the writer thread")
+BATCH_UNITS = _metrics.summary("db_writer_batch_units", "Units of work committed per transaction")
+COMMIT_SECONDS = _metrics.summary("db_writer_commit_seconds", "Wall time of a group commit, including its units")
+UNIT_FAILURES = _metrics.counter("db_writer_unit_failures_total", "Units of work rolled back after raising")
+BATCH_FAILURES = _metrics.counter("db_writer_batch_failures_total", "Group commits that failed as a whole")
+
+_STOP = object()
+
+class WriterStoppedError(RuntimeError):
+    """The writer thread is not running, or stopped before the unit of work ran."""
+
+def _run_unit(cursor, fn, args: tuple, kwargs: dict) -> tuple[bool, object]:
+    """Run one unit of work inside its own savepoint, so a failure only undoes that unit."""
+    cursor.execute("SAVEPOINT write_unit")
+    try:
+        result = fn(cursor, *args, **kwargs)
+    except Exception as e:
+        cursor.execute("ROLLBACK TO write_unit")
+        cursor.execute("RELEASE write_unit")
+        return False, e
+    cursor.execute("RELEASE write_unit")
+    return True, result
+
+class DatabaseWriter:
+    """
+    Single writer thread with group commit.
+
+    Callers submit units of work: functions taking a cursor as their first argument that
+    write without committing. The writer runs queued units one after another in a single
+    BEGIN IMMEDIATE transaction (up to max_batch per commit) and resolves each caller's
+    future with that unit's result or exception.
+
+    The background writers (the resource tick and its catch-up chunks, and modifier expiry)
+    deliberately do not submit here: one tick transaction can run for seconds, and every
+    request write queued behind it would wait that long. They keep their own connections
+    and open each transaction with BEGIN IMMEDIATE, so they and this thread take turns on
+    the busy timeout rather than racing.
+    """
+
+    def __init__(self, max_batch: int = WRITER_MAX_BATCH) -> None:
+        self.running = False
+        self.thread = None
+        self.max_batch = max(1, max_batch)
+        self._queue = queue.Queue()
+        # Orders submit() against the thread exiting, so no unit is queued after the last drain
+        self._lock = threading.Lock()
+        logger.info(f"DatabaseWriter initialized (up to {self.max_batch} units per commit)")
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """
+        Queue a unit of work. The returned future resolves once its transaction commits.
+
+        Raises:
+            WriterStoppedError: If the writer thread is not running.
+        """
+        future = Future()
+        with self._lock:
+            if not self.running:
+                raise WriterStoppedError("DatabaseWriter is not running")
+            self._queue.put((fn, args, kwargs, future))
+        return future
+
+    def _fail_pending(self) -> None:
+        """Fail every unit still queued, so its caller hears now rather than at WRITER_TIMEOUT."""
+        while True:
+            try:
+                unit = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if unit is not _STOP:
+                unit[3].set_exception(WriterStoppedError("DatabaseWriter stopped before the unit ran"))
+
+    def _next_batch(self) -> list | None:
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        while len(batch) < self.max_batch:
+            try:
+                unit = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if unit is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(unit)
+        return batch
+
+    def _commit_batch(self, conn, batch: list) -> None:
+        started = time.perf_counter()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            outcomes = [_run_unit(cursor, fn, args, kwargs) for fn, args, kwargs, _ in batch]
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            BATCH_FAILURES.inc()
+            logger.error(f"Group commit of {len(batch)} units failed: {e}", exc_info=True)
+            for *_, future in batch:
+                future.set_exception(e)
+            return
+
+        COMMIT_SECONDS.observe(time.perf_counter() - started)
+        BATCH_UNITS.observe(len(batch))
+        for (*_, future), (ok, result) in zip(batch, outcomes):
+            if ok:
+                future.set_result(result)
+            else:
+                UNIT_FAILURES.inc()
+                future.set_exception(result)
+
+    def _run_loop(self) -> None:
+        """Take everything queued so far, run it in one transaction, repeat"""
+        conn = None
+        try:
+            conn = connect_db()
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    break
+                self._commit_batch(conn, batch)
+        except Exception as e:
+            logger.error(f"Database writer thread died: {e}", exc_info=True)
+        finally:
+            # However the thread ends, execute_write goes back to running units inline
+            with self._lock:
+                self.running = False
+                self._fail_pending()
+            if conn is not None:
+                conn.close()
+
+    def start(self) -> None:
+        """Start the writer thread"""
+        if self.running:
+            return
+
+        self.running = True
+        self.thread = threading.Thread(target=self._run_loop, daemon=True)
+        self.thread.start()
+        logger.info("Database writer started")
+
+    def stop(self) -> None:
+        """Commit what is already queued, then stop the writer thread"""
+        with self._lock:
+            if not self.running:
+                return
+            self.running = False
+            self._queue.put(_STOP)
+        if self.thread:
+            self.thread.join(timeout=5)
+        logger.info("DatabaseWriter stopped")
+
+_writer = None
+
+def get_writer() -> DatabaseWriter:
+    """Single accessor for DatabaseWriter"""
+    global _writer
+    if _writer is None:
+        _writer = DatabaseWriter()
+    return _writer
+
+QUEUE_DEPTH.set_function(lambda: get_writer().queue_depth())
+
+def execute_write(fn, *args, **kwargs):
+    """
+    Run a unit of work (fn(cursor, *args, **kwargs), no commit) and return its result.
+
+    Goes through the writer thread when it is running. Otherwise, e.g. in scripts and
+    tests or after the thread died, it runs inline in its own BEGIN IMMEDIATE transaction.
+    Exceptions raised by the unit are re-raised here after its writes are rolled back.
+
+    A caller that gives up after WRITER_TIMEOUT gets a TimeoutError, but its unit stays
+    queued and can still commit later. Units must be safe to commit after their caller
+    has given up, e.g. by checking state rather than assuming it.
+    """
+    writer = get_writer()
+    if writer.running:
+        try:
+            return writer.submit(fn, *args, **kwargs).result(timeout=WRITER_TIMEOUT)
+        except WriterStoppedError:
+            pass  # the thread stopped before the unit ran, so it is run inline below
+
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        result = fn(cursor, *args, **kwargs)
+        conn.commit()
+        return result
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
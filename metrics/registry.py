@@ -0,0 +1,170 @@
+import math
+import threading
+
+class _Metric:
+    """Base for metrics keyed by a tuple of label values."""
+    type_name = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _format_labels(self, key: tuple) -> str:
+        if not key:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in zip(self.labelnames, key)) + "}"
+
+    def samples(self) -> list[tuple[str, str, float]]:
+        """(metric name, label string, value) tuples for exposition."""
+        with self._lock:
+            return [(self.name, self._format_labels(key), value) for key, value in self._values.items()]
+
+    def value(self, **labels) -> float:
+        """Current value for the given labels (0 if never recorded)."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    """Value that can go up and down, optionally computed at scrape time."""
+    type_name = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._function = None
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function: callable) -> None:
+        """Compute the (unlabelled) value by calling `function` whenever it is read."""
+        self._function = function
+
+    def samples(self) -> list[tuple[str, str, float]]:
+        if self._function is not None:
+            try:
+                return [(self.name, "", self._function())]
+            except Exception:
+                return [(self.name, "", float("nan"))]
+        return super().samples()
+
+    def value(self, **labels) -> float:
+        if self._function is not None:
+            return self._function()
+        return super().value(**labels)
+
+class Summary(_Metric):
+    """Count and sum of observations, e.g. durations."""
+    type_name = "summary"
+
+    def observe(self, amount: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            count, total = self._values.get(key, (0, 0.0))
+            self._values[key] = (count + 1, total + amount)
+
+    def samples(self) -> list[tuple[str, str, float]]:
+        with self._lock:
+            items = list(self._values.items())
+        result = []
+        for key, (count, total) in items:
+            labels = self._format_labels(key)
+            result.append((f"{self.name}_count", labels, count))
+            result.append((f"{self.name}_sum", labels, total))
+        return result
+
+    def value(self, **labels) -> tuple[int, float]:
+        """(count, sum) for the given labels."""
+        with self._lock:
+            return self._values.get(self._key(labels), (0, 0.0))
+
+class MetricsRegistry:
+    """Process-wide collection of metrics, rendered in Prometheus text format."""
+
+    def __init__(self, prefix: str = "riseandfall_") -> None:
+        self.prefix = prefix
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, metric_class: type, name: str, help_text: str, labelnames: tuple) -> _Metric:
+        full_name = self.prefix + name
+        with self._lock:
+            metric = self._metrics.get(full_name)
+            if metric is None:
+                metric = metric_class(full_name, help_text, labelnames)
+                self._metrics[full_name] = metric
+            elif not isinstance(metric, metric_class):
+                raise ValueError(f"Metric {full_name} already registered as {metric.type_name}")
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: tuple = ()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: tuple = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text, labelnames)
+
+    def summary(self, name: str, help_text: str, labelnames: tuple = ()) -> Summary:
+        return self._get_or_create(Summary, name, help_text, labelnames)
+
+    def get(self, name: str) -> _Metric | None:
+        """Look up a metric by its name without the registry prefix."""
+        return self._metrics.get(self.prefix + name)
+
+    def render_prometheus(self, const_labels: dict | None = None) -> str:
+        """
+        Render every metric in the Prometheus text exposition format (0.0.4).
+
+        const_labels are added to every series, e.g. {"pid": ...} to tell processes apart.
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        const = ",".join(f'{name}="{_escape_label(value)}"' for name, value in (const_labels or {}).items())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for name, labels, value in metric.samples():
+                if const:
+                    labels = f"{labels[:-1]},{const}}}" if labels else f"{{{const}}}"
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_value(value: float) -> str:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "NaN"
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+_registry = None
+
+def get_registry() -> MetricsRegistry:
+    """Single accessor for the process-wide MetricsRegistry"""
+    global _registry
+    if _registry is None:
+        _registry = MetricsRegistry()
+    return _registry
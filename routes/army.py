@@ -1,25 +1,29 @@
 from flask import Blueprint, jsonify, request
-from database_operations.user_operations import get_player_id_for_user
-from systems.army.army import get_player_armies_for_user
+from systems.army.army import get_player_armies
 from auth_decorator.auth_decorator import require_auth
+from db.pool import get_db
 
 army_bp = Blueprint('army', __name__)
 
+def army_payload(player_id: int, conn=None) -> tuple[dict, int]:
+    """Response body and status for /my_army_units, shared by the Flask view, /batch and asgi.py."""
+    army = get_player_armies(player_id, conn)
+    
+    if not army:
+        return {"army": []}, 200
+
+    return {
+        "player_id": player_id,
+        "army": army
+    }, 200
+
 @army_bp.route('/my_army_units', methods=['GET'])
 @require_auth
 def get_army_units() -> tuple[dict, int]:
     """Endpoint to retrieve the army units for the authenticated user."""
     try:
-        player_id = get_player_id_for_user(request.user_id)
-        army = get_player_armies_for_user(request.user_id)
-        
-        if not army:
-            return jsonify({"army": []}), 200
-
-        return jsonify({
-            "player_id": player_id,
-            "army": army
-        }), 200
+        payload, status = army_payload(request.player_id, get_db())
+        return jsonify(payload), status
 
     except Exception as e:
         print("ERROR:", e)
@@ -0,0 +1,111 @@
+import os
+import re
+import time
+from flask import Blueprint, jsonify, request
+from dotenv import load_dotenv
+from auth_decorator.auth_decorator import require_auth
+from db.pool import get_db
+from metrics.registry import get_registry
+from routes.army import army_payload
+from routes.neighbors import neighbors_payload
+from routes.research import research_data_payload
+from routes.resources import total_resources_payload
+from routes.settlements import garrison_units_payload, my_settlements_payload, settlement_garrison_payload
+
+load_dotenv()
+
+batch_bp = Blueprint('batch', __name__)
+
+# Sub-requests accepted in one /batch call
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+
+_metrics = get_registry()
+SUBREQUESTS = _metrics.counter("batch_subrequests_total", "Sub-requests run by /batch", ("route", "status"))
+SUBREQUEST_SECONDS = _metrics.summary("batch_subrequest_seconds", "Time per /batch sub-request", ("route",))
+
+# (path regex, handler(player_id, conn=, **path params) -> (body, status)) for the read endpoints
+# that /batch and asgi.py serve without going through their Flask views
+READ_ROUTES = [
+    (re.compile(r"^/total_resources$"), total_resources_payload),
+    (re.compile(r"^/my_settlements$"), my_settlements_payload),
+    (re.compile(r"^/settlement_garrison/(?P<settlement_id>\d+)$"),
+     lambda player_id, conn=None, settlement_id=None: settlement_garrison_payload(int(settlement_id), player_id, conn)),
+    (re.compile(r"^/garrison_units$"), garrison_units_payload),
+    (re.compile(r"^/my_army_units$"), army_payload),
+    (re.compile(r"^/get_research_data$"), research_data_payload),
+    (re.compile(r"^/get_neighbors$"), neighbors_payload),
+]
+
+def match_read_route(path: str):
+    """The READ_ROUTES handler, its pattern and path params for path, or (None, None, None)."""
+    for pattern, handler in READ_ROUTES:
+        match = pattern.match(path)
+        if match:
+            return handler, pattern, match.groupdict()
+    return None, None, None
+
+def run_subrequest(item, player_id: int, conn) -> dict:
+    """Run one sub-request on conn; errors become its status rather than failing the batch."""
+    started = time.perf_counter()
+    path = item.get("path") if isinstance(item, dict) else None
+    method = (item.get("method") or "GET").upper() if isinstance(item, dict) else "GET"
+    handler, pattern, params = match_read_route(path) if isinstance(path, str) else (None, None, None)
+
+    if handler is None:
+        body, status = {"error": "Not found"}, 404
+    elif method != "GET":
+        body, status = {"error": "Only GET sub-requests are supported"}, 405
+    else:
+        try:
+            body, status = handler(player_id, conn=conn, **params)
+        except Exception as e:
+            print("ERROR:", e)
+            import traceback
+            traceback.print_exc()
+            body, status = {"error": str(e)}, 500
+
+    elapsed = time.perf_counter() - started
+    route = pattern.pattern if pattern else "unmatched"
+    SUBREQUESTS.inc(route=route, status=str(status))
+    SUBREQUEST_SECONDS.observe(elapsed, route=route)
+    return {"path": path, "status": status, "body": body, "duration_ms": round(elapsed * 1000, 3)}
+
+@batch_bp.route('/batch', methods=['POST'])
+@require_auth
+def batch() -> tuple[dict, int]:
+    """
+    Endpoint to run several read endpoints in one request.
+
+    Takes {"requests": [{"path": "/my_settlements"}, ...]} and returns
+    {"responses": [{"path", "status", "body", "duration_ms"}, ...]} in the same order.
+    Every sub-request shares the caller's auth and one read connection, inside one
+    transaction, so they all see the same snapshot of the game.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        items = data.get("requests")
+
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "requests must be a non-empty list"}), 400
+        if len(items) > BATCH_MAX_REQUESTS:
+            return jsonify({"error": f"At most {BATCH_MAX_REQUESTS} requests per batch"}), 400
+
+        started = time.perf_counter()
+        conn = get_db(read_only=True)
+        # Deferred: the snapshot is taken by the first read and held until the rollback
+        conn.execute("BEGIN")
+        try:
+            responses = [run_subrequest(item, request.player_id, conn) for item in items]
+        finally:
+            conn.rollback()
+
+        return jsonify({
+            "responses": responses,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3)
+        }), 200
+
+    except Exception as e:
+        print("ERROR:", e)
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
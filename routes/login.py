@@ -1,8 +1,11 @@
 from flask import Blueprint, jsonify, request, g
-from database_operations.user_operations import authenticate_user
+from database_operations.user_operations import authenticate_user, mark_user_logged_in
 from validators.auth_validators import validate_email
 from auth_tokens.auth_tokens import create_token
-from db.connection import connect_db
+from auth_tokens.cookies import set_auth_cookies
+from auth_tokens.passwords import PasswordHasherBusy
+from database_operations.session_operations import create_session
+from db.writer import execute_write
 
 login_bp = Blueprint('login', __name__)
 
@@ -25,16 +28,10 @@ def login() -> tuple[dict, int]:
         if not user:
             return jsonify({"error": "Invalid email or password"}), 401
 
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute("""
-            UPDATE users 
-            SET is_active = 1, last_login = CURRENT_TIMESTAMP 
-            WHERE id = ?
-        """, (user["id"],))
-        conn.commit()
+        execute_write(mark_user_logged_in, user["id"])
+        session = execute_write(create_session, user["id"], user["player_id"])
 
-        token = create_token(user["id"])
+        token = create_token(user["id"], user["player_id"], session["session_id"])
 
         response = jsonify({
             "message": "Login successful",
@@ -45,17 +42,13 @@ def login() -> tuple[dict, int]:
             }
         })
 
-        response.set_cookie(
-            "auth_token",
-            token,
-            httponly=True,
-            samesite="Lax",
-            secure=False,  # True in production
-            max_age=3600 * 24 * 7  # 7 days
-        )
+        set_auth_cookies(response, token, session["refresh_token"])
 
         return response, 200
 
+    except PasswordHasherBusy:
+        return jsonify({"error": "Too many login attempts, try again shortly"}), 503, {"Retry-After": "1"}
+
     except Exception as e:
         import traceback
         traceback.print_exc()
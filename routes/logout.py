@@ -1,6 +1,9 @@
 from flask import Blueprint, jsonify, make_response, request
-from db.connection import connect_db
-from auth_tokens.decode_token import decode_token 
+from db.writer import execute_write
+from database_operations.user_operations import mark_user_logged_out
+from database_operations.session_operations import revoke_session, revoke_session_id
+from auth_tokens.token_cache import revoke_token
+from auth_tokens.cookies import clear_auth_cookies
 
 logout_bp = Blueprint('logout', __name__)
 
@@ -8,28 +11,21 @@ logout_bp = Blueprint('logout', __name__)
 def logout() -> tuple[dict, int]:
     """Endpoint to handle user logout."""
     try:
-        conn = connect_db()
-        cursor = conn.cursor()
-
         token = request.cookies.get("auth_token")
-        if token:
-            user_id = decode_token(token)
-            cursor.execute("""
-                UPDATE users
-                SET is_active = 0
-                WHERE id = ?
-            """, (user_id,))
-            conn.commit()
+        claims = revoke_token(token) if token else None
+        if claims:
+            execute_write(mark_user_logged_out, claims["user_id"])
+            # Other worker processes reject the access token once its session is revoked
+            if claims.get("sid") is not None:
+                execute_write(revoke_session_id, claims["sid"])
+
+        # End the session so its refresh token can no longer issue access tokens
+        refresh_token = request.cookies.get("refresh_token")
+        if refresh_token:
+            execute_write(revoke_session, refresh_token)
 
         response = make_response(jsonify({"message": "Logged out successfully"}))
-        response.set_cookie(
-            "auth_token",
-            "",  # Clear cookie
-            httponly=True,
-            samesite="Lax",
-            secure=False,
-            max_age=0
-        )
+        clear_auth_cookies(response)
         return response, 200
 
     except Exception as e:
@@ -0,0 +1,33 @@
+import hmac
+import os
+from flask import Blueprint, Response, request
+from dotenv import load_dotenv
+from metrics.registry import get_registry
+
+load_dotenv()
+
+metrics_bp = Blueprint('metrics', __name__)
+
+# Bearer token scrapers must send; without one, /metrics only answers on loopback
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+LOOPBACK_ADDRESSES = {"127.0.0.1", "::1"}
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics() -> Response:
+    """
+    Endpoint exposing in-process metrics in Prometheus text format.
+
+    Requires `Authorization: Bearer $METRICS_TOKEN` when METRICS_TOKEN is set, otherwise
+    only loopback clients are answered. The registry is per process: under server.py each
+    worker has its own, and a scrape reaches whichever worker accepts it. Every series is
+    labelled with the worker's pid so they are never mixed; sum over pid when querying.
+    Background-work metrics (resource tick, expiry, maintenance) only come from the leader.
+    """
+    if METRICS_TOKEN:
+        sent = request.headers.get("Authorization", "").encode()
+        if not hmac.compare_digest(sent, f"Bearer {METRICS_TOKEN}".encode()):
+            return Response("Unauthorized\n", status=401, mimetype="text/plain")
+    elif request.remote_addr not in LOOPBACK_ADDRESSES:
+        return Response("Forbidden\n", status=403, mimetype="text/plain")
+
+    return Response(get_registry().render_prometheus({"pid": os.getpid()}), mimetype="text/plain; version=0.0.4")
@@ -1,17 +1,21 @@
 from flask import Blueprint, jsonify, request, g
 from db.connection import connect_db
+from db.pool import get_db
 from systems.neighbors.neighbors import get_all_npc_settlements
 from auth_decorator.auth_decorator import require_auth
 
 neighbors = Blueprint('neighbors', __name__)
 
+def neighbors_payload(player_id: int, conn=None) -> tuple[dict, int]:
+    """Response body and status for /get_neighbors, shared by the Flask view, /batch and asgi.py."""
+    return {"neighbors": get_all_npc_settlements(conn)}, 200
+
 @neighbors.route('/get_neighbors', methods=['GET'])
 @require_auth
 def get_neighbors() -> tuple[dict, int]:
     try:
-        neighbors_list = get_all_npc_settlements()
-
-        return jsonify({"neighbors": neighbors_list}), 200
+        payload, status = neighbors_payload(request.player_id, get_db())
+        return jsonify(payload), status
 
     except Exception as e:
         print("ERROR:", e)
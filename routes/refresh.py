@@ -0,0 +1,35 @@
+from flask import Blueprint, jsonify, request
+from auth_tokens.auth_tokens import create_token
+from auth_tokens.cookies import clear_auth_cookies, set_auth_cookies
+from database_operations.session_operations import refresh_session
+from db.writer import execute_write
+from metrics.registry import get_registry
+
+refresh_bp = Blueprint('refresh', __name__)
+
+_metrics = get_registry()
+REFRESHES = _metrics.counter("auth_refreshes_total", "Token refreshes by outcome", ("outcome",))
+
+@refresh_bp.route('/refresh', methods=['POST'])
+def refresh() -> tuple[dict, int]:
+    """Endpoint to issue a new access token from the session's refresh token, without the password."""
+    try:
+        refresh_token = request.cookies.get("refresh_token")
+        session = execute_write(refresh_session, refresh_token) if refresh_token else None
+
+        if session is None:
+            REFRESHES.inc(outcome="rejected")
+            response = jsonify({"error": "Session expired, please log in again"})
+            clear_auth_cookies(response)
+            return response, 401
+
+        token = create_token(session["user_id"], session["player_id"], session["session_id"])
+        response = jsonify({"message": "Token refreshed"})
+        set_auth_cookies(response, token, session["refresh_token"])
+        REFRESHES.inc(outcome="refreshed")
+        return response, 200
+
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": "Refresh failed"}), 500
@@ -1,11 +1,21 @@
 from flask import Blueprint, jsonify, request, g
 from db.connection import connect_db
+from db.pool import get_db
 from systems.research.research_nodes import fetch_research_nodes_unlocked, get_all_research_nodes, unlock_research_node
-from database_operations.user_operations import get_player_id_for_user
 from auth_decorator.auth_decorator import require_auth
 
 research = Blueprint('research', __name__)
 
+def research_data_payload(player_id: int, conn=None) -> tuple[dict, int]:
+    """Response body and status for /get_research_data, shared by the Flask view, /batch and asgi.py."""
+    research_nodes_list = get_all_research_nodes(conn)
+    unlocked_research = fetch_research_nodes_unlocked(player_id, conn)
+    
+    return {
+        "research_nodes": research_nodes_list,
+        "unlocked_research": unlocked_research
+    }, 200
+
 @research.route('/get_research_data', methods=['GET'])
 @require_auth
 def get_research_data() -> tuple[dict, int]:
@@ -13,15 +23,8 @@ def get_research_data() -> tuple[dict, int]:
     Combined endpoint that returns all research nodes and player's unlocked research.
     """
     try:
-        player_id = get_player_id_for_user(request.user_id)
-        
-        research_nodes_list = get_all_research_nodes()
-        unlocked_research = fetch_research_nodes_unlocked(player_id)
-        
-        return jsonify({
-            "research_nodes": research_nodes_list,
-            "unlocked_research": unlocked_research
-        }), 200
+        payload, status = research_data_payload(request.player_id, get_db())
+        return jsonify(payload), status
 
     except Exception as e:
         print("ERROR:", e)
@@ -34,7 +37,7 @@ def get_research_data() -> tuple[dict, int]:
 @require_auth
 def get_research_nodes() -> tuple[dict, int]:
     try:
-        research_nodes_list = get_all_research_nodes()
+        research_nodes_list = get_all_research_nodes(get_db())
         return jsonify({"research_nodes": research_nodes_list}), 200
     except Exception as e:
         print("ERROR:", e)
@@ -46,8 +49,7 @@ def get_research_nodes() -> tuple[dict, int]:
 @require_auth
 def get_research_unlocked() -> tuple[dict, int]:
     try:
-        player_id = get_player_id_for_user(request.user_id)
-        unlocked_research = fetch_research_nodes_unlocked(player_id)
+        unlocked_research = fetch_research_nodes_unlocked(request.player_id, get_db())
         return jsonify({"unlocked_research": unlocked_research}), 200
     except Exception as e:
         print("ERROR:", e)
@@ -65,7 +67,7 @@ def unlock_research_node_endpoint() -> tuple[dict, int]:
         if node_id is None:
             return jsonify({"error": "node_id is required"}), 400
         
-        player_id = get_player_id_for_user(request.user_id)
+        player_id = request.player_id
         unlock_research_node(player_id, node_id)
         
         return jsonify({"message": f"Research node {node_id} unlocked for player {player_id}"}), 200
@@ -1,26 +1,51 @@
 from flask import Blueprint, jsonify, request
-from systems.settlements.settlements import get_player_settlements_for_user
+from systems.settlements.settlements import get_player_settlements
 from systems.settlements.garrison import get_settlement_garrison
-from database_operations.user_operations import get_player_id_for_user
 from auth_decorator.auth_decorator import require_auth
+from db.pool import get_db
 
 settlement_bp = Blueprint('settlements', __name__)
 
+# Response bodies and statuses shared by the Flask views, /batch and asgi.py
+
+def my_settlements_payload(player_id: int, conn=None) -> tuple[dict, int]:
+    settlements = get_player_settlements(player_id, conn)
+
+    if not settlements:
+        return {"settlements": []}, 200
+
+    return {
+        "player_id": player_id,
+        "settlements": settlements
+    }, 200
+
+def settlement_garrison_payload(settlement_id: int, player_id: int, conn=None) -> tuple[dict, int]:
+    garrison = get_settlement_garrison(settlement_id, player_id, conn)
+    
+    if garrison is None:
+        return {"error": "Settlement not found or access denied"}, 404
+
+    return {"garrison": garrison}, 200
+
+def garrison_units_payload(player_id: int, conn=None) -> tuple[dict, int]:
+    settlements = get_player_settlements(player_id, conn)
+
+    garrisoned_units = []
+    for settlement in settlements:
+        garrisoned_units.extend(settlement.get('garrisoned_units', []))
+
+    return {
+        "player_id": player_id,
+        "garrisoned_units": garrisoned_units
+    }, 200
+
 @settlement_bp.route('/my_settlements', methods=['GET'])
 @require_auth
 def get_my_settlements() -> tuple[dict, int]:
     """Endpoint to retrieve settlements for the authenticated user."""
     try:
-        player_id = get_player_id_for_user(request.user_id)
-        settlements = get_player_settlements_for_user(request.user_id)
-
-        if not settlements:
-            return jsonify({"settlements": []}), 200
-
-        return jsonify({
-            "player_id": player_id,
-            "settlements": settlements
-        }), 200
+        payload, status = my_settlements_payload(request.player_id, get_db())
+        return jsonify(payload), status
 
     except Exception as e:
         print("ERROR:", e)
@@ -32,12 +57,8 @@ def get_my_settlements() -> tuple[dict, int]:
 @require_auth
 def get_settlement_garrison_route(settlement_id):
     try:
-        garrison = get_settlement_garrison(settlement_id, request.user_id)
-        
-        if garrison is None:
-            return jsonify({"error": "Settlement not found or access denied"}), 404
-
-        return jsonify({"garrison": garrison}), 200
+        payload, status = settlement_garrison_payload(settlement_id, request.player_id, get_db())
+        return jsonify(payload), status
 
     except Exception as e:
         print("ERROR:", e)
@@ -49,17 +70,8 @@ def get_settlement_garrison_route(settlement_id):
 @require_auth
 def get_garrison_units():
     try:
-        player_id = get_player_id_for_user(request.user_id)
-        settlements = get_player_settlements_for_user(request.user_id)
-
-        garrisoned_units = []
-        for settlement in settlements:
-            garrisoned_units.extend(settlement.get('garrisoned_units', []))
-
-        return jsonify({
-            "player_id": player_id,
-            "garrisoned_units": garrisoned_units
-        }), 200
+        payload, status = garrison_units_payload(request.player_id, get_db())
+        return jsonify(payload), status
 
     except Exception as e:
         print("ERROR:", e)
@@ -2,6 +2,10 @@ from flask import Blueprint, jsonify, request
 from database_operations.signup_operations import create_user, user_exists
 from validators.auth_validators import validate_password, validate_username
 from auth_tokens.auth_tokens import create_token
+from auth_tokens.cookies import set_auth_cookies
+from database_operations.session_operations import create_session
+from db.writer import execute_write
+from auth_tokens.passwords import PasswordHasherBusy
 
 sign_up_bp = Blueprint('signup', __name__)
 
@@ -13,8 +17,6 @@ def signup() -> tuple[dict, int]:
     email = data.get('email')
     password = data.get('password')
     
-    print("DEBUG Signup Data:", data)
-    
     # Basic validation
     if not username or not email or not password:
         return jsonify({"error": "Username, email, and password are required"}), 400
@@ -37,8 +39,9 @@ def signup() -> tuple[dict, int]:
     try:
         user = create_user(username, email, password)
         
-        # Create token
-        token = create_token(user["id"])
+        # Start a session and create its access token
+        session = execute_write(create_session, user["id"], user["player_id"])
+        token = create_token(user["id"], user["player_id"], session["session_id"])
         
         # Build response
         response = jsonify({
@@ -50,17 +53,12 @@ def signup() -> tuple[dict, int]:
             }
         })
         
-        # Set auth cookie
-        response.set_cookie(
-            "auth_token",
-            token,
-            httponly=True,
-            samesite="Lax",
-            secure=False,  # True in production
-            max_age=3600 * 24 * 7  # 7 days
-        )
+        # Set auth cookies
+        set_auth_cookies(response, token, session["refresh_token"])
         
         return response, 201
+    except PasswordHasherBusy:
+        return jsonify({"error": "Too many signups, try again shortly"}), 503, {"Retry-After": "1"}
     except Exception as e:
         import traceback
         traceback.print_exc()
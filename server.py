@@ -0,0 +1,144 @@
+"""
+Production entry point: N worker processes serving the app on one shared socket.
+
+The supervisor binds the port, forks the workers and restarts any that die. Every worker
+runs its own writer thread and connection pools, and competes for the leadership lease
+(services.leader); the one holding it also runs the resource tick, modifier expiry and
+maintenance. When it dies the kernel drops its lock and another worker takes over within
+LEADER_RETRY_SECONDS. With --no-background the workers only serve requests and the
+background work is left to `python3 -m services.tick_worker`. Metrics are per worker too;
+/metrics labels every series with the pid of the worker that answered.
+
+    python3 -m server --workers 4 --port 4000
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", str(os.cpu_count() or 1)))
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "4000"))
+# Workers that die sooner than this after starting are restarted after a pause, not at once
+RESTART_BACKOFF_SECONDS = 1.0
+
+def run_worker(listener: socket.socket, background: bool) -> None:
+    """Serve requests on the inherited listening socket until SIGTERM. Runs in the forked child."""
+    from werkzeug.serving import make_server
+    from app import app
+    from db.static_data import get_static_data
+    from db.writer import get_writer
+    from services.background import leader_election
+
+    # Connections and threads are created here, after the fork, never inherited
+    get_static_data()
+    writer = get_writer()
+    writer.start()
+    election = leader_election() if background else None
+    if election:
+        election.start()
+
+    host, port = listener.getsockname()[:2]
+    server = make_server(host, port, app, threaded=True, fd=listener.fileno())
+
+    def shutdown(*_):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, shutdown)
+    logger.info(f"Worker {os.getpid()} serving on {host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if election:
+            election.stop()
+        writer.stop()
+        server.server_close()
+
+class Supervisor:
+    """Forks the worker processes and keeps the requested number alive."""
+
+    def __init__(self, listener: socket.socket, workers: int, background: bool) -> None:
+        self.listener = listener
+        self.workers = max(1, workers)
+        self.background = background
+        self.children = {}  # pid -> started at
+        self.stopping = False
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            # Child: the supervisor forwards Ctrl-C as SIGTERM; never return into the supervisor loop
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            code = 0
+            try:
+                run_worker(self.listener, self.background)
+            except Exception:
+                logger.exception("Worker crashed")
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = time.monotonic()
+
+    def stop(self, *_) -> None:
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for _ in range(self.workers):
+            self.spawn()
+        logger.info(f"Supervisor {os.getpid()} started {self.workers} workers")
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            started = self.children.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            logger.warning(f"Worker {pid} exited with status {status}, restarting")
+            if time.monotonic() - started < RESTART_BACKOFF_SECONDS:
+                time.sleep(RESTART_BACKOFF_SECONDS)
+            self.spawn()
+        logger.info("Supervisor stopped")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS)
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--no-background", action="store_true",
+                        help="only serve requests; run services.tick_worker for the background work")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(process)d %(levelname)s %(name)s: %(message)s")
+
+    listener = socket.create_server((args.host, args.port), backlog=1024)
+    listener.set_inheritable(True)
+    Supervisor(listener, args.workers, background=not args.no_background).run()
+    listener.close()
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
+
+#python3 -m server --workers 4
@@ -0,0 +1,38 @@
+import logging
+import os
+from dotenv import load_dotenv
+from systems.resources.accrual import lazy_accrual_enabled
+from systems.resources.resource_tick_service import get_tick_service
+from systems.resources.modifier_expiry import get_expiry_service
+from db.maintenance import get_maintenance_service
+from services.leader import LeaderElection
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+TICK_INTERVAL_SECONDS = int(os.getenv("TICK_INTERVAL_SECONDS", "60"))
+
+def start_background_services(tick_interval_seconds: int = TICK_INTERVAL_SECONDS) -> None:
+    """
+    Start the work that must run in exactly one process: the resource tick (unless
+    accrual is lazy), modifier expiry and database maintenance.
+    """
+    if lazy_accrual_enabled():
+        logger.info("Lazy resource accrual enabled, resource tick service not started")
+    else:
+        get_tick_service().start(interval_seconds=tick_interval_seconds)
+    get_expiry_service().start()
+    get_maintenance_service().start()
+
+def stop_background_services() -> None:
+    get_maintenance_service().stop()
+    get_expiry_service().stop()
+    get_tick_service().stop()
+
+def leader_election(tick_interval_seconds: int = TICK_INTERVAL_SECONDS) -> LeaderElection:
+    """A LeaderElection that runs the background services while this process is leader."""
+    return LeaderElection(
+        on_elected=lambda: start_background_services(tick_interval_seconds),
+        on_resign=stop_background_services
+    )
@@ -0,0 +1,129 @@
+import fcntl
+import logging
+import os
+import threading
+from pathlib import Path
+from dotenv import load_dotenv
+from db.connection import DB_PATH
+from metrics.registry import get_registry
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Lock file next to the database; whichever process holds the flock on it is the leader
+LEADER_LOCK_PATH = Path(os.getenv("LEADER_LOCK_PATH", str(DB_PATH.with_name(DB_PATH.name + ".leader.lock"))))
+# How often a standby process tries to take over leadership
+LEADER_RETRY_SECONDS = float(os.getenv("LEADER_RETRY_SECONDS", "5"))
+
+_metrics = get_registry()
+IS_LEADER = _metrics.gauge("leader_is_leader", "1 while this process holds the background-work leadership lease")
+ELECTIONS = _metrics.counter("leader_elections_total", "Times this process became the leader")
+
+class LeaderLease:
+    """
+    Exclusive flock on a lock file, held until released or the process exits.
+
+    The kernel drops the lock when the holding process dies however it dies, so a
+    standby's next try_acquire takes over without any expiry bookkeeping.
+    """
+
+    def __init__(self, path: Path = LEADER_LOCK_PATH) -> None:
+        self.path = Path(path)
+        self._fd = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        """Take the lease if no other process holds it. Never blocks."""
+        if self._fd is not None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        # The holder's pid, for operators; the lock itself is what counts
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+class LeaderElection:
+    """
+    Keeps trying to take the LeaderLease and runs on_elected once it has it.
+
+    on_elected starts the process's singleton background work (see services.background);
+    on_resign stops it when the election is stopped, before the lease is released.
+    """
+
+    def __init__(self, on_elected, on_resign, lease: LeaderLease | None = None,
+                 retry_seconds: float = LEADER_RETRY_SECONDS) -> None:
+        self.running = False
+        self.thread = None
+        self.lease = lease or LeaderLease()
+        self.retry_seconds = retry_seconds
+        self._on_elected = on_elected
+        self._on_resign = on_resign
+        self._stop_event = threading.Event()
+        logger.info("LeaderElection initialized")
+
+    @property
+    def is_leader(self) -> bool:
+        return self.lease.held
+
+    def _run_loop(self) -> None:
+        """Try for the lease every retry_seconds until it is won or the election stops"""
+        while not self.lease.held:
+            if self.lease.try_acquire():
+                IS_LEADER.set(1)
+                ELECTIONS.inc()
+                logger.info(f"Process {os.getpid()} elected leader ({self.lease.path})")
+                try:
+                    self._on_elected()
+                except Exception as e:
+                    # Let another process lead rather than hold the lease with nothing running
+                    logger.error(f"Error starting leader work, resigning: {e}", exc_info=True)
+                    self._resign()
+            if self._stop_event.wait(self.retry_seconds):
+                return
+
+    def _resign(self) -> None:
+        if not self.lease.held:
+            return
+        try:
+            self._on_resign()
+        finally:
+            self.lease.release()
+            IS_LEADER.set(0)
+
+    def start(self) -> None:
+        """Start competing for leadership"""
+        if self.running:
+            return
+
+        self.running = True
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._run_loop, daemon=True)
+        self.thread.start()
+        logger.info(f"Leader election started (retry every {self.retry_seconds}s)")
+
+    def stop(self) -> None:
+        """Stop competing, and if leader stop the background work and release the lease"""
+        self.running = False
+        self._stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+        self._resign()
+        logger.info("LeaderElection stopped")
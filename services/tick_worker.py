@@ -0,0 +1,38 @@
+import argparse
+import logging
+import signal
+import threading
+from db.static_data import get_static_data
+from services.background import TICK_INTERVAL_SECONDS, leader_election
+
+logger = logging.getLogger(__name__)
+
+def run_tick_worker(tick_interval_seconds: int = TICK_INTERVAL_SECONDS) -> None:
+    """
+    Run the background services without serving requests, until SIGTERM or SIGINT.
+
+    Competes for the same leadership lease as the web workers, so any number of these
+    and of `python3 -m server` processes can run side by side with one tick between them.
+    Start the web workers with --no-background to leave the work to these.
+    """
+    stopped = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stopped.set())
+
+    get_static_data()
+    election = leader_election(tick_interval_seconds)
+    election.start()
+    try:
+        stopped.wait()
+    finally:
+        election.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Background worker: resource tick, modifier expiry, maintenance")
+    parser.add_argument("--interval", type=int, default=TICK_INTERVAL_SECONDS, help="seconds per full tick")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    run_tick_worker(args.interval)
+
+#python3 -m services.tick_worker
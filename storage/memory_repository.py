@@ -0,0 +1,247 @@
+from datetime import datetime
+from db.static_data import StaticData, load_static_data
+from storage.repository import GameRepository
+from storage.sqlite_repository import SETTLEMENT_COLUMNS
+from systems.experience.experience import level_for_xp
+from systems.resources.resource_tick import RESOURCES, compute_resource_tick, compute_storage_full_at
+from systems.resources.resource_totals import TOTAL_RESOURCES
+from systems.resources.production_rates import _compile_research_multipliers, compute_effective_rates
+
+SETTLEMENT_DEFAULTS = {
+    "food": 0.0, "wood": 0.0, "stone": 0.0, "silver": 0.0, "gold": 0.0,
+    "base_food_rate": 60.0, "base_wood_rate": 36.0, "base_stone_rate": 24.0, "base_silver_rate": 12.0,
+    "current_food_rate": 60.0, "current_wood_rate": 36.0, "current_stone_rate": 24.0, "current_silver_rate": 12.0,
+    "food_capacity": 10000, "wood_capacity": 10000, "stone_capacity": 10000,
+    "silver_capacity": 5000, "gold_capacity": 1000,
+    "storage_full_at": None,
+}
+
+class InMemoryRepository(GameRepository):
+    """
+    GameRepository backed by dicts, with the same results as SQLiteRepository.
+
+    For benchmarking and load-testing the game systems without disk I/O. Writes apply
+    immediately; there are no transactions to roll back.
+    """
+
+    def __init__(self, static_data: StaticData) -> None:
+        self.static_data = static_data
+        self.players = {}
+        self.settlements = {}
+        self.player_units = {}       # player_id -> {unit_type: quantity}
+        self.garrisons = {}          # settlement_id -> {unit_type: quantity}
+        self.player_research = {}    # player_id -> {node_id: unlocked_at}
+        self.actions = {}
+        self.settlement_modifiers = {}  # settlement_id -> [modifier]
+        self._user_players = {}
+        self._player_settlements = {}
+        self._ids = {"players": 0, "settlements": 0, "actions": 0}
+
+    def _next_id(self, table: str) -> int:
+        self._ids[table] += 1
+        return self._ids[table]
+
+    @classmethod
+    def from_sqlite(cls, conn) -> "InMemoryRepository":
+        """An empty repository using the static game data (unit types, research) of a seeded database."""
+        return cls(load_static_data(conn))
+
+    # Players
+    def add_player(self, username: str, user_id: int | None = None, is_npc: bool = False,
+                   level: int = 1, experience: int = 0) -> int:
+        player_id = self._next_id("players")
+        self.players[player_id] = {
+            "id": player_id, "user_id": user_id, "username": username,
+            "is_npc": int(is_npc), "level": level, "experience": experience
+        }
+        if user_id is not None:
+            self._user_players[user_id] = player_id
+        self._player_settlements[player_id] = []
+        return player_id
+
+    def get_player(self, player_id: int) -> dict | None:
+        player = self.players.get(player_id)
+        return dict(player) if player else None
+
+    def get_player_id_for_user(self, user_id: int) -> int | None:
+        return self._user_players.get(user_id)
+
+    def credit_experience(self, xp_by_player: list[tuple[int, int]]) -> int:
+        level_ups = 0
+        for player_id, xp in xp_by_player:
+            player = self.players[player_id]
+            player["experience"] += xp
+            new_level = max(player["level"], level_for_xp(player["experience"]))
+            if new_level > player["level"]:
+                player["level"] = new_level
+                level_ups += 1
+        return level_ups
+
+    # Settlements
+    def add_settlement(self, player_id: int, name: str, x: int = 0, y: int = 0,
+                       settlement_type_id: int = 1, **columns) -> int:
+        unknown = set(columns) - SETTLEMENT_COLUMNS
+        if unknown:
+            raise ValueError(f"Unknown settlement columns: {sorted(unknown)}")
+
+        settlement_id = self._next_id("settlements")
+        settlement = dict(SETTLEMENT_DEFAULTS)
+        settlement.update({
+            "id": settlement_id, "player_id": player_id, "name": name, "x": x, "y": y,
+            "settlement_type_id": settlement_type_id,
+            "last_resource_tick": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+        })
+        settlement.update(columns)
+        self.settlements[settlement_id] = settlement
+        self._player_settlements[player_id].append(settlement_id)
+        return settlement_id
+
+    def get_settlement(self, settlement_id: int) -> dict | None:
+        settlement = self.settlements.get(settlement_id)
+        return dict(settlement) if settlement else None
+
+    def get_player_settlements(self, player_id: int) -> list[dict]:
+        return [dict(self.settlements[settlement_id]) for settlement_id in self._player_settlements.get(player_id, [])]
+
+    def _is_full(self, settlement: dict) -> bool:
+        full_at = settlement["storage_full_at"]
+        return (
+            full_at is not None and settlement["last_resource_tick"] is not None
+            and datetime.fromisoformat(full_at) <= datetime.fromisoformat(settlement["last_resource_tick"])
+        )
+
+    def _tick(self, settlement_ids, now: datetime, skip_full: bool) -> dict:
+        xp_by_player = {}
+        ticked = 0
+        for settlement_id in settlement_ids:
+            settlement = self.settlements[settlement_id]
+            if skip_full and self._is_full(settlement):
+                continue
+            tick = compute_resource_tick(settlement, now)
+            if tick is None:
+                continue
+
+            *amounts, xp = tick
+            settlement["storage_full_at"] = compute_storage_full_at(settlement, amounts, now)
+            for resource, amount in zip(RESOURCES, amounts):
+                settlement[resource] = amount
+            settlement["last_resource_tick"] = now.isoformat()
+            ticked += 1
+            if xp > 0:
+                xp_by_player[settlement["player_id"]] = xp_by_player.get(settlement["player_id"], 0) + xp
+
+        credits = list(xp_by_player.items())
+        return {
+            "settlements": ticked,
+            "players": len(credits),
+            "xp_credited": sum(xp_by_player.values()),
+            "level_ups": self.credit_experience(credits)
+        }
+
+    def tick_settlements(self, now: datetime, player_id: int | None = None) -> dict:
+        if player_id is not None:
+            return self._tick(self._player_settlements.get(player_id, []), now, skip_full=False)
+
+        settlement_ids = [
+            settlement_id for settlement_id, settlement in self.settlements.items()
+            if not self.players[settlement["player_id"]]["is_npc"]
+        ]
+        return self._tick(settlement_ids, now, skip_full=True)
+
+    def spend_resources(self, player_id: int, cost_per_settlement: dict) -> None:
+        for settlement_id in self._player_settlements.get(player_id, []):
+            settlement = self.settlements[settlement_id]
+            for resource, amount in cost_per_settlement.items():
+                settlement[resource] -= amount
+            settlement["storage_full_at"] = None
+
+    def get_resource_totals(self, player_id: int) -> dict:
+        settlements = [self.settlements[settlement_id] for settlement_id in self._player_settlements.get(player_id, [])]
+        totals = {resource: sum(settlement[resource] for settlement in settlements) for resource in TOTAL_RESOURCES}
+        return {**totals, "settlement_count": len(settlements)}
+
+    def recompute_player_rates(self, player_id: int, now: datetime) -> int:
+        settlement_ids = self._player_settlements.get(player_id, [])
+        if not settlement_ids:
+            return 0
+        self._tick(settlement_ids, now, skip_full=False)
+
+        effects = self.static_data.effects_for(self.player_research.get(player_id, {}), "production_bonus")
+        multipliers = _compile_research_multipliers(effects)
+
+        for settlement_id in settlement_ids:
+            settlement = self.settlements[settlement_id]
+            modifiers = [
+                modifier for modifier in self.settlement_modifiers.get(settlement_id, [])
+                if modifier["expires_at"] is None or datetime.fromisoformat(modifier["expires_at"]) > now
+            ]
+            base_rates = {resource: settlement[f"base_{resource}_rate"] for resource in RESOURCES}
+            rates = compute_effective_rates(base_rates, multipliers, modifiers)
+            for resource in RESOURCES:
+                settlement[f"current_{resource}_rate"] = rates[resource]
+            settlement["storage_full_at"] = None
+        return len(settlement_ids)
+
+    # Army and garrisons
+    def set_player_units(self, player_id: int, unit_type: str, quantity: int) -> None:
+        self.player_units.setdefault(player_id, {})[unit_type] = quantity
+
+    def set_garrison(self, settlement_id: int, unit_type: str, quantity: int) -> None:
+        self.garrisons.setdefault(settlement_id, {})[unit_type] = quantity
+
+    def get_army_rows(self, player_id: int) -> list[dict]:
+        settlement_ids = self._player_settlements.get(player_id, [])
+        rows = []
+        for unit_type, total in sorted(self.player_units.get(player_id, {}).items()):
+            garrisoned = sum(self.garrisons.get(settlement_id, {}).get(unit_type, 0) for settlement_id in settlement_ids)
+            stats = self.static_data.unit_types.get(unit_type)
+            rows.append({
+                "unit_type": unit_type,
+                "total": total,
+                "garrisoned": garrisoned,
+                "available": total - garrisoned,
+                **{key: getattr(stats, key, None) for key in ("attack", "defense", "health", "cost_wood", "cost_silver")}
+            })
+        return rows
+
+    # Research
+    def get_research_node(self, node_id: int) -> dict | None:
+        node = self.static_data.research_nodes_by_id.get(node_id)
+        return node.to_dict() if node else None
+
+    def has_research(self, player_id: int, node_id: int) -> bool:
+        return node_id in self.player_research.get(player_id, {})
+
+    def get_unlocked_research(self, player_id: int) -> list[int]:
+        return list(self.player_research.get(player_id, {}))
+
+    def add_research(self, player_id: int, node_id: int, unlocked_at: datetime) -> None:
+        unlocked = self.player_research.setdefault(player_id, {})
+        if node_id in unlocked:
+            raise ValueError(f"Player {player_id} already has research node {node_id}")
+        unlocked[node_id] = unlocked_at.strftime("%Y-%m-%d %H:%M:%S")
+
+    def node_has_production_effects(self, node_id: int) -> bool:
+        return node_id in self.static_data.production_nodes
+
+    # Action queue
+    def enqueue_action(self, player_id: int, settlement_id: int, action_type: str, payload: str,
+                       start_time: datetime, end_time: datetime) -> int:
+        action_id = self._next_id("actions")
+        self.actions[action_id] = {
+            "id": action_id, "player_id": player_id, "settlement_id": settlement_id,
+            "target_settlement_id": None, "action_type": action_type, "payload": payload,
+            "start_time": start_time.isoformat(), "end_time": end_time.isoformat(), "status": "pending"
+        }
+        return action_id
+
+    def due_actions(self, now: datetime) -> list[dict]:
+        cutoff = now.isoformat()
+        due = [
+            dict(action) for action in self.actions.values()
+            if action["status"] == "pending" and action["end_time"] <= cutoff
+        ]
+        return sorted(due, key=lambda action: action["end_time"])
+
+    def complete_action(self, action_id: int) -> None:
+        self.actions[action_id]["status"] = "completed"
@@ -0,0 +1,130 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+class GameRepository(ABC):
+    """
+    Storage interface for the game systems: players, settlements, garrisons, research
+    and the action queue.
+
+    Methods write without committing; the caller owns the transaction (for SQLite,
+    a unit of work run through db.writer.execute_write). Rows are returned as dicts
+    with the same keys as the SQLite columns.
+    """
+
+    # --------------------
+    # PLAYERS
+    # --------------------
+    @abstractmethod
+    def add_player(self, username: str, user_id: int | None = None, is_npc: bool = False,
+                   level: int = 1, experience: int = 0) -> int:
+        """Create a player and return its id."""
+
+    @abstractmethod
+    def get_player(self, player_id: int) -> dict | None:
+        """id, user_id, username, is_npc, level and experience of a player."""
+
+    @abstractmethod
+    def get_player_id_for_user(self, user_id: int) -> int | None:
+        """The player belonging to a user."""
+
+    @abstractmethod
+    def credit_experience(self, xp_by_player: list[tuple[int, int]]) -> int:
+        """Add experience per player, level them up and return how many levelled up."""
+
+    # --------------------
+    # SETTLEMENTS
+    # --------------------
+    @abstractmethod
+    def add_settlement(self, player_id: int, name: str, x: int = 0, y: int = 0,
+                       settlement_type_id: int = 1, **columns) -> int:
+        """Create a settlement. columns override the resource, rate and capacity defaults."""
+
+    @abstractmethod
+    def get_settlement(self, settlement_id: int) -> dict | None:
+        """A settlement row."""
+
+    @abstractmethod
+    def get_player_settlements(self, player_id: int) -> list[dict]:
+        """A player's settlements in id order."""
+
+    @abstractmethod
+    def tick_settlements(self, now: datetime, player_id: int | None = None) -> dict:
+        """
+        Advance resources to now and credit the XP gained.
+
+        Without player_id this is the background tick over every player settlement, which
+        skips settlements with full storage. With player_id it settles that player before
+        a spend, full settlements included.
+
+        Returns:
+            dict: settlements ticked, players credited, total XP credited and level ups.
+        """
+
+    @abstractmethod
+    def spend_resources(self, player_id: int, cost_per_settlement: dict) -> None:
+        """Deduct {resource: amount} from each of a player's settlements."""
+
+    @abstractmethod
+    def get_resource_totals(self, player_id: int) -> dict:
+        """food, wood, stone, silver and gold summed over a player's settlements, and settlement_count."""
+
+    @abstractmethod
+    def recompute_player_rates(self, player_id: int, now: datetime) -> int:
+        """Recompile current rates from base rates, research and modifiers. Returns settlements updated."""
+
+    # --------------------
+    # ARMY AND GARRISONS
+    # --------------------
+    @abstractmethod
+    def set_player_units(self, player_id: int, unit_type: str, quantity: int) -> None:
+        """Set the size of a player's total army for one unit type."""
+
+    @abstractmethod
+    def set_garrison(self, settlement_id: int, unit_type: str, quantity: int) -> None:
+        """Set how many units of a type are garrisoned in a settlement."""
+
+    @abstractmethod
+    def get_army_rows(self, player_id: int) -> list[dict]:
+        """
+        Per unit type: unit_type, total, garrisoned, available, attack, defense, health,
+        cost_wood and cost_silver, in unit_type order.
+        """
+
+    # --------------------
+    # RESEARCH
+    # --------------------
+    @abstractmethod
+    def get_research_node(self, node_id: int) -> dict | None:
+        """A research node with its required level and costs."""
+
+    @abstractmethod
+    def has_research(self, player_id: int, node_id: int) -> bool:
+        """Whether the player has unlocked the node."""
+
+    @abstractmethod
+    def get_unlocked_research(self, player_id: int) -> list[int]:
+        """Node ids the player has unlocked."""
+
+    @abstractmethod
+    def add_research(self, player_id: int, node_id: int, unlocked_at: datetime) -> None:
+        """Record an unlocked node."""
+
+    @abstractmethod
+    def node_has_production_effects(self, node_id: int) -> bool:
+        """Whether unlocking the node can change production rates."""
+
+    # --------------------
+    # ACTION QUEUE
+    # --------------------
+    @abstractmethod
+    def enqueue_action(self, player_id: int, settlement_id: int, action_type: str, payload: str,
+                       start_time: datetime, end_time: datetime) -> int:
+        """Queue a pending action and return its id."""
+
+    @abstractmethod
+    def due_actions(self, now: datetime) -> list[dict]:
+        """Pending actions with end_time <= now, earliest first."""
+
+    @abstractmethod
+    def complete_action(self, action_id: int) -> None:
+        """Mark an action completed."""
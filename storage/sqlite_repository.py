@@ -0,0 +1,189 @@
+from datetime import datetime
+from db.static_data import get_static_data
+from storage.repository import GameRepository
+from systems.experience.experience import apply_experience_batch
+from systems.resources.accrual import settle_player_resources
+from systems.resources.resource_tick import apply_bulk_resource_tick
+from systems.resources.resource_totals import TOTAL_RESOURCES, add_to_player_totals, get_player_resource_totals
+from systems.resources import production_rates
+
+SETTLEMENT_COLUMNS = {
+    "food", "wood", "stone", "silver", "gold", "last_resource_tick",
+    "base_food_rate", "base_wood_rate", "base_stone_rate", "base_silver_rate",
+    "current_food_rate", "current_wood_rate", "current_stone_rate", "current_silver_rate",
+    "food_capacity", "wood_capacity", "stone_capacity", "silver_capacity", "gold_capacity",
+}
+
+TICK_RESULT_KEYS = ("settlements", "players", "xp_credited", "level_ups")
+
+class SQLiteRepository(GameRepository):
+    """GameRepository over a cursor on the game database. Never commits."""
+
+    def __init__(self, cursor) -> None:
+        self.cursor = cursor
+
+    def _one(self, sql: str, params: tuple = ()) -> dict | None:
+        self.cursor.execute(sql, params)
+        row = self.cursor.fetchone()
+        return dict(row) if row is not None else None
+
+    def _all(self, sql: str, params: tuple = ()) -> list[dict]:
+        self.cursor.execute(sql, params)
+        return [dict(row) for row in self.cursor.fetchall()]
+
+    # Players
+    def add_player(self, username: str, user_id: int | None = None, is_npc: bool = False,
+                   level: int = 1, experience: int = 0) -> int:
+        self.cursor.execute("""
+            INSERT INTO players (user_id, username, is_npc, level, experience)
+            VALUES (?, ?, ?, ?, ?)
+        """, (user_id, username, int(is_npc), level, experience))
+        return self.cursor.lastrowid
+
+    def get_player(self, player_id: int) -> dict | None:
+        return self._one("""
+            SELECT id, user_id, username, is_npc, level, experience
+            FROM players WHERE id = ?
+        """, (player_id,))
+
+    def get_player_id_for_user(self, user_id: int) -> int | None:
+        row = self._one("SELECT id FROM players WHERE user_id = ?", (user_id,))
+        return row["id"] if row else None
+
+    def credit_experience(self, xp_by_player: list[tuple[int, int]]) -> int:
+        return apply_experience_batch(self.cursor, xp_by_player)
+
+    # Settlements
+    def add_settlement(self, player_id: int, name: str, x: int = 0, y: int = 0,
+                       settlement_type_id: int = 1, **columns) -> int:
+        unknown = set(columns) - SETTLEMENT_COLUMNS
+        if unknown:
+            raise ValueError(f"Unknown settlement columns: {sorted(unknown)}")
+
+        names = ["player_id", "name", "x", "y", "settlement_type_id", *columns]
+        self.cursor.execute(f"""
+            INSERT INTO settlements ({", ".join(names)})
+            VALUES ({", ".join("?" * len(names))})
+        """, (player_id, name, x, y, settlement_type_id, *columns.values()))
+        return self.cursor.lastrowid
+
+    def get_settlement(self, settlement_id: int) -> dict | None:
+        return self._one("SELECT * FROM settlements WHERE id = ?", (settlement_id,))
+
+    def get_player_settlements(self, player_id: int) -> list[dict]:
+        return self._all("SELECT * FROM settlements WHERE player_id = ? ORDER BY id", (player_id,))
+
+    def tick_settlements(self, now: datetime, player_id: int | None = None) -> dict:
+        if player_id is None:
+            result = apply_bulk_resource_tick(self.cursor, now=now, where="p.is_npc = 0")
+        else:
+            result = settle_player_resources(self.cursor, player_id, now)
+        return {key: result[key] for key in TICK_RESULT_KEYS}
+
+    def spend_resources(self, player_id: int, cost_per_settlement: dict) -> None:
+        self.cursor.execute("""
+            UPDATE settlements
+            SET food = food - ?, wood = wood - ?, stone = stone - ?,
+                silver = silver - ?, gold = gold - ?, storage_full_at = NULL
+            WHERE player_id = ?
+        """, (*(cost_per_settlement.get(resource, 0) for resource in TOTAL_RESOURCES), player_id))
+        settlements = self.cursor.rowcount
+        add_to_player_totals(self.cursor, player_id, {
+            resource: -amount * settlements for resource, amount in cost_per_settlement.items()
+        })
+
+    def get_resource_totals(self, player_id: int) -> dict:
+        totals = get_player_resource_totals(self.cursor, player_id)
+        return totals or {**dict.fromkeys(TOTAL_RESOURCES, 0), "settlement_count": 0}
+
+    def recompute_player_rates(self, player_id: int, now: datetime) -> int:
+        production_rates.invalidate_player_effects(player_id)
+        return production_rates.recompute_player_rates(self.cursor, player_id, now)
+
+    # Army and garrisons
+    def set_player_units(self, player_id: int, unit_type: str, quantity: int) -> None:
+        self.cursor.execute("""
+            INSERT INTO player_units (player_id, unit_type, quantity) VALUES (?, ?, ?)
+            ON CONFLICT (player_id, unit_type) DO UPDATE SET quantity = excluded.quantity
+        """, (player_id, unit_type, quantity))
+
+    def set_garrison(self, settlement_id: int, unit_type: str, quantity: int) -> None:
+        self.cursor.execute("""
+            INSERT INTO settlement_garrisons (settlement_id, unit_type, quantity) VALUES (?, ?, ?)
+            ON CONFLICT (settlement_id, unit_type) DO UPDATE SET quantity = excluded.quantity
+        """, (settlement_id, unit_type, quantity))
+
+    def get_army_rows(self, player_id: int) -> list[dict]:
+        rows = self._all("""
+            SELECT
+                pu.unit_type,
+                pu.quantity as total,
+                COALESCE(SUM(sg.quantity), 0) as garrisoned,
+                (pu.quantity - COALESCE(SUM(sg.quantity), 0)) as available
+            FROM player_units pu
+            LEFT JOIN settlements s ON s.player_id = ?
+            LEFT JOIN settlement_garrisons sg ON sg.settlement_id = s.id
+                AND sg.unit_type = pu.unit_type
+            WHERE pu.player_id = ?
+            GROUP BY pu.unit_type, pu.quantity
+            ORDER BY pu.unit_type
+        """, (player_id, player_id))
+
+        unit_types = get_static_data(self.cursor.connection).unit_types
+        for row in rows:
+            stats = unit_types.get(row["unit_type"])
+            row.update({key: getattr(stats, key, None) for key in ("attack", "defense", "health", "cost_wood", "cost_silver")})
+        return rows
+
+    # Research
+    def get_research_node(self, node_id: int) -> dict | None:
+        node = get_static_data(self.cursor.connection).research_nodes_by_id.get(node_id)
+        return node.to_dict() if node else None
+
+    def has_research(self, player_id: int, node_id: int) -> bool:
+        return self._one("""
+            SELECT unlocked_at FROM player_research
+            WHERE player_id = ? AND node_id = ?
+        """, (player_id, node_id)) is not None
+
+    def get_unlocked_research(self, player_id: int) -> list[int]:
+        rows = self._all("""
+            SELECT node_id FROM player_research
+            WHERE player_id = ? AND unlocked_at IS NOT NULL
+        """, (player_id,))
+        return [row["node_id"] for row in rows]
+
+    def add_research(self, player_id: int, node_id: int, unlocked_at: datetime) -> None:
+        self.cursor.execute("""
+            INSERT INTO player_research (player_id, node_id, unlocked_at)
+            VALUES (?, ?, ?)
+        """, (player_id, node_id, unlocked_at.strftime("%Y-%m-%d %H:%M:%S")))
+
+    def node_has_production_effects(self, node_id: int) -> bool:
+        return production_rates.node_has_production_effects(self.cursor, node_id)
+
+    # Action queue
+    def enqueue_action(self, player_id: int, settlement_id: int, action_type: str, payload: str,
+                       start_time: datetime, end_time: datetime) -> int:
+        self.cursor.execute("""
+            INSERT INTO action_queue (
+                player_id, settlement_id, action_type,
+                payload, start_time, end_time
+            ) VALUES (?, ?, ?, ?, ?, ?)
+        """, (player_id, settlement_id, action_type, payload, start_time.isoformat(), end_time.isoformat()))
+        return self.cursor.lastrowid
+
+    def due_actions(self, now: datetime) -> list[dict]:
+        return self._all("""
+            SELECT * FROM action_queue
+            WHERE status = 'pending'
+              AND end_time <= ?
+            ORDER BY end_time ASC
+        """, (now.isoformat(),))
+
+    def complete_action(self, action_id: int) -> None:
+        self.cursor.execute("""
+            UPDATE action_queue
+            SET status = 'completed'
+            WHERE id = ?
+        """, (action_id,))
@@ -1,37 +1,24 @@
 from db.connection import connect_db
-from database_operations.user_operations import get_player_id_for_user
+from storage.repository import GameRepository
+from storage.sqlite_repository import SQLiteRepository
 
-def get_player_armies_for_user(user_id: int) -> dict:
-    """Retrieve detailed army information for a user, including standing and total armies."""
-    player_id = get_player_id_for_user(user_id)
-    
-    conn = connect_db()
-    cursor = conn.cursor()
-    
-    # Get player's army summary
-    cursor.execute("""
-        SELECT 
-            pu.unit_type,
-            pu.quantity as total,
-            COALESCE(SUM(sg.quantity), 0) as garrisoned,
-            (pu.quantity - COALESCE(SUM(sg.quantity), 0)) as available,
-            ut.attack,
-            ut.defense,
-            ut.health,
-            ut.cost_wood,
-            ut.cost_silver
-        FROM player_units pu
-        LEFT JOIN settlements s ON s.player_id = ?
-        LEFT JOIN settlement_garrisons sg ON sg.settlement_id = s.id 
-            AND sg.unit_type = pu.unit_type
-        LEFT JOIN unit_types ut ON ut.unit_type = pu.unit_type
-        WHERE pu.player_id = ?
-        GROUP BY pu.unit_type, pu.quantity
-    """, (player_id, player_id))
-    
-    rows = cursor.fetchall()
-    conn.close()
-    
+def get_player_armies(player_id: int, conn=None) -> dict:
+    """Retrieve detailed army information for a player, including standing and total armies."""
+    owns_conn = conn is None
+    if owns_conn:
+        conn = connect_db()
+    try:
+        return get_player_army(SQLiteRepository(conn.cursor()), player_id)
+    finally:
+        if owns_conn:
+            conn.close()
+
+def get_player_army(repo: GameRepository, player_id: int) -> dict:
+    """Standing and total army of a player, from any GameRepository."""
+    return {"player_id": player_id, **summarize_army(repo.get_army_rows(player_id))}
+
+def summarize_army(rows: list[dict]) -> dict:
+    """Aggregate per-unit-type army rows into standing (ungarrisoned) and total army stats."""
     # Calculate standing army totals
     standing_army = {
         "total_units": 0,
@@ -50,7 +37,7 @@ def get_player_armies_for_user(user_id: int) -> dict:
     }
     
     for row in rows:
-        unit_data = dict(row)
+        unit_data = row
         available = unit_data['available']
         total = unit_data['total']
         
@@ -82,7 +69,6 @@ def get_player_armies_for_user(user_id: int) -> dict:
         })
     
     return {
-        "player_id": player_id,
         "standing_army": standing_army,
         "total_army": total_army
     }
\ No newline at end of file
@@ -1,33 +1,129 @@
+from bisect import bisect_right
+from itertools import count
+
+SQLITE_MAX_INTEGER = 2**63 - 1
+
+def calculate_xp_for_level(level: int) -> int:
+    """Calculate XP needed to reach a level."""
+    return int(100 * pow(1.60, level - 1))
+
+# Highest level whose XP threshold fits in players.experience (a SQLite INTEGER, int64)
+MAX_LEVEL = next(level for level in count(1) if calculate_xp_for_level(level + 1) > SQLITE_MAX_INTEGER)
+
+# XP_THRESHOLDS[level - 1] is the total XP at which a player reaches `level`.
+# Level 1 is where every player starts, whatever their XP.
+XP_THRESHOLDS = tuple(
+    0 if level == 1 else calculate_xp_for_level(level)
+    for level in range(1, MAX_LEVEL + 1)
+)
+
+def xp_for_level(level: int) -> int:
+    """Total XP at which a player reaches a level, served from the precomputed table."""
+    if 1 <= level <= MAX_LEVEL:
+        return XP_THRESHOLDS[level - 1]
+    return calculate_xp_for_level(level)
+
+def level_for_xp(experience: int) -> int:
+    """Highest level reached with the given total XP."""
+    return max(1, bisect_right(XP_THRESHOLDS, experience))
+
+def experience_progress(level: int, experience: int) -> dict:
+    """Progress numbers towards the next level for display."""
+    current_level_xp = xp_for_level(level)
+    next_level_xp = xp_for_level(level + 1)
+
+    return {
+        "level": level,
+        "experience": experience,
+        "xp_for_next_level": next_level_xp - current_level_xp,
+        "xp_progress": experience - current_level_xp
+    }
+
 def check_level_up(player_id: int, cursor) -> None:
     """Check and apply level ups."""
     cursor.execute("SELECT experience, level FROM players WHERE id = ?", (player_id,))
     data = cursor.fetchone()
-    
+
     if not data:
         return
-    
-    xp_needed = calculate_xp_for_level(data['level'] + 1)
-    
-    if data['experience'] >= xp_needed:
-        new_level = data['level'] + 1
+
+    new_level = level_for_xp(data['experience'])
+
+    if new_level > data['level']:
         cursor.execute("""
             UPDATE players
             SET level = ?
             WHERE id = ?
         """, (new_level, player_id))
-        
-        # Recursively check for further level ups
-        check_level_up(player_id, cursor)
 
-def calculate_xp_for_level(level: int) -> int:
-    """Calculate XP needed to reach a level."""
-    return int(100 * pow(1.60, level - 1))
+def _ensure_level_table(cursor) -> None:
+    """Load XP_THRESHOLDS into a per-connection temp table for set-based level lookups."""
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS xp_level_thresholds (
+            level INTEGER PRIMARY KEY,
+            xp INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS temp.idx_xp_level_thresholds_xp ON xp_level_thresholds(xp)
+    """)
+    cursor.executemany(
+        "INSERT OR IGNORE INTO temp.xp_level_thresholds (level, xp) VALUES (?, ?)",
+        enumerate(XP_THRESHOLDS, start=1)
+    )
+
+def apply_experience_batch(cursor, deltas: list[tuple[int, int]]) -> int:
+    """
+    Credit XP to many players and apply any level ups in one UPDATE.
+
+    Args:
+        cursor: Cursor on an open transaction. The caller commits.
+        deltas: (player_id, xp_delta) pairs. A player may appear more than once.
+
+    Returns:
+        int: Number of players who gained at least one level.
+    """
+    if not deltas:
+        return 0
+
+    _ensure_level_table(cursor)
+    cursor.execute("DROP TABLE IF EXISTS temp.xp_batch")
+    cursor.execute("CREATE TEMP TABLE xp_batch (player_id INTEGER NOT NULL, xp INTEGER NOT NULL)")
+    cursor.executemany("INSERT INTO temp.xp_batch (player_id, xp) VALUES (?, ?)", deltas)
+
+    new_level_sql = """
+        (SELECT t.level FROM temp.xp_level_thresholds t
+         WHERE t.xp <= {experience} + b.xp
+         ORDER BY t.xp DESC LIMIT 1)
+    """
+    batch_sql = "(SELECT player_id, SUM(xp) AS xp FROM temp.xp_batch GROUP BY player_id)"
+
+    cursor.execute(f"""
+        SELECT COUNT(*)
+        FROM players p
+        JOIN {batch_sql} b ON b.player_id = p.id
+        WHERE {new_level_sql.format(experience="p.experience")} > p.level
+    """)
+    level_ups = cursor.fetchone()[0]
+
+    cursor.execute(f"""
+        UPDATE players
+        SET experience = experience + b.xp,
+            level = MAX(players.level, COALESCE({new_level_sql.format(experience="players.experience")}, 1))
+        FROM {batch_sql} AS b
+        WHERE players.id = b.player_id
+    """)
+
+    cursor.execute("DROP TABLE temp.xp_batch")
+    return level_ups
 
-def get_player_experience(player_id: int) -> dict:
+def get_player_experience(player_id: int, conn=None) -> dict:
     """Get player's current level and experience."""
     from db.connection import connect_db
     
-    conn = connect_db()
+    owns_conn = conn is None
+    if owns_conn:
+        conn = connect_db()
     cursor = conn.cursor()
     
     try:
@@ -47,4 +143,5 @@ def get_player_experience(player_id: int) -> dict:
             "experience": data["experience"]
         }
     finally:
-        conn.close()
\ No newline at end of file
+        if owns_conn:
+            conn.close()
\ No newline at end of file
@@ -1,34 +1,37 @@
 from db.connection import connect_db
 from database_operations.database_operations import resolve_npc_ids, resolve_settlement_type_ids, resolve_settlement_type_names
+from systems.resources.resource_tick import accrued_resource_sql
 
-def get_all_npc_settlements() -> list[dict]:
-    """Retrieve all NPC settlements"""
+def get_all_npc_settlements(conn=None) -> list[dict]:
+    """Retrieve all NPC settlements, with resources accrued up to now"""
 
-    conn = connect_db()
+    owns_conn = conn is None
+    if owns_conn:
+        conn = connect_db()
     cursor = conn.cursor()
     
-    npc_ids = resolve_npc_ids()
+    npc_ids = resolve_npc_ids(conn)
     npc_player_ids = [npc['id'] for npc in npc_ids]
     
-    cursor.execute("""
+    cursor.execute(f"""
         SELECT
-            id,
-            name,
-            settlement_type_id,
-            x,
-            y,
-            food,
-            wood,
-            stone,
-            silver,
-            gold,
-            created_at
-        FROM settlements
-        WHERE player_id IN ({})
-        ORDER BY created_at ASC
-    """.format(','.join('?' * len(npc_player_ids))), npc_player_ids)
+            s.id,
+            s.name,
+            s.settlement_type_id,
+            s.x,
+            s.y,
+            s.food + {accrued_resource_sql('food')} AS food,
+            s.wood + {accrued_resource_sql('wood')} AS wood,
+            s.stone + {accrued_resource_sql('stone')} AS stone,
+            s.silver + {accrued_resource_sql('silver')} AS silver,
+            s.gold,
+            s.created_at
+        FROM settlements s
+        WHERE s.player_id IN ({','.join('?' * len(npc_player_ids))})
+        ORDER BY s.created_at ASC
+    """, npc_player_ids)
 
-    settlement_type_names = resolve_settlement_type_names()
+    settlement_type_names = resolve_settlement_type_names(conn)
     
     settlements = []
     for row in cursor.fetchall():
@@ -39,6 +42,7 @@ def get_all_npc_settlements() -> list[dict]:
         )
         settlements.append(row_dict)
     
-    conn.close()
+    if owns_conn:
+        conn.close()
 
     return settlements
\ No newline at end of file
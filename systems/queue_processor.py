@@ -1,7 +1,7 @@
 import json
 from datetime import datetime
 from db.connection import connect_db
-from systems.resources import apply_resource_tick
+from systems.resources.accrual import settle_settlement_resources
 from systems.combat import resolve_attack
 from systems.units import finish_training
 from systems.buildings import finish_build
@@ -24,8 +24,8 @@ def process_queue() -> None:
     for action in actions:
         payload = json.loads(action["payload"])
 
-        # Always update resources first
-        apply_resource_tick(action["settlement_id"], cursor)
+        # Always commit pending accrual first
+        settle_settlement_resources(cursor, [action["settlement_id"]], now)
 
         if action["action_type"] == "build":
             finish_build(action, payload, cursor)
@@ -0,0 +1,35 @@
+import os
+from datetime import datetime
+from dotenv import load_dotenv
+from systems.resources.resource_tick import apply_bulk_resource_tick
+
+load_dotenv()
+
+# "tick": the background service writes every player settlement each interval.
+# "lazy": reads project resources from last_resource_tick and the rates; rows are
+#         only written when something spends resources or changes rates.
+ACCRUAL_MODE = os.getenv("RESOURCE_ACCRUAL_MODE", "tick")
+
+def lazy_accrual_enabled() -> bool:
+    """Whether settlements are left to accrue lazily instead of being ticked in the background."""
+    return ACCRUAL_MODE == "lazy"
+
+def settle_player_resources(cursor, player_id: int, now: datetime | None = None) -> dict:
+    """
+    Commit pending accrual (resources and XP) for all of a player's settlements.
+
+    Must run inside the caller's transaction before resources are spent or rates change,
+    so the spend and the new rate apply from an up-to-date row. Settlements with full
+    storage are included, so accrual restarts from now once the spend frees up room.
+    """
+    return apply_bulk_resource_tick(cursor, now=now, where="s.player_id = ?", params=(player_id,), skip_full=False)
+
+def settle_settlement_resources(cursor, settlement_ids: list[int], now: datetime | None = None) -> dict:
+    """Commit pending accrual for specific settlements. See settle_player_resources."""
+    if not settlement_ids:
+        return {"settlements": 0, "players": 0, "xp_credited": 0, "level_ups": 0, "timings": {}}
+
+    placeholders = ",".join("?" * len(settlement_ids))
+    return apply_bulk_resource_tick(
+        cursor, now=now, where=f"s.id IN ({placeholders})", params=tuple(settlement_ids), skip_full=False
+    )
@@ -0,0 +1,209 @@
+import heapq
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from db.connection import connect_db
+from systems.resources.production_rates import expiry_timestamp, naive_utc, recompute_settlement_rates
+
+logger = logging.getLogger(__name__)
+
+EXPIRY_BATCH_SIZE = 500
+
+# Upper bound on how long the heap is trusted before it is rebuilt from the table,
+# so modifiers added by other processes are still expired on time-ish.
+EXPIRY_RESYNC_SECONDS = int(os.getenv("MODIFIER_EXPIRY_RESYNC_SECONDS", "300"))
+# How often the soonest expires_at in the table is looked up. Other processes (non-leader
+# workers, scripts) cannot reach this heap, so their modifiers are found this way, and
+# expire exactly when due as long as they were added this long before.
+EXPIRY_POLL_SECONDS = float(os.getenv("MODIFIER_EXPIRY_POLL_SECONDS", "5"))
+
+def expire_due_modifiers(cursor, modifier_ids: list[int], now: datetime) -> list[int]:
+    """
+    Delete expired modifiers and recompute rates for the settlements they applied to.
+
+    Besides the given ids, any modifier already past expires_at is swept up too.
+    Runs inside the caller's transaction.
+
+    Returns:
+        list[int]: Settlements whose rates were recomputed.
+    """
+    now_text = expiry_timestamp(now)
+    affected = set()
+
+    for start in range(0, len(modifier_ids), EXPIRY_BATCH_SIZE):
+        batch = modifier_ids[start:start + EXPIRY_BATCH_SIZE]
+        placeholders = ",".join("?" * len(batch))
+        cursor.execute(f"""
+            DELETE FROM settlement_modifiers
+            WHERE id IN ({placeholders})
+              AND expires_at <= ?
+            RETURNING settlement_id
+        """, (*batch, now_text))
+        affected.update(row[0] for row in cursor.fetchall())
+
+    cursor.execute("""
+        DELETE FROM settlement_modifiers
+        WHERE expires_at IS NOT NULL
+          AND expires_at <= ?
+        RETURNING settlement_id
+    """, (now_text,))
+    affected.update(row[0] for row in cursor.fetchall())
+
+    settlement_ids = sorted(affected)
+    recompute_settlement_rates(cursor, settlement_ids, now)
+    return settlement_ids
+
+class ModifierExpiryService:
+    """Expires time-limited settlement modifiers from an in-memory due-time heap."""
+
+    def __init__(self) -> None:
+        self.running = False
+        self.thread = None
+        self._heap = []  # (expires_at, modifier_id)
+        self._condition = threading.Condition()
+        logger.info("ModifierExpiryService initialized")
+
+    def rebuild(self) -> None:
+        """Reload every pending expiry from the table with one indexed query."""
+        conn = connect_db()
+        try:
+            rows = conn.execute("""
+                SELECT id, expires_at
+                FROM settlement_modifiers
+                WHERE expires_at IS NOT NULL
+                ORDER BY expires_at
+            """).fetchall()
+        finally:
+            conn.close()
+
+        heap = [(datetime.fromisoformat(row["expires_at"]), row["id"]) for row in rows]
+        heapq.heapify(heap)
+        with self._condition:
+            self._heap = heap
+            self._condition.notify()
+        logger.info(f"Modifier expiry heap rebuilt with {len(heap)} pending expiries")
+
+    def schedule_soonest(self) -> None:
+        """Track the table's next expiry if it is due before anything in the heap (one indexed lookup)."""
+        conn = connect_db()
+        try:
+            row = conn.execute("""
+                SELECT id, expires_at
+                FROM settlement_modifiers
+                WHERE expires_at IS NOT NULL
+                ORDER BY expires_at
+                LIMIT 1
+            """).fetchone()
+        finally:
+            conn.close()
+
+        if row is None:
+            return
+        # Later expiries are swept up with this one or found by the next lookup once it is gone
+        expires_at = datetime.fromisoformat(row["expires_at"])
+        with self._condition:
+            if not self._heap or expires_at < self._heap[0][0]:
+                heapq.heappush(self._heap, (expires_at, row["id"]))
+
+    def schedule(self, modifier_id: int, expires_at: datetime) -> None:
+        """Track a new expiring modifier, waking the loop if it is now the next one due."""
+        # Aware and naive datetimes cannot be compared, so the heap holds naive UTC only
+        expires_at = naive_utc(expires_at)
+        with self._condition:
+            heapq.heappush(self._heap, (expires_at, modifier_id))
+            if self._heap[0][1] == modifier_id:
+                self._condition.notify()
+
+    def _pop_due(self, now: datetime) -> list[int]:
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < EXPIRY_BATCH_SIZE:
+            due.append(heapq.heappop(self._heap)[1])
+        return due
+
+    def _expire(self, modifier_ids: list[int], now: datetime) -> None:
+        conn = connect_db()
+        try:
+            cursor = conn.cursor()
+            # Not a DatabaseWriter unit, so take the write lock up front like the other background writers
+            cursor.execute("BEGIN IMMEDIATE")
+            settlement_ids = expire_due_modifiers(cursor, modifier_ids, now)
+            conn.commit()
+            if settlement_ids:
+                logger.info(f"Expired modifiers, recomputed rates for {len(settlement_ids)} settlements")
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error expiring modifiers: {e}", exc_info=True)
+            # Retried after a poll interval rather than at once, so an error that persists
+            # (a locked database, a bad row) cannot spin the loop; the resync also picks them up
+            retry_at = now + timedelta(seconds=EXPIRY_POLL_SECONDS)
+            with self._condition:
+                for modifier_id in modifier_ids:
+                    heapq.heappush(self._heap, (retry_at, modifier_id))
+        finally:
+            conn.close()
+
+    def _run_loop(self) -> None:
+        """Sleep until the next expiry is due, then expire everything due in batches"""
+        resync_at = datetime.utcnow() + timedelta(seconds=EXPIRY_RESYNC_SECONDS)
+        poll_at = datetime.utcnow() + timedelta(seconds=EXPIRY_POLL_SECONDS)
+
+        while self.running:
+            try:
+                with self._condition:
+                    now = datetime.utcnow()
+                    due = self._pop_due(now)
+                    if not due:
+                        wake_at = min(resync_at, poll_at)
+                        if self._heap:
+                            wake_at = min(wake_at, self._heap[0][0])
+                        self._condition.wait(max(0.0, (wake_at - now).total_seconds()))
+
+                if not self.running:
+                    break
+
+                if due:
+                    self._expire(due, now)
+                elif datetime.utcnow() >= resync_at:
+                    resync_at = datetime.utcnow() + timedelta(seconds=EXPIRY_RESYNC_SECONDS)
+                    self.rebuild()
+                elif datetime.utcnow() >= poll_at:
+                    poll_at = datetime.utcnow() + timedelta(seconds=EXPIRY_POLL_SECONDS)
+                    self.schedule_soonest()
+            except Exception as e:
+                # A bad heap entry must not silently end expiry for the process: drop the heap and
+                # rebuild it from the table on the next pass
+                logger.error(f"Error in modifier expiry loop: {e}", exc_info=True)
+                resync_at = datetime.utcnow()
+                with self._condition:
+                    self._heap = []
+                    self._condition.wait(1.0)
+
+    def start(self) -> None:
+        """Rebuild the heap and start expiring modifiers in the background"""
+        if self.running:
+            return
+
+        self.rebuild()
+        self.running = True
+        self.thread = threading.Thread(target=self._run_loop, daemon=True)
+        self.thread.start()
+        logger.info("Modifier expiry started")
+
+    def stop(self) -> None:
+        """Stop expiring modifiers"""
+        self.running = False
+        with self._condition:
+            self._condition.notify()
+        if self.thread:
+            self.thread.join(timeout=5)
+        logger.info("ModifierExpiryService stopped")
+
+_expiry_service = None
+
+def get_expiry_service() -> ModifierExpiryService:
+    """Single accessor for ModifierExpiryService"""
+    global _expiry_service
+    if _expiry_service is None:
+        _expiry_service = ModifierExpiryService()
+    return _expiry_service
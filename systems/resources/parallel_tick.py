@@ -0,0 +1,180 @@
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from multiprocessing import get_context
+from systems.resources.resource_tick import compute_resource_tick, compute_storage_full_at, not_full_sql
+from systems.experience.experience import apply_experience_batch
+from systems.resources.resource_totals import add_batch_to_player_totals
+
+def compute_tick_range(db_path: str, start_id: int, end_id: int, now_iso: str,
+                       where: str = "", params: tuple = ()) -> list[tuple]:
+    """
+    Compute ticked resources for the settlements with start_id <= id < end_id.
+
+    Runs in a worker process on its own read-only connection, so it never takes
+    the write lock.
+
+    Returns:
+        list[tuple]: (id, player_id, last_resource_tick read, new_food, new_wood,
+        new_stone, new_silver, xp, storage_full_at) for every settlement with something
+        to apply. Settlements whose storage was already full are not read.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    current_time = datetime.fromisoformat(now_iso)
+
+    try:
+        cursor = conn.execute(f"""
+            SELECT
+                s.id, s.player_id, s.last_resource_tick,
+                s.food, s.wood, s.stone, s.silver,
+                s.food_capacity, s.wood_capacity, s.stone_capacity, s.silver_capacity,
+                s.current_food_rate, s.current_wood_rate,
+                s.current_stone_rate, s.current_silver_rate
+            FROM settlements s
+            JOIN players p ON p.id = s.player_id
+            WHERE s.id >= ? AND s.id < ?
+              AND {not_full_sql()}
+            {f"AND ({where})" if where else ""}
+        """, (start_id, end_id, *params))
+
+        results = []
+        for row in cursor:
+            tick = compute_resource_tick(row, current_time)
+            if tick is not None:
+                storage_full_at = compute_storage_full_at(row, tick[:4], current_time)
+                results.append((row['id'], row['player_id'], row['last_resource_tick'], *tick, storage_full_at))
+        return results
+    finally:
+        conn.close()
+
+def write_tick_results(conn, results: list[tuple], now_iso: str) -> dict:
+    """
+    Write computed tick results and credit their XP in one transaction.
+
+    Rows whose last_resource_tick changed since the worker read them (settled by a
+    spend in the meantime) are left alone and their XP is not credited.
+    """
+    cursor = conn.cursor()
+    # Take the write lock up front: the guard below reads settlements, and a deferred
+    # transaction that has read cannot wait for the lock if another writer commits first
+    cursor.execute("BEGIN IMMEDIATE")
+    cursor.execute("DROP TABLE IF EXISTS temp.parallel_tick_batch")
+    cursor.execute("""
+        CREATE TEMP TABLE parallel_tick_batch (
+            id INTEGER PRIMARY KEY, player_id INTEGER, read_tick TEXT,
+            new_food REAL, new_wood REAL, new_stone REAL, new_silver REAL, xp INTEGER,
+            storage_full_at TEXT
+        )
+    """)
+    cursor.executemany("INSERT INTO temp.parallel_tick_batch VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", results)
+
+    cursor.execute("""
+        DELETE FROM temp.parallel_tick_batch
+        WHERE NOT EXISTS (
+            SELECT 1 FROM settlements s
+            WHERE s.id = parallel_tick_batch.id
+              AND s.last_resource_tick IS parallel_tick_batch.read_tick
+        )
+    """)
+    add_batch_to_player_totals(cursor, "temp.parallel_tick_batch")
+    cursor.execute("""
+        UPDATE settlements
+        SET food = b.new_food, wood = b.new_wood, stone = b.new_stone, silver = b.new_silver,
+            last_resource_tick = ?, storage_full_at = b.storage_full_at
+        FROM temp.parallel_tick_batch AS b
+        WHERE settlements.id = b.id
+    """, (now_iso,))
+    settlements_ticked = cursor.rowcount
+
+    cursor.execute("""
+        SELECT player_id, SUM(xp) FROM temp.parallel_tick_batch
+        WHERE xp > 0
+        GROUP BY player_id
+    """)
+    xp_by_player = [(row[0], row[1]) for row in cursor.fetchall()]
+    level_ups = apply_experience_batch(cursor, xp_by_player)
+
+    cursor.execute("DROP TABLE temp.parallel_tick_batch")
+    conn.commit()
+
+    return {
+        "settlements": settlements_ticked,
+        "player_ids": {player_id for player_id, _ in xp_by_player},
+        "xp_credited": sum(xp for _, xp in xp_by_player),
+        "level_ups": level_ups
+    }
+
+def create_tick_executor(workers: int) -> ProcessPoolExecutor:
+    """Process pool for compute_tick_range. Spawned, so workers never inherit server threads or locks."""
+    return ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+
+def parallel_resource_tick(conn, db_path: str, executor: ProcessPoolExecutor | None,
+                           chunk_size: int = 5000, write_batch_size: int = 20000,
+                           now: datetime | None = None, where: str = "", params: tuple = ()) -> dict:
+    """
+    Tick settlements by computing id ranges in worker processes and writing from this one.
+
+    Args:
+        conn: Read-write connection used as the single writer.
+        db_path: Database file the workers open read-only.
+        executor: Process pool to compute on, or None to compute in this process.
+        chunk_size: Settlement ids per worker task.
+        write_batch_size: Computed rows committed per write transaction.
+        now: Tick time, defaults to utcnow().
+        where: Optional extra SQL condition on settlements `s` / players `p`.
+        params: Parameters for the `where` condition.
+
+    Returns:
+        dict: settlements ticked, players credited, total XP credited, level ups and
+        per-phase timings in seconds.
+    """
+    now_iso = (now or datetime.utcnow()).isoformat()
+    started = time.perf_counter()
+
+    bounds = conn.execute("SELECT MIN(id), MAX(id) FROM settlements").fetchone()
+    if bounds[0] is None:
+        return {"settlements": 0, "players": 0, "xp_credited": 0, "level_ups": 0, "timings": {}}
+
+    ranges = [(start, start + chunk_size) for start in range(bounds[0], bounds[1] + 1, chunk_size)]
+    totals = {"settlements": 0, "xp_credited": 0, "level_ups": 0}
+    player_ids = set()
+    write_seconds = 0.0
+    pending = []
+
+    def flush() -> None:
+        nonlocal write_seconds
+        write_started = time.perf_counter()
+        result = write_tick_results(conn, pending, now_iso)
+        write_seconds += time.perf_counter() - write_started
+        for key in totals:
+            totals[key] += result[key]
+        player_ids.update(result["player_ids"])
+        pending.clear()
+
+    if executor is None:
+        chunks = (compute_tick_range(db_path, start, end, now_iso, where, params) for start, end in ranges)
+    else:
+        futures = [
+            executor.submit(compute_tick_range, db_path, start, end, now_iso, where, params)
+            for start, end in ranges
+        ]
+        chunks = (future.result() for future in as_completed(futures))
+
+    compute_started = time.perf_counter()
+    for chunk in chunks:
+        pending.extend(chunk)
+        if len(pending) >= write_batch_size:
+            flush()
+    if pending:
+        flush()
+    compute_seconds = time.perf_counter() - compute_started - write_seconds
+
+    totals["players"] = len(player_ids)
+    totals["timings"] = {
+        "select": compute_started - started,
+        "compute": compute_seconds,
+        "write": write_seconds
+    }
+    return totals
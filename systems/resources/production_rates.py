@@ -0,0 +1,206 @@
+import threading
+from datetime import datetime, timezone
+from db.static_data import get_static_data
+from systems.resources.accrual import settle_settlement_resources
+from systems.resources.resource_tick import RESOURCES
+
+# player_id -> (unlocked node count when compiled, {resource: multiplier})
+_player_effects = {}
+_player_effects_lock = threading.Lock()
+
+def naive_utc(moment: datetime) -> datetime:
+    """An aware datetime as naive UTC, the form used for times throughout; naive ones are returned as-is."""
+    if moment.tzinfo is not None:
+        return moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+def expiry_timestamp(moment: datetime) -> str:
+    """
+    A settlement_modifiers.expires_at value: naive UTC in ISO 8601 to the millisecond.
+
+    Every stored value has this fixed width, so text order is time order and
+    `expires_at <= ?` can use idx_settlement_modifiers_expires_at. It is also the format
+    of SQLite's strftime('%Y-%m-%dT%H:%M:%f'), which init_db uses to convert older rows.
+    """
+    return naive_utc(moment).isoformat(timespec="milliseconds")
+
+def _compile_research_multipliers(effects) -> dict:
+    multipliers = dict.fromkeys(RESOURCES, 1.0)
+    for effect in effects:
+        targets = RESOURCES if effect.target == "all" else (effect.target,)
+        for resource in targets:
+            if resource in multipliers:
+                multipliers[resource] *= effect.value
+    return multipliers
+
+def get_player_production_multipliers(cursor, player_id: int) -> dict:
+    """
+    Per-resource production multiplier from a player's unlocked research, cached per player.
+
+    Research is only ever added, so a cached entry is current while the player's unlocked
+    node count matches the one it was compiled at. That count is read on every call (from
+    the player_research primary key), so an unlock by another process is never missed and
+    the rates written by recompute_settlement_rates always include it. player_research
+    rows and research effects are only read when the count has moved.
+    """
+    cursor.execute("SELECT COUNT(*) FROM player_research WHERE player_id = ?", (player_id,))
+    node_count = cursor.fetchone()[0]
+    with _player_effects_lock:
+        cached = _player_effects.get(player_id)
+    if cached is not None and cached[0] == node_count:
+        return cached[1]
+
+    cursor.execute("SELECT node_id FROM player_research WHERE player_id = ?", (player_id,))
+    node_ids = [row[0] for row in cursor.fetchall()]
+    effects = get_static_data(cursor.connection).effects_for(node_ids, "production_bonus")
+    multipliers = _compile_research_multipliers(effects)
+
+    with _player_effects_lock:
+        _player_effects[player_id] = (len(node_ids), multipliers)
+    return multipliers
+
+def invalidate_player_effects(player_id: int | None = None) -> None:
+    """Drop the compiled research effects for one player, or for everyone."""
+    with _player_effects_lock:
+        if player_id is None:
+            _player_effects.clear()
+        else:
+            _player_effects.pop(player_id, None)
+
+def compute_effective_rates(base_rates: dict, research_multipliers: dict, modifiers: list) -> dict:
+    """
+    Effective production rate per resource.
+
+    rate = (base + flat 'add' modifiers) * research multiplier * 'multiply' modifiers
+
+    Args:
+        base_rates: {resource: base rate per hour}.
+        research_multipliers: {resource: multiplier} from get_player_production_multipliers.
+        modifiers: Active settlement_modifiers rows (resource_type, modifier_value, modifier_operation).
+    """
+    flat = dict.fromkeys(RESOURCES, 0.0)
+    factor = dict(research_multipliers)
+
+    for modifier in modifiers:
+        targets = RESOURCES if modifier["resource_type"] == "all" else (modifier["resource_type"],)
+        for resource in targets:
+            if resource not in flat:
+                continue
+            if modifier["modifier_operation"] == "add":
+                flat[resource] += modifier["modifier_value"]
+            else:
+                factor[resource] *= modifier["modifier_value"]
+
+    return {
+        resource: max(0.0, (base_rates[resource] + flat[resource]) * factor[resource])
+        for resource in RESOURCES
+    }
+
+def recompute_settlement_rates(cursor, settlement_ids: list[int], now: datetime | None = None) -> int:
+    """
+    Recompile current_*_rate for the given settlements from base rates, research and modifiers.
+
+    Pending accrual is settled at the old rates first, so the new rates only apply
+    from now on. Runs inside the caller's transaction.
+
+    Returns:
+        int: Number of settlements updated.
+    """
+    if not settlement_ids:
+        return 0
+
+    current_time = now or datetime.utcnow()
+    settle_settlement_resources(cursor, settlement_ids, current_time)
+
+    placeholders = ",".join("?" * len(settlement_ids))
+    cursor.execute(f"""
+        SELECT id, player_id, base_food_rate, base_wood_rate, base_stone_rate, base_silver_rate
+        FROM settlements
+        WHERE id IN ({placeholders})
+    """, tuple(settlement_ids))
+    settlements = cursor.fetchall()
+
+    cursor.execute(f"""
+        SELECT settlement_id, resource_type, modifier_value, modifier_operation
+        FROM settlement_modifiers
+        WHERE settlement_id IN ({placeholders})
+          AND (expires_at IS NULL OR expires_at > ?)
+    """, (*settlement_ids, expiry_timestamp(current_time)))
+    modifiers_by_settlement = {}
+    for modifier in cursor.fetchall():
+        modifiers_by_settlement.setdefault(modifier["settlement_id"], []).append(modifier)
+
+    research_by_player = {}
+    for settlement in settlements:
+        if settlement["player_id"] not in research_by_player:
+            research_by_player[settlement["player_id"]] = get_player_production_multipliers(
+                cursor, settlement["player_id"]
+            )
+
+    updates = []
+    for settlement in settlements:
+        base_rates = {resource: settlement[f"base_{resource}_rate"] for resource in RESOURCES}
+        rates = compute_effective_rates(
+            base_rates,
+            research_by_player[settlement["player_id"]],
+            modifiers_by_settlement.get(settlement["id"], [])
+        )
+        updates.append((*(rates[resource] for resource in RESOURCES), settlement["id"]))
+
+    cursor.executemany("""
+        UPDATE settlements
+        SET current_food_rate = ?, current_wood_rate = ?, current_stone_rate = ?, current_silver_rate = ?,
+            storage_full_at = NULL
+        WHERE id = ?
+    """, updates)
+    return len(updates)
+
+def recompute_player_rates(cursor, player_id: int, now: datetime | None = None) -> int:
+    """Recompile current_*_rate for all of a player's settlements. See recompute_settlement_rates."""
+    cursor.execute("SELECT id FROM settlements WHERE player_id = ?", (player_id,))
+    return recompute_settlement_rates(cursor, [row[0] for row in cursor.fetchall()], now)
+
+def node_has_production_effects(cursor, node_id: int) -> bool:
+    """Whether unlocking a research node can change production rates."""
+    return node_id in get_static_data(cursor.connection).production_nodes
+
+def add_settlement_modifier(cursor, settlement_id: int, resource_type: str, modifier_value: float,
+                            modifier_operation: str = "multiply", modifier_type: str = "building_upgrade",
+                            source_id: int | None = None, source_name: str | None = None,
+                            expires_at: datetime | None = None) -> int:
+    """
+    Add a production modifier to a settlement and recompile its rates.
+
+    Runs inside the caller's transaction. Expiring modifiers are handed to this process's
+    modifier expiry service when it runs; otherwise the one running in the leader process
+    finds them in the table (see EXPIRY_POLL_SECONDS).
+
+    Returns:
+        int: The new modifier id.
+    """
+    if modifier_operation not in ("multiply", "add"):
+        raise ValueError(f"Unknown modifier operation: {modifier_operation}")
+    if resource_type != "all" and resource_type not in RESOURCES:
+        raise ValueError(f"Unknown resource type: {resource_type}")
+
+    cursor.execute("""
+        INSERT INTO settlement_modifiers
+        (settlement_id, modifier_type, resource_type, modifier_value, modifier_operation,
+         source_id, source_name, expires_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        settlement_id, modifier_type, resource_type, modifier_value, modifier_operation,
+        source_id, source_name, expiry_timestamp(expires_at) if expires_at else None
+    ))
+    modifier_id = cursor.lastrowid
+
+    recompute_settlement_rates(cursor, [settlement_id])
+
+    if expires_at is not None:
+        from systems.resources.modifier_expiry import get_expiry_service
+        # A service that is not running never drains its heap
+        service = get_expiry_service()
+        if service.running:
+            service.schedule(modifier_id, expires_at)
+
+    return modifier_id
@@ -1,29 +1,110 @@
+import logging
+import time
 from datetime import datetime, timedelta
-from systems.experience.experience import check_level_up
+from systems.experience.experience import check_level_up, apply_experience_batch
+from systems.resources.resource_totals import add_batch_to_player_totals, add_to_player_totals
+
+logger = logging.getLogger(__name__)
 
 MAX_CATCHUP_DAYS = 7
 MAX_CATCHUP_SECONDS = MAX_CATCHUP_DAYS * 24 * 3600
 
-def apply_resource_tick(settlement_id: int, cursor) -> None:
-    """Apply resource tick to a settlement based on elapsed time and production rates."""
-    cursor.execute("""
-        SELECT 
-            s.food, s.wood, s.stone, s.silver, s.gold,
-            s.food_capacity, s.wood_capacity, s.stone_capacity, 
-            s.silver_capacity, s.gold_capacity,
-            s.last_resource_tick, s.player_id,
-            s.current_food_rate, s.current_wood_rate, 
-            s.current_stone_rate, s.current_silver_rate
-        FROM settlements s
-        WHERE s.id = ?
-    """, (settlement_id,))
-    
-    data = cursor.fetchone()
-    if not data:
-        return
-    
-    current_time = datetime.utcnow()
-    
+RESOURCES = ("food", "wood", "stone", "silver")
+
+def elapsed_seconds_sql(now: str = "'now'", alias: str = "s") -> str:
+    """
+    SQL expression for whole seconds since a settlement's last tick.
+
+    SQLite keeps datetimes at millisecond resolution, so the difference is rounded
+    to milliseconds before truncating, matching int(timedelta.total_seconds()).
+    """
+    return (
+        f"(CAST(ROUND((julianday({now}) - julianday({alias}.last_resource_tick)) * 86400000) AS INTEGER) / 1000)"
+    )
+
+def accrued_resource_sql(resource: str, now: str = "'now'", alias: str = "s") -> str:
+    """
+    SQL expression for the amount of a resource produced since the last tick but not yet written.
+
+    Mirrors apply_resource_tick: the catch-up window is capped, the result is clamped
+    to capacity, and nothing accrues until at least one second has elapsed.
+    """
+    elapsed = elapsed_seconds_sql(now, alias)
+    return (
+        f"(CASE WHEN {elapsed} >= 1 "
+        f"THEN MIN({alias}.{resource} + MIN({elapsed}, {MAX_CATCHUP_SECONDS}) / 3600.0 * {alias}.current_{resource}_rate, "
+        f"{alias}.{resource}_capacity) - {alias}.{resource} "
+        f"ELSE 0 END)"
+    )
+
+def seconds_until_full_sql(amount: str = "{alias}.{resource}", alias: str = "s") -> str:
+    """
+    SQL expression for seconds until every producing resource is at capacity.
+
+    Resources with no production are ignored; 0 means the settlement's storage is full.
+    `amount` is a template for the current amount of each resource, so staged new
+    values can be measured against the settlement's rates and capacities.
+    """
+    terms = []
+    for resource in RESOURCES:
+        current = amount.format(alias=alias, resource=resource)
+        rate = f"{alias}.current_{resource}_rate"
+        capacity = f"{alias}.{resource}_capacity"
+        terms.append(f"CASE WHEN {rate} > 0 AND {current} < {capacity} "
+                     f"THEN ({capacity} - {current}) * 3600.0 / {rate} ELSE 0 END")
+    return f"MAX({', '.join(terms)})"
+
+def not_full_sql(alias: str = "s") -> str:
+    """SQL condition excluding settlements whose storage was already full at their last tick."""
+    return (
+        f"({alias}.storage_full_at IS NULL "
+        f"OR julianday({alias}.storage_full_at) > julianday({alias}.last_resource_tick))"
+    )
+
+def storage_full_timestamp(moment: datetime) -> str:
+    """
+    A settlements.storage_full_at value: naive UTC in ISO 8601 to the millisecond.
+
+    Python and SQL writers both produce this fixed width (SQL via
+    strftime('%Y-%m-%dT%H:%M:%f')), so get_settlements_filling_up can compare it as text.
+    """
+    return moment.isoformat(timespec="milliseconds")
+
+def compute_storage_full_at(data, amounts: tuple, current_time: datetime) -> str:
+    """
+    When the settlement's storage is full, given its amounts at current_time. See seconds_until_full_sql.
+
+    Args:
+        data: Row with the capacities and current rates.
+        amounts: (food, wood, stone, silver) at current_time.
+        current_time: Time the amounts were ticked to.
+
+    Returns:
+        str: storage_full_timestamp, equal to current_time when storage is already full.
+    """
+    seconds = 0.0
+    for resource, amount in zip(RESOURCES, amounts):
+        rate = data[f'current_{resource}_rate']
+        capacity = data[f'{resource}_capacity']
+        if rate > 0 and amount < capacity:
+            seconds = max(seconds, (capacity - amount) * 3600.0 / rate)
+
+    if seconds <= 0:
+        return storage_full_timestamp(current_time)
+    return storage_full_timestamp(current_time + timedelta(seconds=seconds))
+
+def compute_resource_tick(data, current_time: datetime) -> tuple | None:
+    """
+    Compute a settlement's resources after ticking it to current_time.
+
+    Args:
+        data: Row with the resources, capacities, current rates and last_resource_tick.
+        current_time: Time to tick to.
+
+    Returns:
+        (new_food, new_wood, new_stone, new_silver, xp_gained), or None if less than
+        a second has elapsed.
+    """
     if not data['last_resource_tick']:
         last_tick = current_time
     else:
@@ -34,7 +115,7 @@ def apply_resource_tick(settlement_id: int, cursor) -> None:
     elapsed_seconds = max(0, min(elapsed_seconds, MAX_CATCHUP_SECONDS)) # cap at 7 days worth of seconds
 
     if elapsed_seconds < 1:
-        return
+        return None
 
     hours = elapsed_seconds / 3600
     
@@ -59,17 +140,48 @@ def apply_resource_tick(settlement_id: int, cursor) -> None:
         actual_stone_gained * 1.5 +
         actual_silver_gained * 2.0
     )
+
+    return new_food, new_wood, new_stone, new_silver, xp_gained
+
+def apply_resource_tick(settlement_id: int, cursor) -> None:
+    """Apply resource tick to a settlement based on elapsed time and production rates."""
+    cursor.execute("""
+        SELECT 
+            s.food, s.wood, s.stone, s.silver, s.gold,
+            s.food_capacity, s.wood_capacity, s.stone_capacity, 
+            s.silver_capacity, s.gold_capacity,
+            s.last_resource_tick, s.player_id,
+            s.current_food_rate, s.current_wood_rate, 
+            s.current_stone_rate, s.current_silver_rate
+        FROM settlements s
+        WHERE s.id = ?
+    """, (settlement_id,))
+    
+    data = cursor.fetchone()
+    if not data:
+        return
     
-    print(f"Settlement {settlement_id} gained {food_gained} food, {wood_gained} wood, "
-          f"{stone_gained} stone, {silver_gained} silver over {elapsed_seconds} seconds. "
-          f"XP gained: {xp_gained}")
+    current_time = datetime.utcnow()
+    tick = compute_resource_tick(data, current_time)
+    if tick is None:
+        return
+
+    new_food, new_wood, new_stone, new_silver, xp_gained = tick
+    storage_full_at = compute_storage_full_at(data, tick[:4], current_time)
+
+    logger.debug(f"Settlement {settlement_id} now has {new_food} food, {new_wood} wood, "
+                 f"{new_stone} stone, {new_silver} silver. XP gained: {xp_gained}")
 
     cursor.execute("""
         UPDATE settlements
-        SET food = ?, wood = ?, stone = ?, silver = ?, last_resource_tick = ?
+        SET food = ?, wood = ?, stone = ?, silver = ?, last_resource_tick = ?, storage_full_at = ?
         WHERE id = ?
     """, (new_food, new_wood, new_stone, new_silver,
-          current_time.isoformat(), settlement_id))
+          current_time.isoformat(), storage_full_at, settlement_id))
+    add_to_player_totals(cursor, data['player_id'], {
+        "food": new_food - data['food'], "wood": new_wood - data['wood'],
+        "stone": new_stone - data['stone'], "silver": new_silver - data['silver']
+    })
 
     if xp_gained > 0:
         cursor.execute("""
@@ -78,4 +190,139 @@ def apply_resource_tick(settlement_id: int, cursor) -> None:
             WHERE id = ?
         """, (int(xp_gained), data['player_id']))
         
-        check_level_up(data['player_id'], cursor)
\ No newline at end of file
+        check_level_up(data['player_id'], cursor)
+
+def apply_bulk_resource_tick(cursor, now: datetime | None = None, where: str = "", params: tuple = (),
+                             skip_full: bool = True) -> dict:
+    """
+    Apply resource ticks to every due settlement with a handful of set-based statements.
+
+    Produces the same per-settlement food/wood/stone/silver, last_resource_tick and XP
+    as calling apply_resource_tick on each row. Elapsed time is measured at SQLite's
+    millisecond resolution, so a row can only disagree when the two timestamps differ
+    by a sub-millisecond amount on a whole-second boundary.
+
+    Args:
+        cursor: Cursor on an open write transaction, or on a connection with none, in which
+            case one is started with BEGIN IMMEDIATE. The caller commits.
+        now: Tick time, defaults to utcnow().
+        where: Optional extra SQL condition on settlements `s` / players `p`.
+        params: Parameters for the `where` condition.
+        skip_full: Leave settlements whose storage was full at their last tick untouched.
+            Callers about to spend resources or change rates pass False, so the row's
+            last_resource_tick is brought up to date first.
+
+    Returns:
+        dict: settlements ticked, players credited, total XP credited, level ups and
+        per-phase timings in seconds (select: staging due rows with their new values,
+        compute: grouping XP per player, write: settlement, totals and player updates).
+    """
+    current_time = now or datetime.utcnow()
+    now_iso = current_time.isoformat()
+    started = time.perf_counter()
+
+    # The staged rows are written back over settlements, so the write lock is taken before
+    # staging: otherwise the DDL and SELECT below run in autocommit and a spend committed
+    # before the UPDATE would be overwritten with the staged amounts
+    if not cursor.connection.in_transaction:
+        cursor.execute("BEGIN IMMEDIATE")
+    cursor.execute("DROP TABLE IF EXISTS temp.resource_tick_batch")
+    cursor.execute("""
+        CREATE TEMP TABLE resource_tick_batch AS
+        SELECT
+            id, player_id, new_food, new_wood, new_stone, new_silver,
+            CAST(
+                (new_food - food) * 1.0 +
+                (new_wood - wood) * 1.0 +
+                (new_stone - stone) * 1.5 +
+                (new_silver - silver) * 2.0
+            AS INTEGER) AS xp,
+            {} AS full_in
+        FROM (
+            SELECT
+                id, player_id, food, wood, stone, silver,
+                food_capacity, wood_capacity, stone_capacity, silver_capacity,
+                current_food_rate, current_wood_rate, current_stone_rate, current_silver_rate,
+                MIN(food + hours * current_food_rate, food_capacity) AS new_food,
+                MIN(wood + hours * current_wood_rate, wood_capacity) AS new_wood,
+                MIN(stone + hours * current_stone_rate, stone_capacity) AS new_stone,
+                MIN(silver + hours * current_silver_rate, silver_capacity) AS new_silver
+            FROM (
+                SELECT
+                    s.id, s.player_id, s.food, s.wood, s.stone, s.silver,
+                    s.food_capacity, s.wood_capacity, s.stone_capacity, s.silver_capacity,
+                    s.current_food_rate, s.current_wood_rate,
+                    s.current_stone_rate, s.current_silver_rate,
+                    MIN(elapsed_seconds, ?) / 3600.0 AS hours
+                FROM (
+                    SELECT s.*, {} AS elapsed_seconds
+                    FROM settlements s
+                ) s
+                JOIN players p ON p.id = s.player_id
+                WHERE s.elapsed_seconds >= 1
+                {}
+                {}
+            )
+        ) t
+    """.format(
+        seconds_until_full_sql("t.new_{resource}", "t"),
+        elapsed_seconds_sql("?"),
+        f"AND {not_full_sql()}" if skip_full else "",
+        f"AND ({where})" if where else ""
+    ), (MAX_CATCHUP_SECONDS, now_iso, *params))
+    selected = time.perf_counter()
+
+    # Only positive per-settlement XP is credited, matching apply_resource_tick
+    cursor.execute("""
+        SELECT player_id, SUM(xp) AS xp
+        FROM temp.resource_tick_batch
+        WHERE xp > 0
+        GROUP BY player_id
+    """)
+    xp_by_player = [(row[0], row[1]) for row in cursor.fetchall()]
+    computed = time.perf_counter()
+
+    add_batch_to_player_totals(cursor, "temp.resource_tick_batch")
+    cursor.execute("""
+        UPDATE settlements
+        SET food = b.new_food, wood = b.new_wood, stone = b.new_stone, silver = b.new_silver,
+            last_resource_tick = ?,
+            storage_full_at = CASE WHEN b.full_in > 0
+                THEN strftime('%Y-%m-%dT%H:%M:%f', julianday(?) + b.full_in / 86400.0)
+                ELSE ? END
+        FROM temp.resource_tick_batch AS b
+        WHERE settlements.id = b.id
+    """, (now_iso, now_iso, storage_full_timestamp(current_time)))
+    settlements_ticked = cursor.rowcount
+
+    level_ups = apply_experience_batch(cursor, xp_by_player)
+
+    cursor.execute("DROP TABLE temp.resource_tick_batch")
+    written = time.perf_counter()
+
+    return {
+        "settlements": settlements_ticked,
+        "players": len(xp_by_player),
+        "xp_credited": sum(xp for _, xp in xp_by_player),
+        "level_ups": level_ups,
+        "timings": {
+            "select": selected - started,
+            "compute": computed - selected,
+            "write": written - computed
+        }
+    }
+
+def get_settlements_filling_up(cursor, since: datetime, until: datetime) -> list[dict]:
+    """
+    Settlements whose storage becomes full in (since, until], for capacity-full notifications.
+
+    Uses the storage_full_at index, so it is cheap to poll. Settlements that were spent
+    from or had their rates changed are picked up again after their next tick.
+    """
+    cursor.execute("""
+        SELECT s.id, s.player_id, s.name, s.storage_full_at
+        FROM settlements s
+        WHERE s.storage_full_at > ? AND s.storage_full_at <= ?
+        ORDER BY s.storage_full_at
+    """, (storage_full_timestamp(since), storage_full_timestamp(until)))
+    return [dict(row) for row in cursor.fetchall()]
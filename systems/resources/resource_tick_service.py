@@ -1,69 +1,378 @@
-
+import os
 import threading
 import time
-from systems.resources.resource_tick import apply_resource_tick
+from datetime import datetime, timedelta
+from systems.resources.resource_tick import apply_resource_tick, apply_bulk_resource_tick, not_full_sql
+from systems.resources.parallel_tick import parallel_resource_tick, create_tick_executor
 from systems.resources.resources import connect_db
+from db.connection import DB_PATH
+from metrics.registry import get_registry
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Settlements are spread over this many slots of the tick interval by id
+TICK_SLOTS = int(os.getenv("TICK_SLOTS", "12"))
+
+# Worker processes computing ticks over settlement id ranges (0 ticks in SQL on this thread)
+TICK_WORKERS = int(os.getenv("TICK_WORKERS", "0"))
+TICK_CHUNK_SIZE = int(os.getenv("TICK_CHUNK_SIZE", "5000"))
+
+# Backlogs older than the threshold (e.g. after downtime) are caught up before the wheel starts,
+# a chunk of settlements per transaction with a pause between chunks so API writes get the lock
+CATCHUP_THRESHOLD_SECONDS = int(os.getenv("TICK_CATCHUP_THRESHOLD_SECONDS", "300"))
+CATCHUP_CHUNK_SIZE = int(os.getenv("TICK_CATCHUP_CHUNK_SIZE", "2000"))
+CATCHUP_PAUSE_SECONDS = float(os.getenv("TICK_CATCHUP_PAUSE_SECONDS", "0.05"))
+
+_metrics = get_registry()
+TICK_SECONDS = _metrics.summary("resource_tick_seconds", "Wall time of a resource tick")
+TICK_PHASE_SECONDS = _metrics.summary(
+    "resource_tick_phase_seconds", "Wall time of a resource tick by phase", ("phase",)
+)
+SETTLEMENTS_TICKED = _metrics.counter("resource_tick_settlements_total", "Settlements advanced by the tick")
+SETTLEMENTS_SKIPPED = _metrics.counter(
+    "resource_tick_skipped_total", "Settlements in a ticked slot that had nothing to apply"
+)
+XP_CREDITED = _metrics.counter("resource_tick_xp_total", "Experience credited by the tick")
+LEVEL_UPS = _metrics.counter("resource_tick_level_ups_total", "Players who levelled up during a tick")
+OVERRUNS = _metrics.counter("resource_tick_overruns_total", "Ticks that ran past their slot deadline")
+ROLLBACKS = _metrics.counter("resource_tick_rollbacks_total", "Ticks rolled back after an error")
+TICK_LAG = _metrics.gauge(
+    "resource_tick_lag_seconds",
+    "Age of the oldest last_resource_tick across player settlements with room in storage, "
+    "sampled once per turn of the wheel"
+)
+LAST_TICK = _metrics.gauge("resource_tick_last_success_timestamp_seconds", "Unix time of the last committed tick")
+CATCHUP_REMAINING = _metrics.gauge(
+    "resource_tick_catchup_remaining", "Stale player settlements left to catch up"
+)
+CATCHUP_SETTLEMENTS = _metrics.counter(
+    "resource_tick_catchup_settlements_total", "Settlements advanced by catch-up chunks"
+)
+
+def oldest_tick_lag() -> float:
+    """
+    Seconds since the least recently ticked player settlement was last ticked.
+
+    Settlements with full storage are not ticked, so they are left out.
+    """
+    conn = connect_db()
+    try:
+        row = conn.execute(f"""
+            SELECT (julianday('now') - MIN(julianday(s.last_resource_tick))) * 86400
+            FROM settlements s
+            JOIN players p ON s.player_id = p.id
+            WHERE p.is_npc = 0
+              AND {not_full_sql()}
+        """).fetchone()
+        return row[0] or 0.0
+    finally:
+        conn.close()
+
 class ResourceTickService:
-    def __init__(self) -> None:
+    def __init__(self, bulk: bool = True, slots: int = TICK_SLOTS,
+                 workers: int = TICK_WORKERS, chunk_size: int = TICK_CHUNK_SIZE,
+                 clock=time.monotonic) -> None:
         self.running = False
         self.thread = None
-        logger.info("ResourceTickService initialized")
-    
+        self.bulk = bulk
+        self.slots = max(1, slots)
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self._clock = clock  # the wheel's schedule; tests substitute a fake one
+        self._executor = None
+        self.overrun_count = 0
+        self.last_overrun_at = None
+        self._stop_event = threading.Event()
+        mode = f"parallel x{workers}" if workers > 0 else "bulk" if bulk else "per-settlement"
+        logger.info(f"ResourceTickService initialized ({mode} mode, {self.slots} slots)")
+
+    def _slot_filter(self, slots: list[int]) -> tuple[str, tuple]:
+        """SQL condition selecting player settlements in the given time-wheel slots"""
+        if len(slots) >= self.slots:
+            return "p.is_npc = 0", ()
+
+        placeholders = ",".join("?" * len(slots))
+        return f"p.is_npc = 0 AND s.id % ? IN ({placeholders})", (self.slots, *slots)
+
     def tick_all_settlements(self) -> None:
         """Apply resource ticks to all PLAYER settlements only"""
+        self.tick_slots(list(range(self.slots)))
+
+    def tick_slots(self, slots: list[int]) -> None:
+        """Apply resource ticks to the PLAYER settlements in the given slots"""
+        if self.workers > 0:
+            self._bulk_tick_slots(slots, parallel=True)
+            return
+
+        if self.bulk:
+            self._bulk_tick_slots(slots)
+            return
+
+        where, params = self._slot_filter(slots)
         conn = connect_db()
         cursor = conn.cursor()
-        
+        started = time.perf_counter()
+
         try:
-            cursor.execute("""
-                SELECT s.id 
+            # Background ticks bypass the request writer (see DatabaseWriter) but take the
+            # write lock before reading, so request writes wait for them instead of being lost
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(f"""
+                SELECT s.id
                 FROM settlements s
                 JOIN players p ON s.player_id = p.id
-                WHERE p.is_npc = 0
-            """)
+                WHERE {where}
+                  AND {not_full_sql()}
+            """, params)
             settlements = cursor.fetchall()
-            
+            selected = time.perf_counter()
+
             for settlement in settlements:
                 apply_resource_tick(settlement['id'], cursor)
-            
+            written = time.perf_counter()
+
             conn.commit()
-            logger.info(f"Successfully ticked {len(settlements)} player settlements")
-            
+            committed = time.perf_counter()
+
+            TICK_PHASE_SECONDS.observe(selected - started, phase="select")
+            TICK_PHASE_SECONDS.observe(written - selected, phase="write")
+            TICK_PHASE_SECONDS.observe(committed - written, phase="commit")
+            TICK_SECONDS.observe(committed - started)
+            SETTLEMENTS_TICKED.inc(len(settlements))
+            LAST_TICK.set(time.time())
+            logger.info(f"Successfully ticked {len(settlements)} player settlements in slots {slots}")
+
+        except Exception as e:
+            conn.rollback()
+            ROLLBACKS.inc()
+            logger.error(f"Error ticking settlements: {e}", exc_info=True)
+        finally:
+            conn.close()
+
+    def _bulk_tick_slots(self, slots: list[int], parallel: bool = False) -> None:
+        """
+        Advance every due player settlement in the given slots with set-based statements,
+        or with the process pool computing id ranges when parallel is set
+        """
+        where, params = self._slot_filter(slots)
+        conn = connect_db()
+        cursor = conn.cursor()
+        started = time.perf_counter()
+
+        try:
+            if not parallel:
+                # The parallel path takes the lock only for its write; see write_tick_results
+                cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(f"""
+                SELECT COUNT(*)
+                FROM settlements s
+                JOIN players p ON s.player_id = p.id
+                WHERE {where}
+            """, params)
+            candidates = cursor.fetchone()[0]
+            counted = time.perf_counter()
+
+            if parallel:
+                conn.commit()
+                if self._executor is None:
+                    self._executor = create_tick_executor(self.workers)
+                result = parallel_resource_tick(
+                    conn, str(DB_PATH), self._executor, chunk_size=self.chunk_size, where=where, params=params
+                )
+            else:
+                result = apply_bulk_resource_tick(cursor, where=where, params=params)
+            applied = time.perf_counter()
+
+            conn.commit()
+            committed = time.perf_counter()
+
+            timings = result["timings"]
+            TICK_PHASE_SECONDS.observe(counted - started + timings["select"], phase="select")
+            TICK_PHASE_SECONDS.observe(timings["compute"], phase="compute")
+            TICK_PHASE_SECONDS.observe(timings["write"], phase="write")
+            TICK_PHASE_SECONDS.observe(committed - applied, phase="commit")
+            TICK_SECONDS.observe(committed - started)
+            SETTLEMENTS_TICKED.inc(result["settlements"])
+            SETTLEMENTS_SKIPPED.inc(max(0, candidates - result["settlements"]))
+            XP_CREDITED.inc(result["xp_credited"])
+            LEVEL_UPS.inc(result["level_ups"])
+            LAST_TICK.set(time.time())
+            logger.info(
+                f"Successfully ticked {result['settlements']} player settlements in slots {slots} "
+                f"({result['xp_credited']} XP to {result['players']} players)"
+            )
+
         except Exception as e:
             conn.rollback()
+            ROLLBACKS.inc()
             logger.error(f"Error ticking settlements: {e}", exc_info=True)
         finally:
             conn.close()
-    
+
+    def catch_up(self, chunk_size: int = CATCHUP_CHUNK_SIZE, pause_seconds: float = CATCHUP_PAUSE_SECONDS,
+                 threshold_seconds: int = CATCHUP_THRESHOLD_SECONDS) -> dict:
+        """
+        Work through a large accrual backlog in bounded transactions.
+
+        Player settlements not ticked for threshold_seconds, and not already full, are advanced in id order,
+        chunk_size rows per commit, waiting pause_seconds between chunks so the write
+        lock is released to API requests. Progress is logged and exported as
+        resource_tick_catchup_remaining. Caught-up settlements have a fresh
+        last_resource_tick, so an interrupted catch-up resumes where it stopped.
+
+        Returns:
+            dict: settlements advanced and chunks committed
+        """
+        cutoff = (datetime.utcnow() - timedelta(seconds=threshold_seconds)).isoformat()
+        # Full settlements are left out as the bulk tick skips them; counting them would keep
+        # remaining above zero and have every chunk reselect rows it never advances
+        stale = f"p.is_npc = 0 AND julianday(s.last_resource_tick) < julianday(?) AND {not_full_sql()}"
+        conn = connect_db()
+        cursor = conn.cursor()
+        totals = {"settlements": 0, "chunks": 0}
+        last_id = 0
+
+        try:
+            cursor.execute(f"""
+                SELECT COUNT(*)
+                FROM settlements s
+                JOIN players p ON s.player_id = p.id
+                WHERE {stale}
+            """, (cutoff,))
+            remaining = cursor.fetchone()[0]
+            CATCHUP_REMAINING.set(remaining)
+            if remaining:
+                logger.info(f"Catching up {remaining} stale player settlements in chunks of {chunk_size}")
+
+            while remaining > 0:
+                # Each chunk holds the write lock from choosing its rows to committing them,
+                # so API writes between chunks wait on the busy timeout instead of being
+                # overwritten by amounts staged before they committed
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute(f"""
+                    SELECT MAX(id), COUNT(*)
+                    FROM (
+                        SELECT s.id
+                        FROM settlements s
+                        JOIN players p ON s.player_id = p.id
+                        WHERE s.id > ? AND {stale}
+                        ORDER BY s.id
+                        LIMIT ?
+                    )
+                """, (last_id, cutoff, chunk_size))
+                end_id, selected = cursor.fetchone()
+                if end_id is None:
+                    conn.rollback()
+                    break
+
+                result = apply_bulk_resource_tick(
+                    cursor, where=f"s.id > ? AND s.id <= ? AND {stale}", params=(last_id, end_id, cutoff)
+                )
+                conn.commit()
+
+                last_id = end_id
+                remaining = max(0, remaining - selected)
+                totals["settlements"] += result["settlements"]
+                totals["chunks"] += 1
+                CATCHUP_REMAINING.set(remaining)
+                CATCHUP_SETTLEMENTS.inc(result["settlements"])
+                XP_CREDITED.inc(result["xp_credited"])
+                LEVEL_UPS.inc(result["level_ups"])
+                logger.info(f"Catch-up chunk up to settlement {end_id} done, {remaining} remaining")
+
+                if self._stop_event.wait(pause_seconds):
+                    logger.info(f"Catch-up interrupted with {remaining} settlements remaining")
+                    break
+
+        except Exception as e:
+            conn.rollback()
+            ROLLBACKS.inc()
+            logger.error(f"Error catching up settlements: {e}", exc_info=True)
+        finally:
+            conn.close()
+
+        if totals["chunks"]:
+            LAST_TICK.set(time.time())
+        return totals
+
+    def record_lag(self) -> None:
+        """Sample oldest_tick_lag into the lag gauge, so scrapes never run the aggregate."""
+        try:
+            TICK_LAG.set(oldest_tick_lag())
+        except Exception as e:
+            logger.error(f"Error sampling tick lag: {e}", exc_info=True)
+
+    def _record_overrun(self, missed_slots: int) -> None:
+        self.overrun_count += 1
+        self.last_overrun_at = time.time()
+        OVERRUNS.inc()
+        logger.warning(f"Resource tick overran its slot, merging {missed_slots} missed slots into the next tick")
+
+    def _wait(self, seconds: float) -> None:
+        """Sleep until the next slot is due, waking early on stop"""
+        self._stop_event.wait(seconds)
+
     def _run_loop(self, interval_seconds: float) -> None:
-        """Background loop that ticks every interval"""
+        """
+        Background loop that walks the time wheel on a fixed-rate clock.
+
+        One slot fires every interval / slots seconds against the service's clock, so the
+        period does not drift by the tick duration. When a tick overruns, the slots whose
+        deadlines were missed are ticked together in the next pass (at most one full
+        turn of the wheel) and the schedule skips ahead instead of falling behind.
+
+        Any backlog from downtime is caught up in chunks before the wheel starts. The tick
+        lag is sampled after the catch-up and again each time the wheel completes a turn.
+        """
+        self.catch_up()
+        self.record_lag()
+
+        slot_interval = interval_seconds / self.slots
+        next_fire = self._clock()
+        slot = 0
+
         while self.running:
+            delay = next_fire - self._clock()
+            if delay > 0:
+                self._wait(delay)
+                continue
+
+            due_slots = int(-delay // slot_interval) + 1
+            if due_slots > 1:
+                self._record_overrun(due_slots - 1)
+
+            slots = [(slot + i) % self.slots for i in range(min(due_slots, self.slots))]
             try:
-                self.tick_all_settlements()
+                self.tick_slots(slots)
             except Exception as e:
                 logger.error(f"Error in tick loop: {e}", exc_info=True)
-            
-            time.sleep(interval_seconds)
-    
+
+            if slot + due_slots >= self.slots:
+                self.record_lag()
+            slot = (slot + due_slots) % self.slots
+            next_fire += due_slots * slot_interval
+
     def start(self, interval_seconds=60) -> None:
         """Start the periodic resource tick"""
         if self.running:
             return
-        
+
         self.running = True
+        self._stop_event.clear()
         self.thread = threading.Thread(target=self._run_loop, args=(interval_seconds,), daemon=True)
         self.thread.start()
-        logger.info(f"Resource tick started (every {interval_seconds}s)")
-    
+        logger.info(f"Resource tick started (every {interval_seconds}s over {self.slots} slots)")
+
     def stop(self) -> None:
         """Stop the ticker"""
         self.running = False
+        self._stop_event.set()
         if self.thread:
             self.thread.join(timeout=5)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
         logger.info("ResourceTickService stopped")
 
 _tick_service = None
@@ -73,4 +382,4 @@ def get_tick_service() -> ResourceTickService:
     global _tick_service
     if _tick_service is None:
         _tick_service = ResourceTickService()
-    return _tick_service
\ No newline at end of file
+    return _tick_service
@@ -0,0 +1,132 @@
+import argparse
+from db.connection import connect_db
+
+TOTAL_RESOURCES = ("food", "wood", "stone", "silver", "gold")
+
+# Differences below this are float rounding from applying deltas, not drift
+TOTALS_TOLERANCE = 0.01
+
+def add_to_player_totals(cursor, player_id: int, deltas: dict) -> None:
+    """Add {resource: delta} to a player's totals row. Call alongside the settlement write."""
+    cursor.execute("""
+        UPDATE player_resource_totals
+        SET food = food + ?, wood = wood + ?, stone = stone + ?, silver = silver + ?, gold = gold + ?
+        WHERE player_id = ?
+    """, (*(deltas.get(resource, 0) for resource in TOTAL_RESOURCES), player_id))
+
+def add_batch_to_player_totals(cursor, batch_table: str) -> None:
+    """
+    Add a tick batch's gains to the players' totals.
+
+    batch_table has id, player_id and new_food/new_wood/new_stone/new_silver per settlement.
+    Must run before the batch is written to settlements, while they still hold the old amounts.
+    """
+    cursor.execute(f"""
+        UPDATE player_resource_totals AS t
+        SET food = t.food + d.food, wood = t.wood + d.wood,
+            stone = t.stone + d.stone, silver = t.silver + d.silver
+        FROM (
+            SELECT
+                b.player_id,
+                SUM(b.new_food - s.food) AS food,
+                SUM(b.new_wood - s.wood) AS wood,
+                SUM(b.new_stone - s.stone) AS stone,
+                SUM(b.new_silver - s.silver) AS silver
+            FROM {batch_table} AS b
+            JOIN settlements s ON s.id = b.id
+            GROUP BY b.player_id
+        ) AS d
+        WHERE t.player_id = d.player_id
+    """)
+
+def get_player_resource_totals(cursor, player_id: int) -> dict | None:
+    """A player's totals row: the resources summed over their settlements, and settlement_count."""
+    cursor.execute("""
+        SELECT food, wood, stone, silver, gold, settlement_count
+        FROM player_resource_totals
+        WHERE player_id = ?
+    """, (player_id,))
+    row = cursor.fetchone()
+    return dict(row) if row is not None else None
+
+def find_totals_mismatches(cursor) -> list[dict]:
+    """
+    Compare every totals row against SUM() over the player's settlements.
+
+    Returns:
+        list[dict]: player_id with the stored and summed values of each player whose
+        totals differ, including players missing a row and rows without settlements.
+    """
+    cursor.execute(f"""
+        SELECT
+            COALESCE(t.player_id, a.player_id) AS player_id,
+            t.food AS stored_food, t.wood AS stored_wood, t.stone AS stored_stone,
+            t.silver AS stored_silver, t.gold AS stored_gold, t.settlement_count AS stored_settlement_count,
+            COALESCE(a.food, 0) AS food, COALESCE(a.wood, 0) AS wood, COALESCE(a.stone, 0) AS stone,
+            COALESCE(a.silver, 0) AS silver, COALESCE(a.gold, 0) AS gold,
+            COALESCE(a.settlement_count, 0) AS settlement_count
+        FROM player_resource_totals t
+        FULL OUTER JOIN (
+            SELECT
+                player_id,
+                SUM(COALESCE(food, 0)) AS food, SUM(COALESCE(wood, 0)) AS wood,
+                SUM(COALESCE(stone, 0)) AS stone, SUM(COALESCE(silver, 0)) AS silver,
+                SUM(COALESCE(gold, 0)) AS gold, COUNT(*) AS settlement_count
+            FROM settlements
+            GROUP BY player_id
+        ) a ON a.player_id = t.player_id
+        WHERE t.player_id IS NULL
+           OR t.settlement_count != COALESCE(a.settlement_count, 0)
+           OR {" OR ".join(
+               f"ABS(t.{resource} - COALESCE(a.{resource}, 0)) > {TOTALS_TOLERANCE}" for resource in TOTAL_RESOURCES
+           )}
+        ORDER BY 1
+    """)
+    return [dict(row) for row in cursor.fetchall()]
+
+def rebuild_player_totals(cursor, player_ids: list[int]) -> None:
+    """Recompute the given players' totals rows from their settlements. Runs in the caller's transaction."""
+    for player_id in player_ids:
+        cursor.execute("DELETE FROM player_resource_totals WHERE player_id = ?", (player_id,))
+        cursor.execute("""
+            INSERT INTO player_resource_totals (player_id, food, wood, stone, silver, gold, settlement_count)
+            SELECT
+                player_id,
+                SUM(COALESCE(food, 0)), SUM(COALESCE(wood, 0)), SUM(COALESCE(stone, 0)),
+                SUM(COALESCE(silver, 0)), SUM(COALESCE(gold, 0)), COUNT(*)
+            FROM settlements
+            WHERE player_id = ?
+            GROUP BY player_id
+        """, (player_id,))
+
+def check_player_totals(fix: bool = False, conn=None) -> list[dict]:
+    """
+    Consistency check of player_resource_totals, optionally rebuilding the rows that drifted.
+
+    Uses the given connection if provided (left open), otherwise opens and closes its own.
+    """
+    owns_conn = conn is None
+    if owns_conn:
+        conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        mismatches = find_totals_mismatches(cursor)
+        if fix and mismatches:
+            rebuild_player_totals(cursor, [row["player_id"] for row in mismatches])
+            conn.commit()
+        return mismatches
+    finally:
+        if owns_conn:
+            conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare player_resource_totals against the settlement SUMs")
+    parser.add_argument("--fix", action="store_true", help="rebuild the rows that differ")
+    args = parser.parse_args()
+
+    mismatches = check_player_totals(fix=args.fix)
+    for mismatch in mismatches:
+        print(mismatch)
+    print(f"{len(mismatches)} players with mismatched totals{' (rebuilt)' if args.fix and mismatches else ''}")
+
+#python3 -m systems.resources.resource_totals
@@ -1,28 +1,58 @@
 import json
+from datetime import datetime
 
 from db.connection import connect_db
-from database_operations.user_operations import get_player_id_for_user
+from systems.resources.accrual import lazy_accrual_enabled
+from systems.resources.resource_tick import RESOURCES, accrued_resource_sql, not_full_sql
+from systems.resources.resource_totals import TOTAL_RESOURCES, get_player_resource_totals
 
-def get_player_total_resources_for_user(user_id: int) -> dict:
-    """Calculate total resources for a user across all their settlements."""
-    player_id = get_player_id_for_user(user_id)
+def get_player_total_resources(player_id: int, conn=None, now: datetime | None = None) -> dict:
+    """
+    Calculate total resources for a player across all their settlements.
+
+    With the background tick running, the player_resource_totals row holds what the settlement
+    rows hold, and the production accrued since each settlement's last tick is added on top,
+    as get_player_settlements does. The time wheel spreads players over TICK_SLOTS and full
+    settlements are skipped, so the rows can be more than one tick old. With lazy accrual the
+    totals are summed per settlement, again including the accrued production.
+    Uses the given connection if provided (left open), otherwise opens and closes its own.
+    now projects the accrual to a given time instead of SQLite's current time.
+    """
+    owns_conn = conn is None
+    if owns_conn:
+        conn = connect_db()
 
-    conn = connect_db()
     cursor = conn.cursor()
+    now_sql = f"'{now.isoformat()}'" if now else "'now'"
 
-    cursor.execute("""
-        SELECT 
-            COALESCE(SUM(s.food), 0) as total_food,
-            COALESCE(SUM(s.wood), 0) as total_wood,
-            COALESCE(SUM(s.stone), 0) as total_stone,
-            COALESCE(SUM(s.silver), 0) as total_silver,
-            COALESCE(SUM(s.gold), 0) as total_gold
-        FROM settlements s
-        WHERE s.player_id = ?
-    """, (player_id,))
+    if lazy_accrual_enabled():
+        cursor.execute(f"""
+            SELECT 
+                COALESCE(SUM(s.food), 0) + COALESCE(SUM({accrued_resource_sql('food', now_sql)}), 0) as total_food,
+                COALESCE(SUM(s.wood), 0) + COALESCE(SUM({accrued_resource_sql('wood', now_sql)}), 0) as total_wood,
+                COALESCE(SUM(s.stone), 0) + COALESCE(SUM({accrued_resource_sql('stone', now_sql)}), 0) as total_stone,
+                COALESCE(SUM(s.silver), 0) + COALESCE(SUM({accrued_resource_sql('silver', now_sql)}), 0) as total_silver,
+                COALESCE(SUM(s.gold), 0) as total_gold
+            FROM settlements s
+            WHERE s.player_id = ?
+        """, (player_id,))
+        result = cursor.fetchone()
+    else:
+        totals = get_player_resource_totals(cursor, player_id) or dict.fromkeys(TOTAL_RESOURCES, 0)
+        # Full settlements accrue nothing, so only the others need the projection
+        cursor.execute(f"""
+            SELECT {", ".join(f"COALESCE(SUM({accrued_resource_sql(resource, now_sql)}), 0) AS {resource}" for resource in RESOURCES)}
+            FROM settlements s
+            WHERE s.player_id = ? AND {not_full_sql()}
+        """, (player_id,))
+        accrued = cursor.fetchone()
+        result = {
+            f"total_{resource}": totals[resource] + (accrued[resource] if resource in RESOURCES else 0)
+            for resource in TOTAL_RESOURCES
+        }
 
-    result = cursor.fetchone()
-    conn.close()
+    if owns_conn:
+        conn.close()
 
     return {
         'total_food': int(result['total_food']),
@@ -31,4 +61,3 @@ def get_player_total_resources_for_user(user_id: int) -> dict:
         'total_silver': int(result['total_silver']),
         'total_gold': int(result['total_gold'])
     }
-
@@ -1,11 +1,12 @@
 from db.connection import connect_db
-from database_operations.user_operations import get_player_id_for_user
+from db.static_data import get_static_data
 
-def get_settlement_garrison(settlement_id: int, user_id: int) -> dict | None:
-    """Retrieve garrison details for a settlement owned by the user."""
-    player_id = get_player_id_for_user(user_id)
+def get_settlement_garrison(settlement_id: int, player_id: int, conn=None) -> dict | None:
+    """Retrieve garrison details for a settlement owned by the player."""
+    owns_conn = conn is None
+    if owns_conn:
+        conn = connect_db()
     
-    conn = connect_db()
     cursor = conn.cursor()
     
     # Verify settlement belongs to player
@@ -15,24 +16,23 @@ def get_settlement_garrison(settlement_id: int, user_id: int) -> dict | None:
     
     result = cursor.fetchone()
     if not result or result[0] != player_id:
-        conn.close()
+        if owns_conn:
+            conn.close()
         return None
     
     # Get garrison units
     cursor.execute("""
         SELECT 
             sg.unit_type,
-            sg.quantity,
-            ut.attack,
-            ut.defense,
-            ut.health
+            sg.quantity
         FROM settlement_garrisons sg
-        JOIN unit_types ut ON ut.unit_type = sg.unit_type
         WHERE sg.settlement_id = ?
     """, (settlement_id,))
     
     rows = cursor.fetchall()
-    conn.close()
+    unit_types = get_static_data(conn).unit_types
+    if owns_conn:
+        conn.close()
     
     total_units = 0
     total_attack = 0
@@ -41,7 +41,16 @@ def get_settlement_garrison(settlement_id: int, user_id: int) -> dict | None:
     units = []
     
     for row in rows:
-        unit_data = dict(row)
+        unit_type = unit_types.get(row['unit_type'])
+        if unit_type is None:
+            continue
+        unit_data = {
+            'unit_type': row['unit_type'],
+            'quantity': row['quantity'],
+            'attack': unit_type.attack,
+            'defense': unit_type.defense,
+            'health': unit_type.health
+        }
         quantity = unit_data['quantity']
         
         total_units += quantity
@@ -1,34 +1,37 @@
+from datetime import datetime
 from db.connection import connect_db
-from database_operations.user_operations import get_player_id_for_user
 from database_operations.database_operations import resolve_settlement_type_names, resolve_settlement_type_ids
+from systems.resources.resource_tick import accrued_resource_sql
 
-def get_player_settlements_for_user(user_id: int) -> list[dict]:
-    """Retrieve all settlements for a given user."""
+def get_player_settlements(player_id: int, conn=None, now: datetime | None = None) -> list[dict]:
+    """Retrieve all settlements of a player, with resources accrued up to now (the current time by default)."""
     
-    player_id = get_player_id_for_user(user_id)
+    owns_conn = conn is None
+    if owns_conn:
+        conn = connect_db()
 
-    conn = connect_db()
     cursor = conn.cursor()
+    now_sql = f"'{now.isoformat()}'" if now else "'now'"
 
-    cursor.execute("""
+    cursor.execute(f"""
         SELECT
-            id,
-            name,
-            settlement_type_id,
-            x,
-            y,
-            food,
-            wood,
-            stone,
-            silver,
-            gold,
-            created_at
-        FROM settlements
-        WHERE player_id = ?
-        ORDER BY created_at ASC
+            s.id,
+            s.name,
+            s.settlement_type_id,
+            s.x,
+            s.y,
+            s.food + {accrued_resource_sql('food', now_sql)} AS food,
+            s.wood + {accrued_resource_sql('wood', now_sql)} AS wood,
+            s.stone + {accrued_resource_sql('stone', now_sql)} AS stone,
+            s.silver + {accrued_resource_sql('silver', now_sql)} AS silver,
+            s.gold,
+            s.created_at
+        FROM settlements s
+        WHERE s.player_id = ?
+        ORDER BY s.created_at ASC
     """, (player_id,))
     
-    settlement_type_names = resolve_settlement_type_names()
+    settlement_type_names = resolve_settlement_type_names(conn)
     
     settlements = []
     for row in cursor.fetchall():
@@ -45,6 +48,7 @@ def get_player_settlements_for_user(user_id: int) -> list[dict]:
         
         settlements.append(row_dict)
 
-    conn.close()
+    if owns_conn:
+        conn.close()
 
     return settlements
\ No newline at end of file
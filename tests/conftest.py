@@ -0,0 +1,34 @@
+import sqlite3
+import pytest
+from db.init_db import init_db
+from db.seed import seed_db
+
+
+@pytest.fixture
+def db_conn():
+    """In-memory database with the full schema and seed data"""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON;")
+    init_db(conn)
+    seed_db(conn)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    """Seeded database file and a factory for connections to it"""
+    path = tmp_path / "riseandfall.db"
+
+    def connect():
+        conn = sqlite3.connect(str(path))
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON;")
+        return conn
+
+    conn = connect()
+    init_db(conn)
+    seed_db(conn)
+    conn.close()
+    return connect
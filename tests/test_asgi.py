@@ -0,0 +1,119 @@
+import asyncio
+from pathlib import Path
+from unittest.mock import patch
+import pytest
+from flask import Flask
+from auth_tokens.auth_tokens import create_token
+from auth_tokens.token_cache import get_token_cache
+from db import connection, pool
+from db.async_db import AsyncDatabase
+
+
+def _call(app, method, path, cookie=None, body=b"", content_type=None, origin=None, with_headers=False):
+    """Drive an ASGI app for one request; returns (status, body), plus the response headers with with_headers."""
+    headers = [(b"host", b"test")]
+    if origin:
+        headers.append((b"origin", origin.encode()))
+    if cookie:
+        headers.append((b"cookie", f"auth_token={cookie}".encode()))
+    if content_type:
+        headers.append((b"content-type", content_type.encode()))
+    scope = {"type": "http", "method": method, "path": path, "query_string": b"", "headers": headers,
+             "server": ("test", 80), "client": ("127.0.0.1", 1234), "scheme": "http"}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    status, body = sent[0]["status"], b"".join(m.get("body", b"") for m in sent[1:])
+    if with_headers:
+        return status, body, {name.decode(): value.decode() for name, value in sent[0]["headers"]}
+    return status, body
+
+
+@pytest.fixture
+def apps(db_file, tmp_path):
+    # Imported here, not at module level: test_endpoints patches require_auth before importing the blueprints
+    from asgi import AsgiApp
+    from routes.army import army_bp
+    from routes.resources import resource_bp
+    from routes.settlements import settlement_bp
+
+    # connect_db itself, so rows come back with the production type conversions
+    with patch.object(connection, "DB_PATH", Path(tmp_path / "riseandfall.db")):
+        connections = pool.ConnectionPool(size=4)
+        wsgi_app = Flask(__name__)
+        pool.init_app(wsgi_app, connections, connections)
+        for blueprint in (resource_bp, settlement_bp, army_bp):
+            wsgi_app.register_blueprint(blueprint)
+
+        async_db = AsyncDatabase(workers=2, reader_pool=connections, pool=connections)
+        get_token_cache().clear()
+        with patch("asgi.get_async_db", return_value=async_db):
+            yield wsgi_app, AsgiApp(wsgi_app, wsgi_threads=2)
+        async_db.close()
+        connections.close()
+
+
+class TestAsgi:
+
+    @pytest.mark.parametrize("path", ["/total_resources", "/my_settlements", "/my_army_units", "/garrison_units"])
+    def test_async_routes_match_flask(self, apps, path):
+        wsgi_app, asgi_app = apps
+        token = create_token(1, 1)
+        client = wsgi_app.test_client()
+        client.set_cookie("auth_token", token)
+        expected = client.get(path)
+
+        status, body = _call(asgi_app, "GET", path, token)
+
+        assert status == expected.status_code == 200
+        assert wsgi_app.json.loads(body) == expected.get_json()
+
+    def test_unauthorized(self, apps):
+        _, asgi_app = apps
+        assert _call(asgi_app, "GET", "/total_resources")[0] == 401
+        assert _call(asgi_app, "GET", "/total_resources", "not-a-token")[0] == 401
+
+    def test_other_paths_fall_through_to_flask(self, apps):
+        wsgi_app, asgi_app = apps
+
+        @wsgi_app.route("/echo", methods=["POST"])
+        def echo():
+            from flask import request
+            return {"got": request.get_json()}, 201
+
+        status, body = _call(asgi_app, "POST", "/echo", body=b'{"a": 1}', content_type="application/json")
+        assert status == 201
+        assert wsgi_app.json.loads(body) == {"got": {"a": 1}}
+
+    def test_native_routes_get_the_apps_cors_headers(self, apps):
+        from flask_cors import CORS
+
+        wsgi_app, asgi_app = apps
+        # As configured in app.py
+        CORS(wsgi_app, resources={r"/*": {"origins": "http://localhost:3000"}}, supports_credentials=True)
+
+        @wsgi_app.route("/bridged")
+        def bridged():
+            return {}
+
+        token = create_token(1, 1)
+        for path in ("/total_resources", "/bridged"):
+            status, _, headers = _call(asgi_app, "GET", path, token, origin="http://localhost:3000", with_headers=True)
+            assert status == 200
+            assert headers["access-control-allow-origin"] == "http://localhost:3000"
+            assert headers["access-control-allow-credentials"] == "true"
+            assert headers["content-type"] == "application/json"
+
+        _, _, headers = _call(asgi_app, "GET", "/total_resources", token, origin="http://evil.example", with_headers=True)
+        assert "access-control-allow-origin" not in headers
+
+        # Errors from native routes carry the headers too, so the client can read them
+        status, _, headers = _call(asgi_app, "GET", "/total_resources", origin="http://localhost:3000", with_headers=True)
+        assert status == 401
+        assert headers["access-control-allow-origin"] == "http://localhost:3000"
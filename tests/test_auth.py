@@ -0,0 +1,300 @@
+import threading
+import time
+from datetime import datetime, timedelta
+import jwt
+import pytest
+from unittest.mock import patch
+from flask import Flask, jsonify, request
+from auth_decorator.auth_decorator import require_auth
+from auth_tokens.auth_tokens import create_token
+from auth_tokens.decode_token import decode_token
+from auth_tokens.passwords import PasswordHasher, PasswordHasherBusy
+from auth_tokens.token_cache import (AUTH_SESSION_CHECK_SECONDS, CACHE_HITS, CACHE_MISSES, RevokedTokenError,
+                                     VerifiedTokenCache, get_token_cache, revoke_token, verify_token)
+from database_operations import user_operations
+from database_operations.session_operations import (SESSION_DAYS, create_session, is_session_active, refresh_session,
+                                                    revoke_session, revoke_session_id)
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+
+    @app.route("/whoami")
+    @require_auth
+    def whoami():
+        return jsonify({"user_id": request.user_id, "player_id": request.player_id}), 200
+
+    user_operations.clear_player_id_cache()
+    get_token_cache().clear()
+    yield app.test_client()
+    user_operations.clear_player_id_cache()
+    get_token_cache().clear()
+
+
+class TestRequireAuth:
+
+    def test_player_id_claim_skips_lookup(self, client):
+        client.set_cookie("auth_token", create_token(3, 30))
+
+        with patch("database_operations.user_operations.get_player_id_for_user") as lookup:
+            response = client.get("/whoami")
+
+        assert response.json == {"user_id": 3, "player_id": 30}
+        lookup.assert_not_called()
+
+    def test_legacy_token_resolves_player_once(self, client):
+        client.set_cookie("auth_token", create_token(4))
+
+        with patch("auth_decorator.auth_decorator.get_db"), \
+                patch("database_operations.user_operations.get_player_id_for_user", return_value=40) as lookup:
+            assert client.get("/whoami").json["player_id"] == 40
+            assert client.get("/whoami").json["player_id"] == 40
+
+        assert lookup.call_count == 1
+
+    def test_player_id_cache_is_bounded(self):
+        user_operations.clear_player_id_cache()
+        with patch.object(user_operations, "PLAYER_ID_CACHE_SIZE", 2), \
+                patch("database_operations.user_operations.get_player_id_for_user", side_effect=lambda u, c: u * 10) as lookup:
+            for user_id in (1, 2, 1, 3, 1, 2):
+                assert user_operations.get_cached_player_id_for_user(user_id) == user_id * 10
+
+        # 2 was evicted by 3 (1 was used more recently), so it is looked up again
+        assert [call.args[0] for call in lookup.call_args_list] == [1, 2, 3, 2]
+        user_operations.clear_player_id_cache()
+
+    def test_invalid_token(self, client):
+        client.set_cookie("auth_token", "not-a-token")
+        assert client.get("/whoami").status_code == 401
+
+    def test_repeated_requests_hit_the_token_cache(self, client):
+        client.set_cookie("auth_token", create_token(5, 50))
+        hits, misses = CACHE_HITS.value(), CACHE_MISSES.value()
+
+        with patch("auth_tokens.token_cache.jwt.decode", wraps=jwt.decode) as decode:
+            for _ in range(3):
+                assert client.get("/whoami").json["player_id"] == 50
+
+        assert decode.call_count == 1
+        assert (CACHE_HITS.value() - hits, CACHE_MISSES.value() - misses) == (2, 1)
+
+    def test_revoked_token_is_rejected(self, client):
+        token = create_token(6, 60)
+        client.set_cookie("auth_token", token)
+        assert client.get("/whoami").status_code == 200
+
+        revoke_token(token)
+
+        assert client.get("/whoami").status_code == 401
+        assert decode_token(token) is None
+        assert decode_token(create_token(7, 70)) == 7
+
+
+class TestVerifiedTokenCache:
+
+    def test_entries_expire_with_the_token(self):
+        cache = VerifiedTokenCache(size=10, max_seconds=300)
+        now = time.time()
+        cache.put(b"a", {"user_id": 1, "exp": now + 10}, now)
+        cache.put(b"b", {"user_id": 2, "exp": now + 1000}, now)
+
+        assert cache.get(b"a", now + 9) == {"user_id": 1, "exp": now + 10}
+        assert cache.get(b"a", now + 10) is None
+        # Capped at max_seconds even though exp is later
+        assert cache.get(b"b", now + 299) is not None
+        assert cache.get(b"b", now + 300) is None
+
+    def test_session_tokens_are_rechecked_sooner(self):
+        cache = VerifiedTokenCache(size=10, max_seconds=300)
+        now = time.time()
+        cache.put(b"s", {"user_id": 1, "sid": 5, "exp": now + 900}, now, max_seconds=AUTH_SESSION_CHECK_SECONDS)
+
+        assert cache.get(b"s", now + AUTH_SESSION_CHECK_SECONDS - 1) is not None
+        assert cache.get(b"s", now + AUTH_SESSION_CHECK_SECONDS) is None
+
+    def test_cache_is_bounded(self):
+        cache = VerifiedTokenCache(size=2)
+        now = time.time()
+        for digest in (b"a", b"b", b"c"):
+            cache.put(digest, {"exp": now + 60}, now)
+
+        assert cache.get(b"a", now) is None
+        assert cache.get(b"c", now) is not None
+
+
+class TestPasswordHasher:
+
+    def test_hash_and_check(self):
+        hasher = PasswordHasher(workers=1, queue_size=1, method="pbkdf2:sha256:1000")
+        password_hash = hasher.hash("correct horse")
+
+        assert password_hash.startswith("pbkdf2:sha256:1000$")
+        assert hasher.check(password_hash, "correct horse") is True
+        assert hasher.check(password_hash, "battery staple") is False
+        assert hasher.in_flight() == 0
+        hasher.shutdown()
+
+    def test_full_queue_is_rejected_immediately(self):
+        hasher = PasswordHasher(workers=1, queue_size=1)
+        release = threading.Event()
+        blocked = [threading.Thread(target=hasher._run, args=("hash", release.wait)) for _ in range(2)]
+        for thread in blocked:
+            thread.start()
+        while hasher.in_flight() < 2:
+            time.sleep(0.001)
+
+        with pytest.raises(PasswordHasherBusy):
+            hasher.hash("one too many")
+
+        release.set()
+        for thread in blocked:
+            thread.join()
+        assert hasher.in_flight() == 0
+        hasher.shutdown()
+
+    def test_timed_out_hash_is_busy(self):
+        hasher = PasswordHasher(workers=1, queue_size=1, timeout=0.05)
+        release = threading.Event()
+        outcomes = []
+
+        def occupy_worker():
+            try:
+                hasher._run("hash", release.wait)
+            except PasswordHasherBusy:
+                outcomes.append("busy")
+
+        blocked = threading.Thread(target=occupy_worker)
+        blocked.start()
+        while hasher.in_flight() < 1:
+            time.sleep(0.001)
+
+        with pytest.raises(PasswordHasherBusy):
+            hasher.hash("queued too long")
+
+        release.set()
+        blocked.join()
+        assert outcomes == ["busy"]
+        deadline = time.monotonic() + 1
+        while hasher.in_flight() and time.monotonic() < deadline:
+            time.sleep(0.001)  # the abandoned hash finishes on the worker
+        assert hasher.in_flight() == 0
+        hasher.shutdown()
+
+    def test_login_answers_503_when_busy(self):
+        from routes.login import login_bp
+
+        app = Flask(__name__)
+        app.register_blueprint(login_bp)
+        with patch("routes.login.authenticate_user", side_effect=PasswordHasherBusy()):
+            response = app.test_client().post("/login", json={"email": "a@example.com", "password": "x"})
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+
+
+@pytest.fixture
+def session_user(db_conn):
+    db_conn.execute("INSERT INTO users (id, username, email, password_hash) VALUES (800, 'sess', 's@example.com', 'x')")
+    db_conn.commit()
+    return 800
+
+
+def _cookie(response, name):
+    for header in response.headers.getlist("Set-Cookie"):
+        if header.startswith(f"{name}="):
+            return header.split(";")[0].split("=", 1)[1]
+    return None
+
+
+class TestSessions:
+
+    def test_refresh_rotates_and_slides(self, db_conn, session_user):
+        cursor = db_conn.cursor()
+        now = datetime(2025, 1, 1)
+        session = create_session(cursor, session_user, 8, now)
+
+        later = now + timedelta(days=SESSION_DAYS - 1)
+        refreshed = refresh_session(cursor, session["refresh_token"], later)
+        assert (refreshed["session_id"], refreshed["user_id"], refreshed["player_id"]) == (session["session_id"], 800, 8)
+
+        # The old token was rotated out; the new one is valid a full SESSION_DAYS after the refresh
+        assert refresh_session(cursor, session["refresh_token"], later) is None
+        assert refresh_session(cursor, refreshed["refresh_token"], later + timedelta(days=SESSION_DAYS + 1)) is None
+        assert refresh_session(cursor, refreshed["refresh_token"], later + timedelta(days=SESSION_DAYS - 1)) is not None
+
+    def test_revoked_session_cannot_refresh(self, db_conn, session_user):
+        cursor = db_conn.cursor()
+        session = create_session(cursor, session_user, 8)
+        revoke_session(cursor, session["refresh_token"])
+
+        assert refresh_session(cursor, session["refresh_token"]) is None
+        # Starting the next session clears the revoked one
+        create_session(cursor, session_user, 8)
+        assert cursor.execute("SELECT COUNT(*) FROM sessions WHERE user_id = 800").fetchone()[0] == 1
+
+    def test_login_refresh_logout(self, db_conn, session_user):
+        from routes.login import login_bp
+        from routes.logout import logout_bp
+        from routes.refresh import refresh_bp
+
+        app = Flask(__name__)
+        for blueprint in (login_bp, logout_bp, refresh_bp):
+            app.register_blueprint(blueprint)
+        client = app.test_client()
+        run_here = lambda fn, *args: fn(db_conn.cursor(), *args)
+        user = {"id": session_user, "username": "sess", "email": "s@example.com", "player_id": 8}
+
+        with patch("routes.login.authenticate_user", return_value=user) as authenticate, \
+                patch("routes.login.execute_write", run_here), \
+                patch("routes.refresh.execute_write", run_here), \
+                patch("routes.logout.execute_write", run_here):
+            login = client.post("/login", json={"email": "s@example.com", "password": "x"})
+            assert login.status_code == 200
+            first_refresh_token = _cookie(login, "refresh_token")
+
+            for _ in range(3):
+                response = client.post("/refresh")
+                assert response.status_code == 200
+                claims = jwt.decode(_cookie(response, "auth_token"), options={"verify_signature": False})
+                assert (claims["user_id"], claims["player_id"]) == (session_user, 8)
+            assert authenticate.call_count == 1
+
+            client.set_cookie("refresh_token", first_refresh_token)
+            assert client.post("/refresh").status_code == 401
+
+            second_login = client.post("/login", json={"email": "s@example.com", "password": "x"})
+            second_refresh_token = _cookie(second_login, "refresh_token")
+            client.delete_cookie("refresh_token")
+            assert client.post("/logout").status_code == 200
+            client.set_cookie("refresh_token", second_refresh_token)
+            assert client.post("/refresh").status_code == 401
+
+        # Without the refresh cookie, logout still ended the session through the access token's sid
+        sid = jwt.decode(_cookie(second_login, "auth_token"), options={"verify_signature": False})["sid"]
+        assert is_session_active(sid, db_conn) is False
+
+    def test_logout_reaches_other_processes_through_the_session(self, db_conn, session_user):
+        session = create_session(db_conn.cursor(), session_user, 8)
+        token = create_token(session_user, 8, session["session_id"])
+        # Two worker processes; the second never caches, so it sees the session as it is now
+        first, second = VerifiedTokenCache(), VerifiedTokenCache(max_seconds=0)
+
+        for cache in (first, second):
+            with patch("auth_tokens.token_cache._token_cache", cache):
+                assert verify_token(token, db_conn)["sid"] == session["session_id"]
+
+        # Logout handled by the first process
+        with patch("auth_tokens.token_cache._token_cache", first):
+            revoke_token(token)
+        revoke_session_id(db_conn.cursor(), session["session_id"])
+
+        for cache in (first, second):
+            with patch("auth_tokens.token_cache._token_cache", cache), pytest.raises(RevokedTokenError):
+                verify_token(token, db_conn)
+
+        # A session deleted at a later login counts as ended too
+        other = create_session(db_conn.cursor(), session_user, 8)
+        db_conn.execute("DELETE FROM sessions WHERE id = ?", (other["session_id"],))
+        with patch("auth_tokens.token_cache._token_cache", VerifiedTokenCache()), pytest.raises(RevokedTokenError):
+            verify_token(create_token(session_user, 8, other["session_id"]), db_conn)
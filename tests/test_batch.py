@@ -0,0 +1,98 @@
+import re
+from functools import partial
+from pathlib import Path
+from unittest.mock import patch
+import pytest
+from flask import Flask
+from auth_tokens.auth_tokens import create_token
+from auth_tokens.token_cache import get_token_cache
+from db import connection, pool
+
+READ_PATHS = ["/total_resources", "/my_settlements", "/my_army_units", "/garrison_units",
+              "/get_research_data", "/get_neighbors"]
+
+
+@pytest.fixture
+def client(db_file, tmp_path):
+    # Imported here, not at module level: test_endpoints patches require_auth before importing the blueprints
+    from routes.army import army_bp
+    from routes.batch import batch_bp
+    from routes.neighbors import neighbors
+    from routes.research import research
+    from routes.resources import resource_bp
+    from routes.settlements import settlement_bp
+
+    with patch.object(connection, "DB_PATH", Path(tmp_path / "riseandfall.db")):
+        connection.connect_db().close()  # switches the file to WAL, so readers keep their snapshot
+        readers = pool.ConnectionPool(size=2, factory=partial(connection.connect_db, check_same_thread=False,
+                                                              read_only=True))
+        writers = pool.ConnectionPool(size=2)
+        app = Flask(__name__)
+        pool.init_app(app, writers, readers)
+        for blueprint in (army_bp, batch_bp, neighbors, research, resource_bp, settlement_bp):
+            app.register_blueprint(blueprint)
+
+        get_token_cache().clear()
+        client = app.test_client()
+        client.set_cookie("auth_token", create_token(1, 1))
+        yield client
+        readers.close()
+        writers.close()
+
+
+class TestBatch:
+
+    def test_matches_the_individual_endpoints(self, client):
+        response = client.post("/batch", json={"requests": [{"path": path} for path in READ_PATHS]})
+
+        assert response.status_code == 200
+        responses = response.get_json()["responses"]
+        assert [item["path"] for item in responses] == READ_PATHS
+        for item in responses:
+            expected = client.get(item["path"])
+            assert item["status"] == expected.status_code == 200
+            assert item["body"] == expected.get_json()
+            assert item["duration_ms"] >= 0
+
+    def test_per_item_errors(self, client):
+        response = client.post("/batch", json={"requests": [
+            {"path": "/settlement_garrison/999999"},
+            {"path": "/nope"},
+            {"path": "/unlock_research_node", "method": "POST"},
+            {"path": "/my_army_units", "method": "POST"},
+            "not an object",
+            {"path": "/total_resources"},
+        ]})
+
+        assert response.status_code == 200
+        assert [item["status"] for item in response.get_json()["responses"]] == [404, 404, 404, 405, 404, 200]
+
+    @pytest.mark.parametrize("body", [{}, {"requests": []}, {"requests": "/total_resources"},
+                                      {"requests": [{"path": "/total_resources"}] * 21}])
+    def test_rejects_malformed_batches(self, client, body):
+        assert client.post("/batch", json=body).status_code == 400
+
+    def test_requires_auth(self, client):
+        client.delete_cookie("auth_token")
+        assert client.post("/batch", json={"requests": [{"path": "/total_resources"}]}).status_code == 401
+
+    def test_sub_requests_share_one_snapshot(self, client):
+        from routes import batch
+
+        def commit_elsewhere(player_id, conn=None):
+            writer = connection.connect_db()
+            writer.execute("UPDATE settlements SET name = 'renamed' WHERE player_id = ?", (player_id,))
+            writer.commit()
+            writer.close()
+            return {}, 200
+
+        routes = batch.READ_ROUTES + [(re.compile(r"^/commit_elsewhere$"), commit_elsewhere)]
+        with patch.object(batch, "READ_ROUTES", routes):
+            response = client.post("/batch", json={"requests": [
+                {"path": "/my_settlements"}, {"path": "/commit_elsewhere"}, {"path": "/my_settlements"}
+            ]})
+
+        before, _, after = response.get_json()["responses"]
+        assert "renamed" not in {s["name"] for s in before["body"]["settlements"]}
+        assert after["body"] == before["body"]
+        assert {s["name"] for s in client.get("/my_settlements").get_json()["settlements"]} == {"renamed"}
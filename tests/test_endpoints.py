@@ -3,14 +3,14 @@ import sqlite3
 from unittest.mock import Mock, patch, MagicMock, ANY
 from database_operations import database_operations
 from systems.unit_training import queue_unit_training
-from systems.resources.resources import get_player_total_resources_for_user
+from systems.resources.resources import get_player_total_resources
 from routes.army import get_army_units
 from flask import Flask
 from datetime import datetime, timedelta
 import json
 from functools import wraps
 
-# Create a mock auth decorator that sets user_id
+# Create a mock auth decorator that sets user_id and player_id
 def mock_require_auth(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -18,6 +18,8 @@ def mock_require_auth(f):
         # Set a default user_id for testing
         if not hasattr(request, 'user_id'):
             request.user_id = 1
+        # Tests pick the token's player_id with environ_base={'test.player_id': ...}
+        request.player_id = request.environ.get('test.player_id', 1)
         return f(*args, **kwargs)
     return decorated_function
 
@@ -44,11 +46,9 @@ def client(app):
 class TestEndpoints:
     """Test Flask API endpoints"""
     
-    @patch('routes.resources.get_player_id_for_user')
-    @patch('routes.resources.get_player_total_resources_for_user')
-    def test_get_total_resources_success(self, mock_get_resources, mock_get_player_id, client, app):
+    @patch('routes.resources.get_player_total_resources')
+    def test_get_total_resources_success(self, mock_get_resources, client, app):
         # Mock the functions
-        mock_get_player_id.return_value = 1
         mock_get_resources.return_value = {
             'total_food': 500,
             'total_wood': 300,
@@ -68,26 +68,22 @@ class TestEndpoints:
         assert data['silver'] == 50
         assert data['gold'] == 10
     
-    @patch('routes.resources.get_player_id_for_user')
-    @patch('routes.resources.get_player_total_resources_for_user')
-    def test_get_total_resources_not_found(self, mock_get_resources, mock_get_player_id, client, app):
+    @patch('routes.resources.get_player_total_resources')
+    def test_get_total_resources_not_found(self, mock_get_resources, client, app):
         # Mock to return None
-        mock_get_player_id.return_value = 999
         mock_get_resources.return_value = None
         
-        response = client.get('/total_resources')
+        response = client.get('/total_resources', environ_base={'test.player_id': 999})
         
         assert response.status_code == 404
         assert 'error' in response.get_json()
         
     @patch('routes.settlements.require_auth', mock_require_auth)
-    @patch('routes.settlements.get_player_settlements_for_user')
-    @patch('routes.settlements.get_player_id_for_user')
+    @patch('routes.settlements.get_player_settlements')
     def test_get_my_settlements_success(
-        self, mock_get_player_id, mock_get_settlements, client
+        self, mock_get_settlements, client
     ):
         """Test successful retrieval of settlements."""
-        mock_get_player_id.return_value = 1
         mock_get_settlements.return_value = [
             {
                 "id": 1,
@@ -112,13 +108,11 @@ class TestEndpoints:
 
 
     @patch('routes.settlements.require_auth', mock_require_auth)
-    @patch('routes.settlements.get_player_settlements_for_user')
-    @patch('routes.settlements.get_player_id_for_user')
+    @patch('routes.settlements.get_player_settlements')
     def test_get_my_settlements_empty_list(
-        self, mock_get_player_id, mock_get_settlements, client
+        self, mock_get_settlements, client
     ):
         """Test when player has no settlements - returns only settlements array."""
-        mock_get_player_id.return_value = 1
         mock_get_settlements.return_value = []
         
         response = client.get('/my_settlements')
@@ -131,13 +125,11 @@ class TestEndpoints:
 
 
     @patch('routes.settlements.require_auth', mock_require_auth)
-    @patch('routes.settlements.get_player_settlements_for_user')
-    @patch('routes.settlements.get_player_id_for_user')
+    @patch('routes.settlements.get_player_settlements')
     def test_get_my_settlements_multiple_settlements(
-        self, mock_get_player_id, mock_get_settlements, client
+        self, mock_get_settlements, client
     ):
         """Test when player has multiple settlements."""
-        mock_get_player_id.return_value = 1
         mock_get_settlements.return_value = [
             {
                 "id": 1,
@@ -191,13 +183,11 @@ class TestEndpoints:
 
 
     @patch('routes.settlements.require_auth', mock_require_auth)
-    @patch('routes.settlements.get_player_settlements_for_user')
-    @patch('routes.settlements.get_player_id_for_user')
+    @patch('routes.settlements.get_player_settlements')
     def test_get_my_settlements_database_error(
-        self, mock_get_player_id, mock_get_settlements, client
+        self, mock_get_settlements, client
     ):
         """Test when database query raises an exception."""
-        mock_get_player_id.return_value = 1
         mock_get_settlements.side_effect = Exception("Database connection error")
         
         response = client.get('/my_settlements')
@@ -208,29 +198,25 @@ class TestEndpoints:
 
 
     @patch('routes.settlements.require_auth', mock_require_auth)
-    @patch('routes.settlements.get_player_settlements_for_user')
-    @patch('routes.settlements.get_player_id_for_user')
-    def test_get_my_settlements_player_id_error(
-        self, mock_get_player_id, mock_get_settlements, client
+    @patch('routes.settlements.get_player_settlements')
+    def test_get_my_settlements_uses_token_player_id(
+        self, mock_get_settlements, client
     ):
-        """Test when getting player ID raises an exception."""
-        mock_get_player_id.side_effect = Exception("User has no player")
+        """Test that the player_id from the token is used without another lookup."""
         mock_get_settlements.return_value = []
         
-        response = client.get('/my_settlements')
+        response = client.get('/my_settlements', environ_base={'test.player_id': 7})
         
-        assert response.status_code == 500
-        assert 'error' in response.json
+        assert response.status_code == 200
+        mock_get_settlements.assert_called_once_with(7, ANY)
 
 
     @patch('routes.settlements.require_auth', mock_require_auth)
-    @patch('routes.settlements.get_player_settlements_for_user')
-    @patch('routes.settlements.get_player_id_for_user')
+    @patch('routes.settlements.get_player_settlements')
     def test_get_my_settlements_verify_all_fields(
-        self, mock_get_player_id, mock_get_settlements, client
+        self, mock_get_settlements, client
     ):
         """Test that all settlement fields are returned correctly."""
-        mock_get_player_id.return_value = 42
         mock_get_settlements.return_value = [
             {
                 "id": 99,
@@ -247,7 +233,7 @@ class TestEndpoints:
             }
         ]
         
-        response = client.get('/my_settlements')
+        response = client.get('/my_settlements', environ_base={'test.player_id': 42})
         
         assert response.status_code == 200
         assert response.json['player_id'] == 42
@@ -267,13 +253,11 @@ class TestEndpoints:
 
 
     @patch('routes.settlements.require_auth', mock_require_auth)
-    @patch('routes.settlements.get_player_settlements_for_user')
-    @patch('routes.settlements.get_player_id_for_user')
+    @patch('routes.settlements.get_player_settlements')
     def test_get_my_settlements_zero_resources(
-        self, mock_get_player_id, mock_get_settlements, client
+        self, mock_get_settlements, client
     ):
         """Test settlements with zero resources."""
-        mock_get_player_id.return_value = 1
         mock_get_settlements.return_value = [
             {
                 "id": 1,
@@ -298,16 +282,14 @@ class TestEndpoints:
 
 
     @patch('routes.settlements.require_auth', mock_require_auth)
-    @patch('routes.settlements.get_player_settlements_for_user')
-    @patch('routes.settlements.get_player_id_for_user')
+    @patch('routes.settlements.get_player_settlements')
     def test_get_my_settlements_player_id_none(
-        self, mock_get_player_id, mock_get_settlements, client
+        self, mock_get_settlements, client
     ):
         """Test when player_id is None but get_settlements doesn't raise error."""
-        mock_get_player_id.return_value = None
         mock_get_settlements.return_value = []
         
-        response = client.get('/my_settlements')
+        response = client.get('/my_settlements', environ_base={'test.player_id': None})
         
         # Should return 200 with empty settlements since no exception is raised
         assert response.status_code == 200
@@ -315,13 +297,11 @@ class TestEndpoints:
 
 
     @patch('routes.settlements.require_auth', mock_require_auth)
-    @patch('routes.settlements.get_player_settlements_for_user')
-    @patch('routes.settlements.get_player_id_for_user')
+    @patch('routes.settlements.get_player_settlements')
     def test_get_my_settlements_settlement_types(
-        self, mock_get_player_id, mock_get_settlements, client
+        self, mock_get_settlements, client
     ):
         """Test different settlement types."""
-        mock_get_player_id.return_value = 1
         mock_get_settlements.return_value = [
             {
                 "id": 1,
@@ -0,0 +1,57 @@
+import subprocess
+import sys
+import time
+from services.leader import LeaderElection, LeaderLease
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+class TestLeaderLease:
+
+    def test_only_one_holder(self, tmp_path):
+        first, second = LeaderLease(tmp_path / "leader.lock"), LeaderLease(tmp_path / "leader.lock")
+
+        assert first.try_acquire() is True
+        assert second.try_acquire() is False
+        first.release()
+        assert second.try_acquire() is True
+        second.release()
+
+    def test_lease_fails_over_when_the_holder_dies(self, tmp_path):
+        path = tmp_path / "leader.lock"
+        holder = subprocess.Popen([
+            sys.executable, "-c",
+            f"from services.leader import LeaderLease; import time; assert LeaderLease({str(path)!r}).try_acquire();"
+            "print('held', flush=True); time.sleep(60)"
+        ], stdout=subprocess.PIPE, text=True)
+        assert holder.stdout.readline().strip() == "held"
+
+        lease = LeaderLease(path)
+        assert lease.try_acquire() is False
+        holder.kill()
+        holder.wait()
+        assert lease.try_acquire() is True
+        lease.release()
+
+    def test_election_runs_work_in_one_process_at_a_time(self, tmp_path):
+        events = []
+        elections = [
+            LeaderElection(lambda i=i: events.append(("elected", i)), lambda i=i: events.append(("resigned", i)),
+                           lease=LeaderLease(tmp_path / "leader.lock"), retry_seconds=0.01)
+            for i in range(2)
+        ]
+        elections[0].start()
+        _wait_for(lambda: elections[0].is_leader)
+        elections[1].start()
+        time.sleep(0.05)
+        assert not elections[1].is_leader
+
+        elections[0].stop()
+        _wait_for(lambda: elections[1].is_leader)
+        elections[1].stop()
+        assert events == [("elected", 0), ("resigned", 0), ("elected", 1), ("resigned", 1)]
@@ -0,0 +1,78 @@
+import pytest
+from unittest.mock import patch
+from db import maintenance
+from db.connection import apply_tuning_profile
+from db.maintenance import DatabaseMaintenanceService, incremental_vacuum, optimize, wal_size_bytes
+
+
+def _fill(conn, rows=2000):
+    conn.executemany(
+        "INSERT INTO players (username, is_npc) VALUES (?, 0)",
+        ((f"maintenance_{i}_{'x' * 200}",) for i in range(rows))
+    )
+    conn.commit()
+
+
+class TestDatabaseMaintenance:
+
+    def test_large_wal_is_truncated(self, db_file, tmp_path):
+        db_path = tmp_path / "riseandfall.db"
+        conn = db_file()
+        conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute("PRAGMA wal_autocheckpoint = 0;")
+        _fill(conn)
+        assert wal_size_bytes(db_path) > 0
+
+        service = DatabaseMaintenanceService(db_path=db_path)
+        with patch.object(maintenance, "WAL_TRUNCATE_BYTES", 1024):
+            done = service.run_once(conn)
+
+        assert done["checkpoint"]["busy"] == 0
+        assert wal_size_bytes(db_path) == 0
+        conn.close()
+
+    def test_small_wal_waits_for_the_checkpoint_interval(self, db_file, tmp_path):
+        db_path = tmp_path / "riseandfall.db"
+        conn = db_file()
+        conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute("PRAGMA wal_autocheckpoint = 0;")
+        _fill(conn, rows=10)
+
+        service = DatabaseMaintenanceService(db_path=db_path)
+        # Fixed times with a margin, so float rounding cannot land just under the interval
+        service._last_checkpoint = 1000.0
+        assert "checkpoint" not in service.run_once(conn, now=1001.0)
+        done = service.run_once(conn, now=1000.0 + maintenance.WAL_CHECKPOINT_SECONDS + 1)
+        assert done["checkpoint"]["checkpointed_frames"] == done["checkpoint"]["wal_frames"]
+        conn.close()
+
+    def test_first_optimize_analyzes(self, db_file):
+        conn = db_file()
+        _fill(conn, rows=10)
+
+        assert optimize(conn) is True
+        assert conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0] > 0
+        assert optimize(conn) is False
+        conn.close()
+
+    def test_incremental_vacuum_releases_free_pages(self, db_file):
+        conn = db_file()
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == maintenance.AUTO_VACUUM_INCREMENTAL
+        _fill(conn)
+        conn.execute("DELETE FROM players WHERE username LIKE 'maintenance_%'")
+        conn.commit()
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        assert free_pages > 10
+
+        assert incremental_vacuum(conn, max_pages=10) == 10
+        assert incremental_vacuum(conn) == free_pages - 10
+        assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+        conn.close()
+
+    def test_tuning_profiles(self, db_conn):
+        apply_tuning_profile(db_conn, "throughput")
+        assert db_conn.execute("PRAGMA cache_size").fetchone()[0] == -256 * 1024
+        assert db_conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+
+        with pytest.raises(ValueError, match="Unknown DB_TUNING_PROFILE"):
+            apply_tuning_profile(db_conn, "turbo")
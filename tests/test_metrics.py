@@ -0,0 +1,119 @@
+import os
+import pytest
+from unittest.mock import patch
+from datetime import datetime, timedelta
+from flask import Flask
+from metrics.registry import MetricsRegistry, get_registry
+from routes.metrics import metrics_bp
+
+
+class TestMetricsRegistry:
+
+    def test_render_prometheus(self):
+        registry = MetricsRegistry(prefix="test_")
+        registry.counter("requests_total", "Requests", ("route",)).inc(route="/a")
+        registry.counter("requests_total", "Requests", ("route",)).inc(2, route="/a")
+        registry.gauge("queue_depth", "Depth").set(3)
+        registry.summary("latency_seconds", "Latency").observe(0.5)
+
+        text = registry.render_prometheus()
+
+        assert '# TYPE test_requests_total counter' in text
+        assert 'test_requests_total{route="/a"} 3' in text
+        assert 'test_queue_depth 3' in text
+        assert 'test_latency_seconds_count 1' in text
+        assert 'test_latency_seconds_sum 0.5' in text
+
+    def test_gauge_function_errors_render_nan(self):
+        registry = MetricsRegistry(prefix="test_")
+        registry.gauge("broken", "Always fails").set_function(lambda: 1 / 0)
+
+        assert 'test_broken NaN' in registry.render_prometheus()
+
+    def test_counter_rejects_wrong_labels(self):
+        counter = MetricsRegistry().counter("c", "c", ("phase",))
+        with pytest.raises(ValueError):
+            counter.inc(other="x")
+
+
+class TestTickMetrics:
+
+    def test_bulk_tick_records_metrics(self, db_file):
+        from systems.resources import resource_tick_service as service_module
+
+        conn = db_file()
+        conn.execute("INSERT INTO players (username, is_npc) VALUES ('alice', 0)")
+        last_tick = (datetime.utcnow() - timedelta(hours=1)).isoformat()
+        conn.execute("""
+            INSERT INTO settlements (player_id, name, x, y, settlement_type_id, last_resource_tick)
+            VALUES ((SELECT id FROM players WHERE username = 'alice'), 'A', 0, 0, 1, ?)
+        """, (last_tick,))
+        conn.commit()
+        conn.close()
+
+        ticked_before = service_module.SETTLEMENTS_TICKED.value()
+        commits_before = service_module.TICK_PHASE_SECONDS.value(phase="commit")[0]
+
+        with patch.object(service_module, "connect_db", db_file):
+            service_module.ResourceTickService(slots=1).tick_all_settlements()
+            lag = service_module.oldest_tick_lag()
+
+        assert service_module.SETTLEMENTS_TICKED.value() == ticked_before + 1
+        assert service_module.XP_CREDITED.value() > 0
+        assert service_module.TICK_PHASE_SECONDS.value(phase="commit")[0] == commits_before + 1
+        assert lag < 60
+
+    def test_lag_is_sampled_by_the_tick_loop_not_the_scrape(self, db_file):
+        from systems.resources import resource_tick_service as service_module
+
+        with patch.object(service_module, "connect_db", db_file):
+            service_module.ResourceTickService(slots=1).record_lag()
+        sampled = service_module.TICK_LAG.value()
+
+        with patch.object(service_module, "connect_db", side_effect=AssertionError("queried at scrape")):
+            text = get_registry().render_prometheus()
+
+        assert f"riseandfall_resource_tick_lag_seconds {float(sampled)!r}\n" in text
+
+    def test_metrics_endpoint(self):
+        app = Flask(__name__)
+        app.register_blueprint(metrics_bp)
+        get_registry().counter("test_endpoint_total", "Endpoint test counter").inc()
+
+        response = app.test_client().get('/metrics')
+
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
+        assert f'riseandfall_test_endpoint_total{{pid="{os.getpid()}"}} 1'.encode() in response.data
+
+    def test_metrics_endpoint_is_loopback_only_without_a_token(self):
+        app = Flask(__name__)
+        app.register_blueprint(metrics_bp)
+
+        response = app.test_client().get('/metrics', environ_base={"REMOTE_ADDR": "203.0.113.5"})
+
+        assert response.status_code == 403
+
+    def test_metrics_endpoint_token(self):
+        from routes import metrics as metrics_module
+        app = Flask(__name__)
+        app.register_blueprint(metrics_bp)
+        client = app.test_client()
+
+        with patch.object(metrics_module, "METRICS_TOKEN", "scrape-secret"):
+            assert client.get('/metrics').status_code == 401
+            assert client.get('/metrics', headers={"Authorization": "Bearer wrong"}).status_code == 401
+            response = client.get('/metrics', headers={"Authorization": "Bearer scrape-secret"},
+                                  environ_base={"REMOTE_ADDR": "203.0.113.5"})
+
+        assert response.status_code == 200
+
+    def test_const_labels_are_added_to_every_series(self):
+        registry = MetricsRegistry(prefix="test_")
+        registry.counter("requests_total", "Requests", ("route",)).inc(route="/a")
+        registry.gauge("queue_depth", "Depth").set(3)
+
+        text = registry.render_prometheus({"pid": 42})
+
+        assert 'test_requests_total{route="/a",pid="42"} 1' in text
+        assert 'test_queue_depth{pid="42"} 3' in text
@@ -0,0 +1,80 @@
+import pytest
+from flask import Flask, request
+from db.pool import ConnectionPool, get_db, init_app
+from systems.resources.resources import get_player_total_resources
+
+
+class TestConnectionPool:
+
+    def test_reuses_and_bounds_connections(self, db_file):
+        pool = ConnectionPool(size=2, timeout=0.05, factory=db_file)
+
+        first = pool.acquire()
+        second = pool.acquire()
+        with pytest.raises(TimeoutError):
+            pool.acquire()
+
+        pool.release(first)
+        assert pool.acquire() is first
+        pool.release(first)
+        pool.release(second)
+        pool.close()
+
+    def test_release_rolls_back_open_transaction(self, db_file):
+        pool = ConnectionPool(size=1, factory=db_file)
+
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO players (username, is_npc) VALUES ('ghost', 0)")
+
+        with pool.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM players WHERE username = 'ghost'").fetchone()[0] == 0
+        pool.close()
+
+    def test_one_connection_per_request(self, db_file):
+        app = Flask(__name__)
+        pool = ConnectionPool(size=1, timeout=0.05, factory=db_file)
+        init_app(app, pool)
+
+        with app.app_context():
+            conn = get_db()
+            assert get_db() is conn
+            # Helpers given the request's connection leave it open
+            assert get_player_total_resources(-1, conn)["total_food"] == 0
+            assert conn.execute("SELECT 1").fetchone()[0] == 1
+
+        with app.app_context():
+            assert get_db() is conn
+        pool.close()
+
+    def test_get_requests_use_read_only_pool(self, db_file, tmp_path):
+        import sqlite3
+        from functools import partial
+        from pathlib import Path
+        from unittest.mock import patch
+        from db import connection
+
+        app = Flask(__name__)
+        seen = {}
+
+        @app.route("/probe", methods=["GET", "POST"])
+        def probe():
+            conn = get_db()
+            seen[request.method] = conn
+            try:
+                conn.execute("UPDATE players SET level = level")
+                return "wrote"
+            except sqlite3.OperationalError:
+                return "read only"
+
+        with patch.object(connection, "DB_PATH", Path(tmp_path / "riseandfall.db")):
+            reader_pool = ConnectionPool(size=1, factory=partial(connection.connect_db, read_only=True,
+                                                                 check_same_thread=False))
+            init_app(app, ConnectionPool(size=1, factory=db_file), reader_pool)
+            client = app.test_client()
+
+            assert client.get("/probe").data == b"read only"
+            assert client.post("/probe").data == b"wrote"
+            assert client.get("/probe").data == b"read only"
+
+        assert seen["GET"] is not seen["POST"]
+        reader_pool.close()
@@ -0,0 +1,178 @@
+"""
+Query-plan regression guard.
+
+Runs the system functions against a seeded database on connections that EXPLAIN
+QUERY PLAN every statement before executing it, and fails if a statement scans one
+of the large tables without an index. Statements that read a whole table on purpose
+are listed in INTENTIONAL_SCANS.
+"""
+import re
+import sqlite3
+from datetime import datetime, timedelta
+from unittest.mock import patch
+import pytest
+from db.init_db import init_db
+from db.seed import seed_db
+
+# Tables that grow with the number of players
+HOT_TABLES = {
+    "users", "players", "settlements", "settlement_modifiers", "settlement_garrisons",
+    "player_units", "player_research", "action_queue", "battle_reports",
+}
+
+# Statement fragment -> why the full scan is expected
+INTENTIONAL_SCANS = {
+    "p.is_npc = 0": "the background tick and its lag gauge visit every player settlement",
+    "SELECT * FROM players": "get_all_players lists every player",
+}
+
+# Hot statements in modules that cannot be imported in this tree (queue_processor
+# depends on combat/units/buildings systems that do not exist yet)
+UNIMPORTABLE_HOT_QUERIES = [
+    ("""
+        SELECT * FROM action_queue
+        WHERE status = 'pending'
+          AND end_time <= ?
+        ORDER BY end_time ASC
+    """, (datetime(2025, 1, 1).isoformat(),)),
+]
+
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN|UPDATE|INTO)\s+(?:temp\.|main\.)?(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.I)
+_CREATE_AS_SELECT = re.compile(r"^\s*CREATE\s+TEMP\s+TABLE\s+\w+\s+AS\s+(SELECT\b.*)$", re.I | re.S)
+
+
+class PlanRecorder:
+    """Collects full-table scans of hot tables seen while statements run"""
+
+    def __init__(self):
+        self.statements = 0
+        self.violations = []
+
+    def check(self, conn, sql, params):
+        match = _CREATE_AS_SELECT.match(sql)
+        if match:
+            sql = match.group(1)
+        if sql.lstrip().split(None, 1)[0].upper() not in ("SELECT", "UPDATE", "DELETE", "INSERT", "WITH"):
+            return
+
+        plan = [row[3] for row in sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", params)]
+        self.statements += 1
+
+        aliases = {}
+        for table, alias in _TABLE_REF.findall(sql):
+            aliases[table] = table
+            if alias and alias.upper() not in ("WHERE", "SET", "ON", "JOIN", "GROUP", "ORDER", "LIMIT", "VALUES"):
+                aliases[alias] = table
+
+        for detail in plan:
+            scan = re.match(r"SCAN (\w+)", detail)
+            if not scan or aliases.get(scan.group(1), scan.group(1)) not in HOT_TABLES:
+                continue
+            if any(fragment in sql for fragment in INTENTIONAL_SCANS):
+                continue
+            self.violations.append((" ".join(sql.split()), plan))
+
+
+class PlanCheckingCursor(sqlite3.Cursor):
+    def execute(self, sql, params=()):
+        self.connection.recorder.check(self.connection, sql, params)
+        return super().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        seq_of_params = list(seq_of_params)
+        if seq_of_params:
+            self.connection.recorder.check(self.connection, sql, seq_of_params[0])
+        return super().executemany(sql, seq_of_params)
+
+
+class PlanCheckingConnection(sqlite3.Connection):
+    recorder = None
+
+    def cursor(self, factory=PlanCheckingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+
+@pytest.fixture
+def plan_db(tmp_path):
+    """Factory for plan-checking connections to a seeded database, and their recorder"""
+    path = tmp_path / "plans.db"
+    recorder = PlanRecorder()
+
+    def connect():
+        conn = sqlite3.connect(str(path), factory=PlanCheckingConnection)
+        conn.row_factory = sqlite3.Row
+        conn.recorder = recorder
+        return conn
+
+    conn = sqlite3.connect(str(path))
+    init_db(conn)
+    seed_db(conn)
+    conn.execute("INSERT INTO users (username, email, password_hash) VALUES ('plan', 'plan@example.com', 'x')")
+    conn.execute("INSERT INTO players (user_id, username, level) VALUES (1, 'plan', 80)")
+    conn.execute("""
+        INSERT INTO settlements (player_id, name, x, y, settlement_type_id, food, wood, stone, silver,
+                                 last_resource_tick)
+        VALUES (last_insert_rowid(), 'Plan', 1, 1, 1, 9000, 9000, 9000, 4000, '2025-01-01T00:00:00')
+    """)
+    conn.commit()
+    conn.close()
+    return connect, recorder
+
+
+def test_hot_queries_use_indexes(plan_db):
+    from database_operations.user_operations import get_player_id_for_user
+    from database_operations.database_operations import resolve_npc_ids, resolve_settlement_type_names
+    from systems.resources.resources import get_player_total_resources
+    from systems.settlements.settlements import get_player_settlements
+    from systems.settlements.garrison import get_settlement_garrison
+    from systems.neighbors.neighbors import get_all_npc_settlements
+    from systems.army.army import get_player_armies
+    from systems.experience.experience import get_player_experience
+    from systems.research import research_nodes
+    from systems.resources.accrual import settle_player_resources, settle_settlement_resources
+    from systems.resources.production_rates import add_settlement_modifier, recompute_player_rates
+    from systems.resources.modifier_expiry import expire_due_modifiers, get_expiry_service
+    from systems.resources.resource_tick import apply_bulk_resource_tick, get_settlements_filling_up
+
+    connect, recorder = plan_db
+    conn = connect()
+    cursor = conn.cursor()
+    player_id = get_player_id_for_user(1, conn)
+    settlement_id = cursor.execute("SELECT id FROM settlements WHERE player_id = ?", (player_id,)).fetchone()[0]
+    now = datetime.utcnow()
+
+    # Request paths
+    get_player_total_resources(player_id, conn)
+    get_player_settlements(player_id, conn)
+    get_settlement_garrison(settlement_id, player_id, conn)
+    get_player_armies(player_id, conn)
+    get_all_npc_settlements(conn)
+    get_player_experience(player_id, conn)
+    resolve_npc_ids(conn)
+    resolve_settlement_type_names(conn)
+    research_nodes.get_all_research_nodes(conn)
+    research_nodes.fetch_research_nodes_unlocked(player_id, conn)
+
+    # Writes and their settle / rate recompute steps
+    settle_player_resources(cursor, player_id, now)
+    settle_settlement_resources(cursor, [settlement_id], now)
+    recompute_player_rates(cursor, player_id, now)
+    with patch.object(get_expiry_service(), "schedule"):
+        modifier_id = add_settlement_modifier(cursor, settlement_id, "food", 2.0, expires_at=now)
+    expire_due_modifiers(cursor, [modifier_id], now + timedelta(seconds=1))
+    get_settlements_filling_up(cursor, now, now + timedelta(days=1))
+    apply_bulk_resource_tick(cursor, now=now + timedelta(minutes=1), where="p.is_npc = 0")
+    conn.commit()
+
+    with patch("db.writer.connect_db", connect):
+        research_nodes.unlock_research_node(player_id, 1)
+
+    for sql, params in UNIMPORTABLE_HOT_QUERIES:
+        recorder.check(conn, sql, params)
+    conn.close()
+
+    assert recorder.statements > 30
+    assert recorder.violations == []
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+import pytest
+from storage.memory_repository import InMemoryRepository
+from storage.sqlite_repository import SQLiteRepository
+from systems.army.army import get_player_army
+from systems.research.research_nodes import unlock_research
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+COMPARED_COLUMNS = (
+    "name", "food", "wood", "stone", "silver", "gold", "last_resource_tick", "storage_full_at",
+    "current_food_rate", "current_wood_rate", "current_stone_rate", "current_silver_rate",
+)
+
+
+def _repositories(conn):
+    conn.execute("""
+        INSERT OR IGNORE INTO users (id, username, email, password_hash)
+        VALUES (900, 'repo_user', 'repo@example.com', 'x')
+    """)
+    return {"sqlite": SQLiteRepository(conn.cursor()), "memory": InMemoryRepository.from_sqlite(conn)}
+
+
+def _node_id(repo, name):
+    return next(node_id for node_id in range(1, 100) if (repo.get_research_node(node_id) or {}).get("name") == name)
+
+
+def _play(repo):
+    """The same scenario against either backend; returns what a caller could observe."""
+    player_id = repo.add_player("repo_player", user_id=900, level=2)
+    last_tick = (NOW - timedelta(hours=2)).isoformat()
+    settlement_ids = [
+        repo.add_settlement(player_id, "Capital", wood=400, silver=200, last_resource_tick=last_tick),
+        repo.add_settlement(player_id, "Granary", x=5, y=5, food=9990, last_resource_tick=last_tick),
+    ]
+    repo.set_player_units(player_id, "infantry", 40)
+    repo.set_player_units(player_id, "archer", 12)
+    repo.set_garrison(settlement_ids[0], "infantry", 15)
+    repo.set_garrison(settlement_ids[1], "infantry", 5)
+    repo.set_garrison(settlement_ids[1], "archer", 2)
+
+    tick = repo.tick_settlements(NOW - timedelta(hours=1))
+    player_tick = repo.tick_settlements(NOW, player_id=player_id)
+    unlock_research(repo, player_id, _node_id(repo, "Improved Farming"), now=NOW)
+    with pytest.raises(ValueError, match="already unlocked"):
+        unlock_research(repo, player_id, _node_id(repo, "Improved Farming"), now=NOW)
+    with pytest.raises(ValueError, match="Insufficient stone"):
+        unlock_research(repo, player_id, _node_id(repo, "Quarry Mastery"), now=NOW)
+
+    repo.enqueue_action(player_id, settlement_ids[0], "train", "{}", NOW, NOW + timedelta(minutes=5))
+    first = repo.enqueue_action(player_id, settlement_ids[0], "build", "{}", NOW, NOW + timedelta(minutes=1))
+    repo.enqueue_action(player_id, settlement_ids[1], "march", "{}", NOW, NOW + timedelta(hours=1))
+    due_before = [action["action_type"] for action in repo.due_actions(NOW + timedelta(minutes=10))]
+    repo.complete_action(first)
+    due_after = [action["action_type"] for action in repo.due_actions(NOW + timedelta(minutes=10))]
+
+    player = repo.get_player(player_id)
+    army = get_player_army(repo, player_id)
+    return {
+        "tick": {key: tick[key] for key in ("players", "xp_credited")},
+        "player_tick": player_tick,
+        "player": (player["level"], player["experience"], repo.get_player_id_for_user(900) == player_id),
+        "research": len(repo.get_unlocked_research(player_id)),
+        "totals": {key: pytest.approx(value) for key, value in repo.get_resource_totals(player_id).items()},
+        "settlements": [
+            {column: settlement[column] for column in COMPARED_COLUMNS}
+            for settlement in repo.get_player_settlements(player_id)
+        ],
+        "army": {key: value for key, value in army.items() if key != "player_id"},
+        "actions": (due_before, due_after),
+    }
+
+
+class TestRepositories:
+
+    def test_backends_agree(self, db_conn):
+        results = {name: _play(repo) for name, repo in _repositories(db_conn).items()}
+
+        assert results["memory"] == results["sqlite"]
+        observed = results["memory"]
+        assert observed["actions"] == (["build", "train"], ["train"])
+        assert observed["army"]["standing_army"]["total_units"] == 30
+        assert observed["settlements"][0]["current_food_rate"] == pytest.approx(75.0)
+        assert observed["settlements"][1]["food"] == 10000
+        assert observed["research"] == 1
+
+    def test_full_storage_is_skipped_by_the_background_tick(self, db_conn):
+        for repo in _repositories(db_conn).values():
+            player_id = repo.add_player("full_player")
+            settlement_id = repo.add_settlement(
+                player_id, "Full", food=10000, wood=10000, stone=10000, silver=5000,
+                last_resource_tick=(NOW - timedelta(hours=1)).isoformat()
+            )
+            repo.tick_settlements(NOW - timedelta(minutes=30))
+            settlement = repo.get_settlement(settlement_id)
+
+            repo.tick_settlements(NOW)
+            assert repo.get_settlement(settlement_id)["last_resource_tick"] == settlement["last_resource_tick"]
+
+    def test_unknown_settlement_columns_are_rejected(self, db_conn):
+        for repo in _repositories(db_conn).values():
+            player_id = repo.add_player("typo_player")
+            with pytest.raises(ValueError, match="Unknown settlement columns"):
+                repo.add_settlement(player_id, "Typo", fod=10)
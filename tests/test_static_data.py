@@ -0,0 +1,73 @@
+import dataclasses
+import threading
+import pytest
+from unittest.mock import patch
+from db import static_data
+from db.static_data import bump_static_data_version, get_static_data, invalidate_static_data
+
+
+def _count_statements(conn):
+    statements = []
+    conn.set_trace_callback(statements.append)
+    return statements
+
+
+class TestStaticData:
+
+    def test_snapshot_is_immutable(self, db_conn):
+        data = get_static_data(db_conn)
+
+        node = data.research_nodes[0]
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            node.cost_food = 0
+        with pytest.raises(TypeError):
+            data.unit_types["infantry"] = None
+        assert not hasattr(node, "__dict__")
+        assert node.to_dict() == dict(db_conn.execute("SELECT * FROM research_nodes WHERE id = ?", (node.id,)).fetchone())
+
+    def test_loaded_once_and_shared(self, db_conn):
+        invalidate_static_data()
+        first = get_static_data(db_conn)
+        statements = _count_statements(db_conn)
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(get_static_data())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert all(result is first for result in results)
+        assert get_static_data(db_conn) is first
+        assert statements == []
+
+    def test_version_bump_reloads(self, db_conn):
+        first = get_static_data(db_conn)
+
+        with patch.object(static_data, "STATIC_DATA_CHECK_SECONDS", 0):
+            assert get_static_data(db_conn) is first
+
+            db_conn.execute("UPDATE unit_types SET attack = 99 WHERE unit_type = 'infantry'")
+            bump_static_data_version(db_conn.cursor())
+            db_conn.commit()
+            reloaded = get_static_data(db_conn)
+
+        assert reloaded.version == first.version + 1
+        assert reloaded.unit_types["infantry"].attack == 99
+        assert first.unit_types["infantry"].attack == 10
+
+    def test_call_sites_use_the_cache(self, db_conn):
+        from database_operations.database_operations import resolve_settlement_type_ids, resolve_settlement_type_names
+        from systems.research.research_nodes import get_all_research_nodes
+        from systems.resources.production_rates import node_has_production_effects
+
+        get_static_data(db_conn)
+        statements = _count_statements(db_conn)
+
+        names = resolve_settlement_type_names(db_conn)
+        assert resolve_settlement_type_ids(db_conn)[names[1]] == 1
+        assert len(get_all_research_nodes(db_conn)) == db_conn.execute("SELECT COUNT(*) FROM research_nodes").fetchone()[0]
+        farming = db_conn.execute("SELECT id FROM research_nodes WHERE name = 'Improved Farming'").fetchone()[0]
+        statements.clear()
+        assert node_has_production_effects(db_conn.cursor(), farming)
+        assert statements == []
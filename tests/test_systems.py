@@ -2,10 +2,12 @@ import pytest
 import sqlite3
 from unittest.mock import Mock, patch, MagicMock, ANY
 from systems.unit_training import queue_unit_training
-from systems.resources.resources import get_player_total_resources_for_user
+from systems.resources.resources import get_player_total_resources
 from flask import Flask
 from datetime import datetime, timedelta
+from contextlib import contextmanager
 import json
+import threading
 
 class TestSystems:
     
@@ -46,13 +48,10 @@ class TestSystems:
         mock_conn.close.assert_called_once()
 
 
-    @patch('systems.resources.resources.get_player_id_for_user')
+    @patch('systems.resources.resources.lazy_accrual_enabled', return_value=True)
     @patch('systems.resources.resources.connect_db')
-    def test_get_player_total_resources_mocked(self, mock_connect_db, mock_get_player_id):
-        """Test with mocked database"""
-        # Mock the player_id lookup
-        mock_get_player_id.return_value = 1
-        
+    def test_get_player_total_resources_mocked(self, mock_connect_db, mock_lazy):
+        """Test with mocked database (lazy accrual sums the settlements)"""
         mock_conn = MagicMock()
         mock_cursor = MagicMock()
         mock_conn.cursor.return_value = mock_cursor
@@ -67,7 +66,7 @@ class TestSystems:
             'total_gold': 10
         }
         
-        result = get_player_total_resources_for_user(1)
+        result = get_player_total_resources(1)
         
         mock_cursor.execute.assert_called_once()
         sql, params = mock_cursor.execute.call_args[0]
@@ -131,4 +130,845 @@ class TestSystems:
         assert params[5] == 1    # settlement_id
 
 
+
+def _add_player_settlements(conn, username, settlements):
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO players (username, is_npc) VALUES (?, 0)", (username,))
+    player_id = cursor.lastrowid
+    for food, wood, stone, silver, last_tick in settlements:
+        cursor.execute("""
+            INSERT INTO settlements
+            (player_id, name, x, y, settlement_type_id, food, wood, stone, silver, last_resource_tick)
+            VALUES (?, ?, 0, 0, 1, ?, ?, ?, ?, ?)
+        """, (player_id, f"{username} {last_tick}", food, wood, stone, silver, last_tick))
+    conn.commit()
+    return player_id
+
+
+@contextmanager
+def _spend_between_staging_and_write(db_file, player_id, cost_per_settlement):
+    """
+    Commit a spend from a second connection after the bulk tick stages its rows and
+    before it writes them. The spend waits instead if the tick holds the write lock.
+    """
+    from systems.resources import resource_tick
+    from storage.sqlite_repository import SQLiteRepository
+
+    add_batch = resource_tick.add_batch_to_player_totals
+    spenders = []
+
+    def spend():
+        conn = db_file()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            SQLiteRepository(conn.cursor()).spend_resources(player_id, cost_per_settlement)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def spend_then_add_batch(cursor, batch_table):
+        spender = threading.Thread(target=spend)
+        spender.start()
+        spenders.append(spender)
+        spender.join(0.3)  # done by now unless it is waiting for the tick's lock
+        add_batch(cursor, batch_table)
+
+    with patch.object(resource_tick, "add_batch_to_player_totals", spend_then_add_batch):
+        yield
+    for spender in spenders:
+        spender.join()
+    assert spenders, "the tick never reached its write"
+
+
+class TestBulkResourceTick:
+
+    NOW = datetime(2025, 1, 8, 12, 0, 0)
+
+    def _build_world(self, conn):
+        _add_player_settlements(conn, "alice", [
+            (100, 100, 100, 100, "2025-01-08T11:00:00"),
+            (9990, 100, 100, 4999, "2025-01-08 11:59:00"),
+            (12000, 0, 0, 0, "2025-01-08T10:30:00.250"),
+        ])
+        _add_player_settlements(conn, "bob", [
+            (0, 0, 0, 0, "2024-12-01T00:00:00"),         # capped at 7 days of catch-up
+            (500, 500, 500, 500, "2025-01-08T12:00:00"),  # nothing elapsed
+            (500, 500, 500, 500, "2025-01-09T00:00:00"),  # clock skew, in the future
+            (500, 500, 500, 500, None),
+        ])
+
+    def _snapshot(self, conn):
+        settlements = [tuple(row) for row in conn.execute(
+            "SELECT id, food, wood, stone, silver, last_resource_tick FROM settlements ORDER BY id"
+        )]
+        players = [tuple(row) for row in conn.execute(
+            "SELECT id, experience, level FROM players ORDER BY id"
+        )]
+        return settlements, players
+
+    def test_bulk_tick_matches_per_settlement_tick(self, db_conn):
+        from db.init_db import init_db
+        from db.seed import seed_db
+        from systems.resources.resource_tick import apply_resource_tick, apply_bulk_resource_tick
+
+        legacy_conn = sqlite3.connect(":memory:")
+        legacy_conn.row_factory = sqlite3.Row
+        init_db(legacy_conn)
+        seed_db(legacy_conn)
+
+        self._build_world(legacy_conn)
+        self._build_world(db_conn)
+
+        with patch('systems.resources.resource_tick.datetime') as mock_datetime:
+            mock_datetime.utcnow.return_value = self.NOW
+            mock_datetime.fromisoformat = datetime.fromisoformat
+            cursor = legacy_conn.cursor()
+            for (settlement_id,) in legacy_conn.execute(
+                "SELECT s.id FROM settlements s JOIN players p ON s.player_id = p.id WHERE p.is_npc = 0"
+            ).fetchall():
+                apply_resource_tick(settlement_id, cursor)
+            legacy_conn.commit()
+
+        result = apply_bulk_resource_tick(db_conn.cursor(), now=self.NOW, where="p.is_npc = 0")
+        db_conn.commit()
+
+        assert self._snapshot(db_conn) == self._snapshot(legacy_conn)
+        assert result["settlements"] == 4
+        assert result["players"] == 2
+        legacy_conn.close()
+
+    def test_bulk_tick_respects_filter(self, db_conn):
+        from systems.resources.resource_tick import apply_bulk_resource_tick
+
+        self._build_world(db_conn)
+        result = apply_bulk_resource_tick(db_conn.cursor(), now=self.NOW, where="p.username = ?", params=("bob",))
+
+        assert result["settlements"] == 1
+        npc_food = db_conn.execute("SELECT food FROM settlements WHERE name = 'Northumbria'").fetchone()[0]
+        assert npc_food == 1000
+
+
+    def test_read_projection_matches_tick(self, db_conn):
+        from systems.resources.resource_tick import accrued_resource_sql, apply_bulk_resource_tick
+
+        self._build_world(db_conn)
+        now_sql = f"'{self.NOW.isoformat()}'"
+        projected = [tuple(row) for row in db_conn.execute(f"""
+            SELECT
+                s.id,
+                s.food + {accrued_resource_sql('food', now_sql)},
+                s.wood + {accrued_resource_sql('wood', now_sql)},
+                s.stone + {accrued_resource_sql('stone', now_sql)},
+                s.silver + {accrued_resource_sql('silver', now_sql)}
+            FROM settlements s
+            ORDER BY s.id
+        """)]
+
+        apply_bulk_resource_tick(db_conn.cursor(), now=self.NOW)
+        ticked = [tuple(row) for row in db_conn.execute(
+            "SELECT id, food, wood, stone, silver FROM settlements ORDER BY id"
+        )]
+
+        assert [row[0] for row in projected] == [row[0] for row in ticked]
+        for projected_row, ticked_row in zip(projected, ticked):
+            assert projected_row[1:] == pytest.approx(ticked_row[1:])
+
+
+    def test_spend_during_tick_is_not_overwritten(self, db_file):
+        from systems.resources.resource_tick import apply_bulk_resource_tick
+        from systems.resources.resource_totals import find_totals_mismatches
+
+        conn = db_file()
+        conn.execute("PRAGMA journal_mode = WAL")
+        player_id = _add_player_settlements(conn, "erin", [(1000, 100, 100, 100, "2025-01-08T11:00:00")])
+
+        with _spend_between_staging_and_write(db_file, player_id, {"food": 500}):
+            apply_bulk_resource_tick(conn.cursor(), now=self.NOW)
+            conn.commit()
+
+        food = conn.execute("SELECT food FROM settlements WHERE player_id = ?", (player_id,)).fetchone()[0]
+        assert food == 1000 + 60 - 500
+        assert find_totals_mismatches(conn.cursor()) == []
+        conn.close()
+
+    def test_full_storage_is_not_ticked(self, db_conn):
+        from systems.resources.resource_tick import (
+            apply_bulk_resource_tick, get_settlements_filling_up, storage_full_timestamp
+        )
+        from systems.resources.accrual import settle_player_resources
+
+        player_id = _add_player_settlements(db_conn, "carol", [
+            (9970, 9982, 9988, 4994, "2025-01-08T11:00:00"),  # every resource fills within the hour
+            (0, 0, 0, 0, "2025-01-08T11:00:00"),
+        ])
+        cursor = db_conn.cursor()
+
+        filling = get_settlements_filling_up(cursor, self.NOW, self.NOW + timedelta(hours=1))
+        assert filling == []
+
+        apply_bulk_resource_tick(cursor, now=self.NOW)
+        rows = db_conn.execute(
+            "SELECT food, silver, storage_full_at FROM settlements WHERE player_id = ? ORDER BY id", (player_id,)
+        ).fetchall()
+        assert (rows[0][0], rows[0][1], rows[0][2]) == (10000, 5000, storage_full_timestamp(self.NOW))
+        # Silver is the slowest to fill: 4988 to go at 12/hour
+        full_at = self.NOW + timedelta(hours=4988 / 12)
+        assert rows[1][2] == storage_full_timestamp(full_at)
+        # Written by SQL and by Python in the same format, so the cutoff is inclusive at the same instant
+        filling = get_settlements_filling_up(cursor, self.NOW, full_at)
+        assert [row["storage_full_at"] for row in filling] == [storage_full_timestamp(full_at)]
+
+        later = self.NOW + timedelta(hours=1)
+        result = apply_bulk_resource_tick(cursor, now=later, where="s.player_id = ?", params=(player_id,))
+        assert result["settlements"] == 1
+        full_tick = db_conn.execute(
+            "SELECT last_resource_tick FROM settlements WHERE player_id = ? ORDER BY id", (player_id,)
+        ).fetchone()[0]
+        assert full_tick == self.NOW.isoformat()
+
+        # Settling before a spend brings the full settlement's tick forward without crediting anything
+        settle_player_resources(cursor, player_id, now=later)
+        full_tick, storage_full_at = db_conn.execute(
+            "SELECT last_resource_tick, storage_full_at FROM settlements WHERE player_id = ? ORDER BY id",
+            (player_id,)
+        ).fetchone()
+        assert full_tick == later.isoformat()
+        assert storage_full_at == storage_full_timestamp(later)
+
+        filling = get_settlements_filling_up(cursor, later, later + timedelta(days=30))
+        assert [row["player_id"] for row in filling] == [player_id]
+
+
+class TestParallelResourceTick:
+
+    @pytest.mark.parametrize("workers", [0, 2])
+    def test_parallel_tick_matches_bulk_tick(self, tmp_path, workers):
+        import shutil
+        from db.init_db import init_db
+        from db.seed import seed_db
+        from systems.resources.resource_tick import apply_bulk_resource_tick
+        from systems.resources.parallel_tick import parallel_resource_tick, create_tick_executor
+
+        bulk_path = tmp_path / "bulk.db"
+        parallel_path = tmp_path / "parallel.db"
+        conn = sqlite3.connect(str(bulk_path))
+        conn.row_factory = sqlite3.Row
+        init_db(conn)
+        seed_db(conn)
+        TestBulkResourceTick()._build_world(conn)
+        conn.close()
+        shutil.copy(bulk_path, parallel_path)
+
+        now = TestBulkResourceTick.NOW
+        bulk_conn = sqlite3.connect(str(bulk_path))
+        bulk_conn.row_factory = sqlite3.Row
+        apply_bulk_resource_tick(bulk_conn.cursor(), now=now, where="p.is_npc = 0")
+        bulk_conn.commit()
+
+        parallel_conn = sqlite3.connect(str(parallel_path))
+        parallel_conn.row_factory = sqlite3.Row
+        executor = create_tick_executor(workers) if workers else None
+        try:
+            result = parallel_resource_tick(
+                parallel_conn, str(parallel_path), executor,
+                chunk_size=2, write_batch_size=3, now=now, where="p.is_npc = 0"
+            )
+        finally:
+            if executor:
+                executor.shutdown()
+
+        snapshot = TestBulkResourceTick()._snapshot
+        assert snapshot(parallel_conn) == snapshot(bulk_conn)
+        assert result["settlements"] == 4
+        assert result["players"] == 2
+        bulk_conn.close()
+        parallel_conn.close()
+
+
+class TestPlayerResourceTotals:
+
+    NOW = TestBulkResourceTick.NOW
+
+    def test_every_write_path_keeps_totals_in_step(self, tmp_path):
+        from db.init_db import init_db
+        from db.seed import seed_db
+        from storage.sqlite_repository import SQLiteRepository
+        from systems.resources.resource_tick import apply_resource_tick, apply_bulk_resource_tick
+        from systems.resources.parallel_tick import parallel_resource_tick
+        from systems.resources.resource_totals import find_totals_mismatches
+
+        path = tmp_path / "totals.db"
+        conn = sqlite3.connect(str(path))
+        conn.row_factory = sqlite3.Row
+        init_db(conn)
+        seed_db(conn)
+        TestBulkResourceTick()._build_world(conn)
+        cursor = conn.cursor()
+        assert find_totals_mismatches(cursor) == []
+
+        with patch('systems.resources.resource_tick.datetime') as mock_datetime:
+            mock_datetime.utcnow.return_value = self.NOW - timedelta(minutes=10)
+            mock_datetime.fromisoformat = datetime.fromisoformat
+            apply_resource_tick(1, cursor)
+            apply_resource_tick(cursor.execute("SELECT MAX(id) FROM settlements").fetchone()[0], cursor)
+        apply_bulk_resource_tick(cursor, now=self.NOW, where="p.is_npc = 0")
+        conn.commit()
+        parallel_resource_tick(conn, str(path), None, chunk_size=2, now=self.NOW + timedelta(minutes=5))
+        assert find_totals_mismatches(cursor) == []
+
+        alice = cursor.execute("SELECT id FROM players WHERE username = 'alice'").fetchone()[0]
+        bob = cursor.execute("SELECT id FROM players WHERE username = 'bob'").fetchone()[0]
+        SQLiteRepository(cursor).spend_resources(alice, {"wood": 10, "gold": 1})
+        cursor.execute("UPDATE settlements SET player_id = ? WHERE id = (SELECT MIN(id) FROM settlements WHERE player_id = ?)",
+                       (alice, bob))
+        cursor.execute("DELETE FROM settlements WHERE id = (SELECT MAX(id) FROM settlements WHERE player_id = ?)", (bob,))
+        conn.commit()
+
+        assert find_totals_mismatches(cursor) == []
+        assert cursor.execute(
+            "SELECT settlement_count FROM player_resource_totals WHERE player_id = ?", (alice,)
+        ).fetchone()[0] == 4
+        conn.close()
+
+    def test_total_resources_adds_accrual_to_the_totals_row_in_tick_mode(self, db_conn):
+        from systems.settlements.settlements import get_player_settlements
+
+        last_tick = datetime(2025, 1, 8, 11, 0, 0)
+        player_id = _add_player_settlements(db_conn, "dave", [
+            (100.7, 200, 300, 400, last_tick.isoformat()),
+            (1000, 0, 0, 0, last_tick.isoformat()),
+            (10000, 10000, 10000, 5000, last_tick.isoformat()),  # full, accrues nothing
+        ])
+        db_conn.execute("UPDATE settlements SET storage_full_at = last_resource_tick WHERE player_id = ? AND food = 10000",
+                        (player_id,))
+        db_conn.commit()
+
+        with patch('systems.resources.resources.lazy_accrual_enabled', return_value=False):
+            assert get_player_total_resources(player_id, db_conn, now=last_tick) == {
+                'total_food': 11100, 'total_wood': 10200, 'total_stone': 10300, 'total_silver': 5400, 'total_gold': 0
+            }
+            for now in (last_tick + timedelta(hours=1), last_tick + timedelta(days=1), last_tick + timedelta(days=30)):
+                totals = get_player_total_resources(player_id, db_conn, now=now)
+                settlements = get_player_settlements(player_id, db_conn, now=now)
+                assert totals == {f"total_{resource}": sum(s[resource] for s in settlements)
+                                  for resource in ("food", "wood", "stone", "silver", "gold")}
+            assert totals['total_food'] > 11100
+
+    def test_checker_rebuilds_drifted_totals(self, db_conn):
+        from systems.resources.resource_totals import check_player_totals
+
+        player_id = _add_player_settlements(db_conn, "erin", [(500, 500, 500, 500, "2025-01-08T11:00:00")])
+        db_conn.execute("UPDATE player_resource_totals SET food = food + 50 WHERE player_id = ?", (player_id,))
+        db_conn.execute("DELETE FROM player_resource_totals WHERE player_id = 1")
+        db_conn.commit()
+
+        mismatches = check_player_totals(fix=True, conn=db_conn)
+        assert [row["player_id"] for row in mismatches] == [1, player_id]
+        assert mismatches[1]["stored_food"] == 550 and mismatches[1]["food"] == 500
+        assert check_player_totals(conn=db_conn) == []
+
+
+class TestResourceTickScheduler:
+
+    class _Clock:
+        """Fake monotonic clock: waiting and ticking advance it, nothing sleeps."""
+
+        def __init__(self):
+            self.now = 0.0
+
+        def __call__(self):
+            return self.now
+
+        def advance(self, seconds):
+            self.now += seconds
+
+    def _run(self, slots, interval, tick, fires):
+        """Run the wheel loop on a fake clock until tick has been called fires times."""
+        from systems.resources.resource_tick_service import ResourceTickService
+
+        clock = self._Clock()
+        service = ResourceTickService(slots=slots, clock=clock)
+        service.catch_up = lambda: {}
+        service.record_lag = lambda: None
+        service._wait = clock.advance
+        fired = []
+
+        def tick_slots(due):
+            fired.append((round(clock.now, 6), due))
+            tick(clock, len(fired))
+            if len(fired) == fires:
+                service.running = False
+
+        service.tick_slots = tick_slots
+        service.running = True
+        service._run_loop(interval)
+        return service, fired
+
+    def test_slots_fire_in_order(self):
+        service, fired = self._run(slots=4, interval=0.2, tick=lambda clock, n: None, fires=5)
+
+        assert fired == [(0.0, [0]), (0.05, [1]), (0.1, [2]), (0.15, [3]), (0.2, [0])]
+        assert service.overrun_count == 0
+
+    def test_tick_duration_does_not_drift_the_schedule(self):
+        service, fired = self._run(slots=4, interval=0.2, tick=lambda clock, n: clock.advance(0.03), fires=4)
+
+        assert [at for at, _ in fired] == [0.0, 0.05, 0.1, 0.15]
+        assert service.overrun_count == 0
+
+    def test_overrun_merges_missed_slots(self):
+        def slow_first_tick(clock, n):
+            if n == 1:
+                clock.advance(0.12)  # misses the 0.05s and 0.10s deadlines
+
+        service, fired = self._run(slots=4, interval=0.2, tick=slow_first_tick, fires=3)
+
+        assert service.overrun_count == 1
+        assert fired == [(0.0, [0]), (0.12, [1, 2]), (0.15, [3])]
+
+    @pytest.mark.parametrize("bulk", [True, False])
+    def test_tick_takes_the_write_lock_before_reading(self, db_file, bulk):
+        from systems.resources import resource_tick_service
+        from systems.resources.resource_tick_service import ResourceTickService
+
+        conn = db_file()
+        _add_player_settlements(conn, "fay", [(0, 0, 0, 0, "2025-01-08T11:00:00")])
+        conn.close()
+        statements = []
+
+        def traced_connect():
+            traced = db_file()
+            traced.set_trace_callback(statements.append)
+            return traced
+
+        with patch.object(resource_tick_service, "connect_db", traced_connect):
+            ResourceTickService(bulk=bulk, slots=1, workers=0).tick_slots([0])
+
+        assert statements[0] == "BEGIN IMMEDIATE"
+        assert statements[-1] == "COMMIT"
+
+
+class TestResourceTickCatchUp:
+
+    def _stale_world(self, conn):
+        return _add_player_settlements(conn, "dave", [
+            (0, 0, 0, 0, "2020-01-01T00:00:00") for _ in range(5)
+        ])
+
+    def _ticks(self, conn, player_id):
+        return [row[0] for row in conn.execute(
+            "SELECT last_resource_tick FROM settlements WHERE player_id = ? ORDER BY id", (player_id,)
+        )]
+
+    def test_catch_up_commits_in_chunks(self, db_file):
+        from systems.resources import resource_tick_service
+        from systems.resources.resource_tick_service import ResourceTickService
+
+        conn = db_file()
+        player_id = self._stale_world(conn)
+        service = ResourceTickService()
+
+        with patch.object(resource_tick_service, "connect_db", db_file):
+            result = service.catch_up(chunk_size=2, pause_seconds=0)
+
+        assert result == {"settlements": 5, "chunks": 3}
+        assert "2020-01-01T00:00:00" not in self._ticks(conn, player_id)
+        food = conn.execute("SELECT food FROM settlements WHERE player_id = ?", (player_id,)).fetchone()[0]
+        assert food == 10000
+        conn.close()
+
+    def test_catch_up_skips_full_settlements(self, db_file):
+        from systems.resources import resource_tick_service
+        from systems.resources.resource_tick_service import ResourceTickService
+
+        conn = db_file()
+        player_id = self._stale_world(conn)
+        conn.execute("""
+            UPDATE settlements SET storage_full_at = '2019-12-31T00:00:00.000'
+            WHERE player_id = ? AND id IN (SELECT id FROM settlements WHERE player_id = ? ORDER BY id LIMIT 3)
+        """, (player_id, player_id))
+        conn.commit()
+        service = ResourceTickService()
+
+        with patch.object(resource_tick_service, "connect_db", db_file):
+            result = service.catch_up(chunk_size=2, pause_seconds=0)
+
+        assert result == {"settlements": 2, "chunks": 1}
+        assert self._ticks(conn, player_id)[:3] == ["2020-01-01T00:00:00"] * 3
+        assert resource_tick_service.CATCHUP_REMAINING.value() == 0
+        conn.close()
+
+    def test_spend_between_chunks_is_not_overwritten(self, db_file):
+        from systems.resources import resource_tick_service
+        from systems.resources.resource_tick_service import ResourceTickService
+        from systems.resources.resource_totals import find_totals_mismatches
+
+        conn = db_file()
+        conn.execute("PRAGMA journal_mode = WAL")
+        player_id = self._stale_world(conn)
+        service = ResourceTickService()
+
+        with patch.object(resource_tick_service, "connect_db", db_file), \
+                _spend_between_staging_and_write(db_file, player_id, {"food": 500}):
+            service.catch_up(chunk_size=5, pause_seconds=0)
+
+        foods = [row[0] for row in conn.execute("SELECT food FROM settlements WHERE player_id = ?", (player_id,))]
+        assert foods == [9500] * 5
+        assert find_totals_mismatches(conn.cursor()) == []
+        conn.close()
+
+    def test_interrupted_catch_up_resumes(self, db_file):
+        from systems.resources import resource_tick_service
+        from systems.resources.resource_tick_service import ResourceTickService
+
+        conn = db_file()
+        player_id = self._stale_world(conn)
+        service = ResourceTickService()
+
+        with patch.object(resource_tick_service, "connect_db", db_file):
+            service._stop_event.set()
+            first = service.catch_up(chunk_size=2, pause_seconds=0)
+            caught_up = self._ticks(conn, player_id)[:2]
+
+            service._stop_event.clear()
+            second = service.catch_up(chunk_size=2, pause_seconds=0)
+
+        assert first == {"settlements": 2, "chunks": 1}
+        assert second == {"settlements": 3, "chunks": 2}
+        assert self._ticks(conn, player_id)[:2] == caught_up
+        conn.close()
+
+
+class TestLevelEngine:
+
+    def _recursive_level(self, level, experience):
+        from systems.experience.experience import calculate_xp_for_level
+        while experience >= calculate_xp_for_level(level + 1):
+            level += 1
+        return level
+
+    def test_level_for_xp_matches_recursive_level_up(self):
+        from systems.experience.experience import level_for_xp, XP_THRESHOLDS
+
+        samples = [0, 99, 100, 159, 160, 161, 255, 256, 10_000, 1_000_000]
+        samples += [threshold + offset for threshold in XP_THRESHOLDS[1:40] for offset in (-1, 0, 1)]
+        for experience in samples:
+            assert level_for_xp(experience) == self._recursive_level(1, experience), experience
+
+    def test_level_cap_is_the_last_threshold_that_fits_in_sqlite(self, db_conn):
+        from systems.experience.experience import MAX_LEVEL, XP_THRESHOLDS, calculate_xp_for_level
+
+        assert calculate_xp_for_level(MAX_LEVEL + 1) > 2**63 - 1
+        db_conn.execute("INSERT INTO players (username, level, experience) VALUES ('capped', ?, ?)",
+                        (MAX_LEVEL, XP_THRESHOLDS[-1]))
+        assert db_conn.execute("SELECT experience FROM players WHERE username = 'capped'").fetchone()[0] \
+            == XP_THRESHOLDS[-1]
+
+    def test_experience_progress(self):
+        from systems.experience.experience import experience_progress
+
+        assert experience_progress(1, 50) == {
+            "level": 1, "experience": 50, "xp_for_next_level": 160, "xp_progress": 50
+        }
+        assert experience_progress(2, 200) == {
+            "level": 2, "experience": 200, "xp_for_next_level": 96, "xp_progress": 40
+        }
+
+    def test_apply_experience_batch(self, db_conn):
+        from systems.experience.experience import apply_experience_batch
+
+        alice = _add_player_settlements(db_conn, "alice", [])
+        bob = _add_player_settlements(db_conn, "bob", [])
+        carol = _add_player_settlements(db_conn, "carol", [])
+        db_conn.execute("UPDATE players SET level = 5, experience = 0 WHERE id = ?", (carol,))
+
+        level_ups = apply_experience_batch(db_conn.cursor(), [(alice, 100), (alice, 200), (bob, 50), (carol, 10)])
+
+        rows = {row["id"]: (row["experience"], row["level"]) for row in db_conn.execute("SELECT * FROM players")}
+        assert rows[alice] == (300, self._recursive_level(1, 300))
+        assert rows[bob] == (50, 1)
+        assert rows[carol] == (10, 5)  # levels never go down
+        assert level_ups == 1
+
+
+class TestProductionRates:
+
+    def _player_with_village(self, conn, level=10):
+        player_id = _add_player_settlements(conn, "alice", [(5000, 5000, 5000, 5000, datetime.utcnow().isoformat())])
+        conn.execute("UPDATE players SET level = ? WHERE id = ?", (level, player_id))
+        conn.commit()
+        settlement_id = conn.execute("SELECT id FROM settlements WHERE player_id = ?", (player_id,)).fetchone()[0]
+        return player_id, settlement_id
+
+    def _node_id(self, conn, name):
+        return conn.execute("SELECT id FROM research_nodes WHERE name = ?", (name,)).fetchone()[0]
+
+    def _rates(self, conn, settlement_id):
+        row = conn.execute("""
+            SELECT current_food_rate, current_wood_rate, current_stone_rate, current_silver_rate
+            FROM settlements WHERE id = ?
+        """, (settlement_id,)).fetchone()
+        return tuple(row)
+
+    def test_compute_effective_rates(self):
+        from systems.resources.production_rates import compute_effective_rates
+
+        base = {"food": 60.0, "wood": 36.0, "stone": 24.0, "silver": 12.0}
+        research = {"food": 1.25, "wood": 1.0, "stone": 1.0, "silver": 1.0}
+        modifiers = [
+            {"resource_type": "food", "modifier_value": 10, "modifier_operation": "add"},
+            {"resource_type": "all", "modifier_value": 2.0, "modifier_operation": "multiply"},
+        ]
+
+        rates = compute_effective_rates(base, research, modifiers)
+
+        assert rates == {"food": 175.0, "wood": 72.0, "stone": 48.0, "silver": 24.0}
+
+    def test_unlock_research_recomputes_rates(self, db_file):
+        from systems.research.research_nodes import unlock_research_node
+        from systems.resources.production_rates import invalidate_player_effects
+
+        invalidate_player_effects()
+        conn = db_file()
+        player_id, settlement_id = self._player_with_village(conn)
+        farming = self._node_id(conn, "Improved Farming")
+        economics = self._node_id(conn, "Master Economics")
+        conn.close()
+
+        with patch('db.writer.connect_db', db_file):
+            unlock_research_node(player_id, farming)
+            unlock_research_node(player_id, economics)
+
+        conn = db_file()
+        assert self._rates(conn, settlement_id) == pytest.approx((60 * 1.25 * 1.15, 36 * 1.15, 24 * 1.15, 12 * 1.15))
+        conn.close()
+
+    def test_modifier_recomputes_only_its_settlement(self, db_conn):
+        from systems.resources.production_rates import add_settlement_modifier, invalidate_player_effects
+
+        invalidate_player_effects()
+        player_id, settlement_id = self._player_with_village(db_conn)
+        npc_rates = db_conn.execute(
+            "SELECT current_food_rate FROM settlements WHERE name = 'Northumbria'"
+        ).fetchone()[0]
+
+        add_settlement_modifier(db_conn.cursor(), settlement_id, "wood", 1.5, expires_at=datetime(2099, 1, 1))
+        add_settlement_modifier(db_conn.cursor(), settlement_id, "wood", 100, modifier_operation="add",
+                                expires_at=datetime(2000, 1, 1))  # already expired
+
+        assert self._rates(db_conn, settlement_id) == (60.0, 54.0, 24.0, 12.0)
+        assert db_conn.execute(
+            "SELECT current_food_rate FROM settlements WHERE name = 'Northumbria'"
+        ).fetchone()[0] == npc_rates
+
+    def test_player_effects_cache_follows_unlocks(self, db_conn):
+        from systems.resources.production_rates import get_player_production_multipliers, invalidate_player_effects
+
+        invalidate_player_effects()
+        player_id, _ = self._player_with_village(db_conn)
+        cursor = db_conn.cursor()
+
+        assert get_player_production_multipliers(cursor, player_id)["stone"] == 1.0
+
+        queries = []
+        db_conn.set_trace_callback(queries.append)
+        assert get_player_production_multipliers(cursor, player_id)["stone"] == 1.0  # cached
+        db_conn.set_trace_callback(None)
+        assert len(queries) == 1 and "COUNT(*)" in queries[0]
+
+        # Unlocked without invalidating, as another process would: seen on the next call
+        db_conn.execute("INSERT INTO player_research (player_id, node_id) VALUES (?, ?)",
+                        (player_id, self._node_id(db_conn, "Quarry Mastery")))
+        assert get_player_production_multipliers(cursor, player_id)["stone"] == 1.25
+
+        db_conn.execute("INSERT INTO player_research (player_id, node_id) VALUES (?, ?)",
+                        (player_id, self._node_id(db_conn, "Master Economics")))
+        assert get_player_production_multipliers(cursor, player_id)["stone"] == pytest.approx(1.25 * 1.15)
+
+    def test_recompute_sees_research_unlocked_elsewhere(self, db_conn):
+        from systems.resources.production_rates import recompute_settlement_rates, invalidate_player_effects
+
+        invalidate_player_effects()
+        player_id, settlement_id = self._player_with_village(db_conn)
+        cursor = db_conn.cursor()
+        recompute_settlement_rates(cursor, [settlement_id])
+
+        db_conn.execute("INSERT INTO player_research (player_id, node_id) VALUES (?, ?)",
+                        (player_id, self._node_id(db_conn, "Improved Farming")))
+        recompute_settlement_rates(cursor, [settlement_id])
+
+        assert self._rates(db_conn, settlement_id)[0] == 75.0
+
+
+class TestModifierExpiry:
+
+    def test_expire_due_modifiers(self, db_conn):
+        from systems.resources.production_rates import add_settlement_modifier, invalidate_player_effects
+        from systems.resources.modifier_expiry import expire_due_modifiers
+
+        invalidate_player_effects()
+        _, settlement_id = TestProductionRates()._player_with_village(db_conn)
+        now = datetime.utcnow()
+        cursor = db_conn.cursor()
+        expiring = add_settlement_modifier(cursor, settlement_id, "food", 2.0, expires_at=now + timedelta(minutes=5))
+        add_settlement_modifier(cursor, settlement_id, "food", 1.5, expires_at=now + timedelta(days=1))
+
+        assert expire_due_modifiers(cursor, [expiring], now) == []
+
+        affected = expire_due_modifiers(cursor, [expiring], now + timedelta(minutes=6))
+
+        assert affected == [settlement_id]
+        assert TestProductionRates()._rates(db_conn, settlement_id)[0] == 90.0
+        remaining = [row[0] for row in db_conn.execute("SELECT modifier_value FROM settlement_modifiers")]
+        assert remaining == [1.5]
+
+    def test_service_wakes_for_next_expiry(self, db_file):
+        import time
+        from systems.resources import modifier_expiry
+        from systems.resources.production_rates import add_settlement_modifier, invalidate_player_effects
+
+        invalidate_player_effects()
+        conn = db_file()
+        _, settlement_id = TestProductionRates()._player_with_village(conn)
+        service = modifier_expiry.ModifierExpiryService()
+
+        with patch.object(modifier_expiry, "connect_db", db_file), \
+                patch.object(modifier_expiry, "get_expiry_service", return_value=service):
+            service.start()
+            add_settlement_modifier(conn.cursor(), settlement_id, "wood", 3.0,
+                                    expires_at=datetime.utcnow() + timedelta(seconds=0.3))
+            conn.commit()
+            assert TestProductionRates()._rates(conn, settlement_id)[1] == 108.0
+
+            time.sleep(0.6)
+            service.stop()
+
+        assert TestProductionRates()._rates(conn, settlement_id)[1] == 36.0
+        conn.close()
+
+    def test_expiry_times_are_stored_in_one_format(self, db_conn):
+        from datetime import timezone
+        from db.init_db import init_db
+        from systems.resources.modifier_expiry import expire_due_modifiers, get_expiry_service
+        from systems.resources.production_rates import add_settlement_modifier, invalidate_player_effects
+
+        invalidate_player_effects()
+        _, settlement_id = TestProductionRates()._player_with_village(db_conn)
+        cursor = db_conn.cursor()
+        with patch.object(get_expiry_service(), "schedule"):
+            add_settlement_modifier(cursor, settlement_id, "food", 2.0,
+                                    expires_at=datetime(2025, 1, 8, 14, 0, tzinfo=timezone(timedelta(hours=2))))
+        cursor.execute("""
+            INSERT INTO settlement_modifiers (settlement_id, modifier_type, resource_type, modifier_value, expires_at)
+            VALUES (?, 'building_upgrade', 'wood', 2.0, '2025-01-08 11:00:00')
+        """, (settlement_id,))
+        init_db(db_conn)
+
+        stored = [row[0] for row in db_conn.execute("SELECT expires_at FROM settlement_modifiers ORDER BY id")]
+        assert stored == ["2025-01-08T12:00:00.000", "2025-01-08T11:00:00.000"]
+        assert expire_due_modifiers(cursor, [], datetime(2025, 1, 8, 11, 59, 59)) == [settlement_id]
+        assert db_conn.execute("SELECT COUNT(*) FROM settlement_modifiers").fetchone()[0] == 1
+        assert expire_due_modifiers(cursor, [], datetime(2025, 1, 8, 12, 0)) == [settlement_id]
+        assert db_conn.execute("SELECT COUNT(*) FROM settlement_modifiers").fetchone()[0] == 0
+
+    def test_modifiers_added_elsewhere_are_found_by_the_running_service(self, db_file):
+        import time
+        from systems.resources import modifier_expiry
+        from systems.resources.production_rates import add_settlement_modifier, invalidate_player_effects
+
+        invalidate_player_effects()
+        conn = db_file()
+        _, settlement_id = TestProductionRates()._player_with_village(conn)
+        leader, worker = modifier_expiry.ModifierExpiryService(), modifier_expiry.ModifierExpiryService()
+
+        with patch.object(modifier_expiry, "connect_db", db_file), \
+                patch.object(modifier_expiry, "EXPIRY_POLL_SECONDS", 0.1):
+            leader.start()
+            # Added in a worker process whose service is not running
+            with patch.object(modifier_expiry, "get_expiry_service", return_value=worker):
+                add_settlement_modifier(conn.cursor(), settlement_id, "wood", 3.0,
+                                        expires_at=datetime.utcnow() + timedelta(seconds=0.4))
+            conn.commit()
+            assert worker._heap == []
+
+            time.sleep(0.8)
+            leader.stop()
+
+        assert TestProductionRates()._rates(conn, settlement_id)[1] == 36.0
+        conn.close()
+
+    def test_service_survives_a_bad_heap_entry(self, db_file):
+        import heapq
+        import time
+        from datetime import timezone
+        from systems.resources import modifier_expiry
+        from systems.resources.production_rates import add_settlement_modifier, invalidate_player_effects
+
+        invalidate_player_effects()
+        conn = db_file()
+        _, settlement_id = TestProductionRates()._player_with_village(conn)
+        service = modifier_expiry.ModifierExpiryService()
+
+        rebuilt = threading.Event()
+        rebuild = service.rebuild
+
+        def rebuild_and_signal():
+            rebuild()
+            rebuilt.set()
+
+        service.rebuild = rebuild_and_signal
+
+        with patch.object(modifier_expiry, "connect_db", db_file), \
+                patch.object(modifier_expiry, "get_expiry_service", return_value=service):
+            service.start()
+            rebuilt.clear()
+            with service._condition:
+                heapq.heappush(service._heap, ("not a time", -1))
+                service._condition.notify()
+            # The loop drops the heap and rebuilds it; a modifier added before that rebuild but
+            # committed after it would only be found by the next poll
+            assert rebuilt.wait(5)
+            assert service.thread.is_alive()
+
+            # Aware times are normalised rather than breaking the heap's comparisons
+            add_settlement_modifier(conn.cursor(), settlement_id, "wood", 3.0,
+                                    expires_at=datetime.now(timezone.utc) + timedelta(seconds=0.3))
+            conn.commit()
+            time.sleep(0.6)
+            service.stop()
+
+        assert TestProductionRates()._rates(conn, settlement_id)[1] == 36.0
+        conn.close()
+
+    def test_expiry_takes_the_write_lock_first(self, db_file):
+        from systems.resources import modifier_expiry
+
+        statements = []
+
+        def traced_connect():
+            traced = db_file()
+            traced.set_trace_callback(statements.append)
+            return traced
+
+        with patch.object(modifier_expiry, "connect_db", traced_connect):
+            modifier_expiry.ModifierExpiryService()._expire([1], datetime(2030, 1, 1))
+
+        assert statements[0] == "BEGIN IMMEDIATE"
+        assert statements[-1] == "COMMIT"
+
+    def test_failed_expiry_is_retried_after_a_poll_interval(self, db_file):
+        from systems.resources import modifier_expiry
+
+        service = modifier_expiry.ModifierExpiryService()
+        now = datetime(2030, 1, 1)
+
+        with patch.object(modifier_expiry, "connect_db", db_file), \
+                patch.object(modifier_expiry, "expire_due_modifiers", side_effect=RuntimeError("locked")):
+            service._expire([7, 8], now)
+
+        retry_at = now + timedelta(seconds=modifier_expiry.EXPIRY_POLL_SECONDS)
+        assert sorted(service._heap) == [(retry_at, 7), (retry_at, 8)]
+        assert service._pop_due(now) == []
+
+
 # use python3 -m pytest tests/test_systems.py -v to run
\ No newline at end of file
@@ -0,0 +1,136 @@
+import threading
+import pytest
+from unittest.mock import patch
+from db import writer
+from db.writer import DatabaseWriter, WriterStoppedError, execute_write
+
+
+def _add_player(cursor, username):
+    cursor.execute("INSERT INTO players (username, is_npc) VALUES (?, 0)", (username,))
+    return cursor.lastrowid
+
+
+def _fail(cursor, username):
+    _add_player(cursor, username)
+    raise ValueError("no room")
+
+
+def _usernames(conn):
+    return {row[0] for row in conn.execute("SELECT username FROM players WHERE is_npc = 0")}
+
+
+class TestDatabaseWriter:
+
+    def test_group_commit_isolates_failed_units(self, db_file):
+        started = threading.Event()
+        release = threading.Event()
+        service = DatabaseWriter(max_batch=10)
+
+        def block(cursor):
+            started.set()
+            return release.wait(5)
+
+        with patch.object(writer, "connect_db", db_file):
+            service.start()
+            batches_before = writer.BATCH_UNITS.value()
+            blocker = service.submit(block)
+            assert started.wait(5)
+            futures = [
+                service.submit(_add_player, "first"),
+                service.submit(_fail, "doomed"),
+                service.submit(_add_player, "second"),
+            ]
+            release.set()
+
+            assert blocker.result(timeout=5) is True
+            assert isinstance(futures[0].result(timeout=5), int)
+            with pytest.raises(ValueError, match="no room"):
+                futures[1].result(timeout=5)
+            assert isinstance(futures[2].result(timeout=5), int)
+            service.stop()
+
+        count, units = writer.BATCH_UNITS.value()
+        # The three queued behind the blocker are committed together
+        assert count - batches_before[0] == 2
+        assert units - batches_before[1] == 4
+        conn = db_file()
+        assert _usernames(conn) == {"first", "second"}
+        conn.close()
+
+    def test_execute_write_goes_through_running_writer(self, db_file):
+        service = DatabaseWriter()
+
+        with patch.object(writer, "connect_db", db_file), \
+                patch.object(writer, "get_writer", return_value=service):
+            service.start()
+            execute_write(_add_player, "queued")
+            service.stop()
+
+        conn = db_file()
+        assert _usernames(conn) == {"queued"}
+        conn.close()
+
+    def test_execute_write_inline_rolls_back_on_error(self, db_file):
+        with patch.object(writer, "connect_db", db_file):
+            execute_write(_add_player, "kept")
+            with pytest.raises(ValueError):
+                execute_write(_fail, "dropped")
+
+        conn = db_file()
+        assert _usernames(conn) == {"kept"}
+        conn.close()
+
+    def test_writer_that_cannot_connect_falls_back_to_inline(self, db_file):
+        service = DatabaseWriter()
+        connections = iter([OSError("disk gone")])
+
+        def connect():
+            for error in connections:
+                raise error
+            return db_file()
+
+        with patch.object(writer, "connect_db", connect), \
+                patch.object(writer, "get_writer", return_value=service):
+            service.start()
+            service.thread.join(timeout=5)
+            assert service.running is False
+            execute_write(_add_player, "inline")
+
+        conn = db_file()
+        assert _usernames(conn) == {"inline"}
+        conn.close()
+
+    def test_queued_units_fail_fast_when_the_thread_dies(self, db_file):
+        started = threading.Event()
+        release = threading.Event()
+        service = DatabaseWriter()
+        commit_batch = service._commit_batch
+
+        def block(cursor):
+            started.set()
+            return release.wait(5)
+
+        def crash_after_first(conn, batch):
+            commit_batch(conn, batch)
+            raise MemoryError("writer thread crashed")
+
+        with patch.object(writer, "connect_db", db_file), \
+                patch.object(service, "_commit_batch", crash_after_first), \
+                patch.object(writer, "get_writer", return_value=service):
+            service.start()
+            blocker = service.submit(block)
+            assert started.wait(5)
+            queued = service.submit(_add_player, "never ran")
+            release.set()
+
+            assert blocker.result(timeout=5) is True
+            with pytest.raises(WriterStoppedError):
+                queued.result(timeout=1)
+            assert service.running is False
+            with pytest.raises(WriterStoppedError):
+                service.submit(_add_player, "rejected")
+            execute_write(_add_player, "inline")
+
+        conn = db_file()
+        assert _usernames(conn) == {"inline"}
+        conn.close()